@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; websockets at /socket.io/ to the signaling consumer and
+at /updates/ to the live updates consumer.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+# Sets up Django before the consumers import models.
+django_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import OriginValidator  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from live_updates.routing import websocket_urlpatterns as live_updates_urlpatterns  # noqa: E402
+from signaling.routing import websocket_urlpatterns as signaling_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_application,
+    'websocket': OriginValidator(
+        URLRouter(signaling_urlpatterns + live_updates_urlpatterns), settings.CORS_ALLOWED_ORIGINS),
+})
@@ -0,0 +1,53 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.views import APIView
+
+
+def served_view(view, async_view, **initkwargs):
+    """
+    The view function of async_view when settings.SERVER_MODE is "asgi",
+    otherwise that of its sync counterpart view. Under WSGI an async view
+    only adds an event loop per request, so the sync form is served there.
+    """
+    return (async_view if settings.SERVER_MODE == 'asgi' else view).as_view(**initkwargs)
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are `async def`. Under ASGI Django awaits the view
+    directly, so a slow client or a query waiting on the database holds no
+    worker thread; under WSGI Django would run it in a fresh event loop, so
+    each one subclasses a sync view that is served there instead (see
+    served_view).
+
+    Authentication, permission and throttling checks are sync in DRF and run
+    through sync_to_async, so every handler must be async (options excepted).
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(),
+                                  self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
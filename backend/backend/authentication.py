@@ -1,18 +1,81 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.exceptions import AuthenticationFailed
-
-class CookieJWTAuthentication(JWTAuthentication):
-    def authenticate(self, request):
-        header_auth = super().authenticate(request)
-        if header_auth is not None:
-            return header_auth
-
-        raw_token = request.COOKIES.get('access_token')
-        if raw_token is None:
-            return None
-
-        try:
-            validated_token = self.get_validated_token(raw_token)
-            return self.get_user(validated_token), validated_token
-        except AuthenticationFailed:
-            return None
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from user.cache import user_cache
+
+
+class CookieJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication from the Authorization header or the access_token cookie.
+
+    How the user behind a validated token is resolved depends on
+    settings.AUTH_USER_RESOLUTION:
+
+    - "db": load the User row on every request (default).
+    - "cached": load the User row through the in-process user cache.
+    - "stateless": build an unsaved User from the token claims, no query;
+      tokens without the email and full_name claims load the row instead.
+    """
+
+    def authenticate(self, request):
+        header_auth = super().authenticate(request)
+        if header_auth is not None:
+            return header_auth
+
+        raw_token = request.COOKIES.get('access_token')
+        if raw_token is None:
+            return None
+
+        try:
+            validated_token = self.get_validated_token(raw_token)
+            return self.get_user(validated_token), validated_token
+        except AuthenticationFailed:
+            return None
+
+    def get_user(self, validated_token):
+        mode = settings.AUTH_USER_RESOLUTION
+        if mode == 'stateless':
+            return self.get_stateless_user(validated_token)
+        if mode == 'cached':
+            return self.get_cached_user(validated_token)
+        return super().get_user(validated_token)
+
+    def get_cached_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = user_cache.get(user_id)
+        if user is None:
+            # The parent enforces is_active, so only active users get cached.
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+        return user
+
+    def get_stateless_user(self, validated_token):
+        """
+        Builds a User from the token claims. The instance has a primary key,
+        so it works in ORM filters and FK assignments, but it is not a full
+        row and must never be saved.
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if 'email' not in validated_token or 'full_name' not in validated_token:
+            # Issued by a plain simplejwt token class, without the user claims.
+            return super().get_user(validated_token)
+
+        User = get_user_model()
+        user = User(
+            pk=int(user_id),
+            email=validated_token['email'],
+            full_name=validated_token['full_name'],
+            is_active=True,
+        )
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
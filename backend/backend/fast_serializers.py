@@ -0,0 +1,103 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Field classes (exactly, not subclasses) whose to_representation returns a
+# value of the matching column type unchanged: str(), int() and bool() of a
+# str, int and bool.
+PASSTHROUGH_FIELDS = {
+    serializers.ReadOnlyField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+}
+
+
+class ISODateTimeConverter:
+    """
+    DateTimeField.to_representation for ISO 8601 output, minus the per-value
+    active-timezone lookup: bind() resolves the timezone once per list.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def bind(self):
+        field = self.field
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if isinstance(value, str) or value.utcoffset() is None:
+                return field.to_representation(value)
+            text = value.astimezone(field_timezone).isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+        return convert
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path producing the same output as `serializer`, for rows
+    fetched with queryset.values(*self.columns) instead of model instances.
+
+    The serializer's readable fields are compiled once into
+    (name, column, converter) triples: relations read the raw foreign key
+    column, fields that would return the stored value as is get no
+    converter, ISO datetimes get ISODateTimeConverter and everything else
+    keeps its bound to_representation, so formatting settings still apply.
+    Compiling costs more than serializing a page, so build one per
+    serializer configuration and reuse it: a module-level constant, or a
+    cached factory (functools.lru_cache) where the configuration varies per
+    request, as with room_values_serializer's field selection.
+    """
+
+    def __init__(self, serializer):
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        self.mappers = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.mappers.append((name, self.column(model, field), self.converter(field)))
+        self.columns = tuple(dict.fromkeys(column for _, column, _ in self.mappers))
+
+    @staticmethod
+    def column(model, field):
+        if model is not None:
+            try:
+                return model._meta.get_field(field.source).attname
+            except FieldDoesNotExist:
+                pass
+        return field.source
+
+    @staticmethod
+    def converter(field):
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return None
+        if type(field) in PASSTHROUGH_FIELDS:
+            return None
+        if type(field) is serializers.DateTimeField and getattr(
+                field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+            return ISODateTimeConverter(field)
+        return field.to_representation
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def bind(self):
+        return [
+            (name, column, convert.bind() if isinstance(convert, ISODateTimeConverter) else convert)
+            for name, column, convert in self.mappers
+        ]
+
+    def to_representation(self, row, mappers=None):
+        # None skips to_representation, as Serializer.to_representation does.
+        return {
+            name: row[column] if convert is None or row[column] is None else convert(row[column])
+            for name, column, convert in mappers or self.bind()
+        }
+
+    def many(self, rows):
+        mappers = self.bind()
+        return [self.to_representation(row, mappers) for row in rows]
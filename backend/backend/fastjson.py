@@ -0,0 +1,80 @@
+"""
+Optional orjson/msgspec backends for FastJSONRenderer and FastJSONParser.
+
+settings.JSON_BACKEND picks "orjson", "msgspec" or "stdlib"; the default
+"auto" takes the first library that is installed. Output matches DRF's
+JSONRenderer byte for byte for strings, ints, UUIDs, dates and datetimes
+(UTC as "Z", microseconds only when non-zero). Floats are equal in value
+but may be spelled differently (1e-05 vs 0.00001). Decimals are strings
+(str(value)) with every backend, as DRF's DecimalField renders them by
+default; msgspec can only write them itself, as a string or a number, so
+the others follow it (DecimalStringEncoder). Anything else the library
+cannot encode natively goes through DRF's JSONEncoder.default.
+"""
+import decimal
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# errors: what dumps raises for data it cannot encode.
+JSONBackend = namedtuple('JSONBackend', ['name', 'dumps', 'loads', 'errors'])
+
+BACKENDS = ('orjson', 'msgspec')
+
+
+class DecimalStringEncoder(JSONEncoder):
+    """DRF's JSONEncoder, but Decimals become their exact str() rather than a float"""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+_encoder = DecimalStringEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+def _orjson():
+    import orjson
+
+    def dumps(data):
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z)
+
+    return JSONBackend('orjson', dumps, orjson.loads, (TypeError, ValueError, OverflowError))
+
+
+def _msgspec():
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_default, decimal_format='string')
+    decoder = msgspec.json.Decoder()
+    return JSONBackend('msgspec', encoder.encode, decoder.decode,
+                       (TypeError, ValueError, OverflowError, msgspec.EncodeError))
+
+
+_FACTORIES = {'orjson': _orjson, 'msgspec': _msgspec}
+
+
+def load_backend(name):
+    """Returns the named JSONBackend, or None for "stdlib" or a missing library"""
+    candidates = BACKENDS if name == 'auto' else (name,)
+    for candidate in candidates:
+        if candidate not in _FACTORIES:
+            continue
+        try:
+            return _FACTORIES[candidate]()
+        except ImportError:
+            if name != 'auto':
+                logger.warning("JSON_BACKEND=%s is not installed, using the stdlib json module", name)
+    return None
+
+
+default_backend = load_backend(settings.JSON_BACKEND)
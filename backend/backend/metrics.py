@@ -0,0 +1,125 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram, one series per label tuple"""
+
+    def __init__(self, name, help_text, buckets, label_names=('view', 'method')):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                label_text = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{label_text}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{label_text}}} {series["count"]}')
+        return lines
+
+
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'Wall time spent serving the request.',
+                             DURATION_BUCKETS)
+REQUEST_DB_QUERIES = Histogram('http_request_db_queries', 'Database queries run by the request.',
+                               QUERY_BUCKETS)
+REQUEST_DB_DURATION = Histogram('http_request_db_duration_seconds', 'Time spent in database queries.',
+                                DURATION_BUCKETS)
+REQUEST_SERIALIZER_DURATION = Histogram('http_request_serializer_duration_seconds',
+                                        'Time spent building serializer output.', DURATION_BUCKETS)
+REQUEST_RENDER_DURATION = Histogram('http_request_render_duration_seconds',
+                                    'Time spent rendering the response body.', DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Size of the response body.', SIZE_BUCKETS)
+
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_DB_QUERIES, REQUEST_DB_DURATION,
+              REQUEST_SERIALIZER_DURATION, REQUEST_RENDER_DURATION, RESPONSE_SIZE)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_seconds', 'timings')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.timings = {}
+
+    def add_timing(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+# Holds a mutable RequestMetrics for sampled requests, so updates made in
+# sync_to_async threads are visible to the middleware.
+current_request_metrics = ContextVar('current_request_metrics', default=None)
+
+
+@contextmanager
+def timing(name):
+    """Adds the time spent in the block to the current request's `name` timing"""
+    metrics = current_request_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_timing(name, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Connections opened before this module was imported never send
+# connection_created again while they stay open.
+for _connection in connections.all(initialized_only=True):
+    install_query_recorder(sender=None, connection=_connection)
+
+
+def render_histograms():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return lines
@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from backend.metrics import (
+    REQUEST_DB_DURATION, REQUEST_DB_QUERIES, REQUEST_DURATION, REQUEST_RENDER_DURATION,
+    REQUEST_SERIALIZER_DURATION, RESPONSE_SIZE, RequestMetrics, current_request_metrics,
+)
+
+_request_connections = ContextVar('request_connections', default=None)
+_lock = threading.Lock()
+_totals = {'connections_opened': 0, 'requests': 0}
+
+
+@receiver(connection_created)
+def count_connection_opened(sender, connection, **kwargs):
+    with _lock:
+        _totals['connections_opened'] += 1
+    opened = _request_connections.get()
+    if opened is not None:
+        opened[0] += 1
+
+
+def connection_stats():
+    """Connections opened and requests served by this process since start"""
+    with _lock:
+        return dict(_totals)
+
+
+class DBConnectionMetricsMiddleware:
+    """
+    Counts database connections opened while serving each request. With
+    persistent or pooled connections this should stay near zero; in DEBUG
+    the per-request count is sent as an X-DB-Connections-Opened header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # A mutable cell, so increments made in sync_to_async threads are
+        # seen here as well.
+        opened = [0]
+        token = _request_connections.set(opened)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_connections.reset(token)
+        return self.finish(response, opened[0])
+
+    async def __acall__(self, request):
+        opened = [0]
+        token = _request_connections.set(opened)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_connections.reset(token)
+        return self.finish(response, opened[0])
+
+    def finish(self, response, opened):
+        with _lock:
+            _totals['requests'] += 1
+        if settings.DEBUG:
+            response['X-DB-Connections-Opened'] = str(opened)
+        return response
+
+
+class PerformanceMetricsMiddleware:
+    """
+    Records wall time, query count, query time, serializer time, render
+    time and response size for a PERF_SAMPLE_RATE fraction of requests.
+    Sampled requests feed the /metrics histograms, labeled by URL name, and
+    get a Server-Timing header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        metrics = current_request_metrics.get()
+        if metrics is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: metrics.add_timing('render', time.perf_counter() - started)
+            )
+        return response
+
+    def sampled(self):
+        rate = settings.PERF_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def finish(self, request, response, metrics, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        labels = (match.url_name or match.route if match else 'unresolved', request.method)
+        size = 0 if response.streaming else len(response.content)
+
+        REQUEST_DURATION.observe(labels, elapsed)
+        REQUEST_DB_QUERIES.observe(labels, metrics.queries)
+        REQUEST_DB_DURATION.observe(labels, metrics.db_seconds)
+        REQUEST_SERIALIZER_DURATION.observe(labels, metrics.timings.get('serializer', 0.0))
+        REQUEST_RENDER_DURATION.observe(labels, metrics.timings.get('render', 0.0))
+        RESPONSE_SIZE.observe(labels, size)
+
+        entries = [f'app;dur={elapsed * 1000:.2f}',
+                   f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.queries} queries"']
+        entries += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in metrics.timings.items()]
+        response['Server-Timing'] = ', '.join(entries)
+        return response
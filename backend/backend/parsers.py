@@ -0,0 +1,27 @@
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from backend.fastjson import default_backend
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes UTF-8 bodies with orjson or msgspec when
+    available. Bodies the library rejects are parsed again by the stdlib
+    parser, so error messages and edge cases (huge integers) are unchanged.
+    """
+    json_backend = default_backend
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if self.json_backend is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return self.json_backend.loads(body)
+        except ValueError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,28 @@
+from rest_framework.renderers import JSONRenderer
+
+from backend.fastjson import DecimalStringEncoder, default_backend
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson or msgspec when available (see
+    backend.fastjson). Indented output, non-default JSON settings and data
+    the library rejects all go through the stdlib renderer, which encodes
+    Decimals the same way.
+    """
+    encoder_class = DecimalStringEncoder
+    json_backend = default_backend
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.json_backend is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = self.json_backend.dumps(data)
+        except self.json_backend.errors:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same strict-javascript-subset escaping as JSONRenderer.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -1,6 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 import os
+import sys
 
 from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
@@ -37,11 +38,16 @@ INSTALLED_APPS = [
     'user',
     'interview_rooms',
     'interviews',
-    'interview_notes'
+    'interview_notes',
+    'code_execution',
+    'signaling',
+    'code_sessions',
+    'live_updates',
 
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.PerformanceMetricsMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -50,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.middleware.DBConnectionMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -70,6 +77,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+# How entrypoint.sh serves the app: "asgi" (its default, and the only mode
+# that serves the websockets) or "wsgi". Hot views come in a sync and an
+# async form, and the URLconf routes to the one that suits the server
+# (backend.async_views.served_view). Several ASGI workers need the channel
+# layer, signaling state and cache below to be shared; without them
+# entrypoint.sh starts one worker and refuses GUNICORN_WORKERS above 1.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
@@ -82,6 +96,27 @@ SIMPLE_JWT = {
     'AUTH_COOKIE_PATH': '/',
     'AUTH_COOKIE_SAMESITE': 'Lax',
 }
+
+# How CookieJWTAuthentication resolves the user behind an access token:
+# "db" queries the user table on every request, "cached" goes through a
+# bounded per-process LRU cache of User rows, "stateless" builds the user
+# from token claims without any query. In stateless mode a deactivated user
+# or a changed password only takes effect once the access token expires.
+# In cached mode, users changed with QuerySet.update() stay cached for up to
+# AUTH_USER_CACHE_TTL seconds unless user_cache.invalidate() is called.
+AUTH_USER_RESOLUTION = os.environ.get('AUTH_USER_RESOLUTION', 'db')
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', '1024'))
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', '60'))
+
+# "db" checks refresh tokens against the blacklist tables and writes token
+# rows inline. "cache" checks a jti denylist in the default cache, and the
+# blacklist table once per token on a miss, and writes the rows in batches
+# every JWT_TOKEN_WRITE_INTERVAL seconds. The denylist also remembers tokens
+# that are not revoked, so with several processes it needs a shared cache
+# (CACHE_BACKEND): with a per-process one, a logout in another process is
+# not seen by a process that has already checked the token.
+JWT_REVOCATION_MODE = os.environ.get('JWT_REVOCATION_MODE', 'db')
+JWT_TOKEN_WRITE_INTERVAL = float(os.environ.get('JWT_TOKEN_WRITE_INTERVAL', '2.0'))
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:4200').split(',')
 CORS_ALLOW_CREDENTIALS = True
 CSRF_COOKIE_SECURE = not DEBUG
@@ -91,7 +126,32 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
     "x-no-interceptor",
 ]
 
+# Fraction of requests timed by PerformanceMetricsMiddleware for /metrics and
+# Server-Timing. METRICS_TOKEN, when set, is required as a Bearer token;
+# unset, /metrics is only served to staff sessions or with DEBUG on.
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', '1.0'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Opt-in write-behind mode for note autosaves, see interview_notes/buffer.py
+# for durability and consistency semantics.
+NOTE_WRITE_BEHIND = os.environ.get('NOTE_WRITE_BEHIND', 'False') == 'True'
+NOTE_WRITE_BEHIND_INTERVAL = float(os.environ.get('NOTE_WRITE_BEHIND_INTERVAL', '1.0'))
+NOTE_WRITE_BEHIND_MAX_PENDING = int(os.environ.get('NOTE_WRITE_BEHIND_MAX_PENDING', '5000'))
+
+# JSON library behind the API renderer and parser: "auto" (orjson, then
+# msgspec, then the stdlib), or one of "orjson", "msgspec", "stdlib".
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'backend.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
@@ -111,8 +171,68 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'password'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Reuse connections across requests instead of paying TCP, TLS and
+        # auth on every call; health checks drop connections the server closed.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
+    }
+}
+
+# Server-side timeouts in milliseconds, 0 leaves the server default.
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '0'))
+DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.environ.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', '0'))
+_db_server_options = []
+if DB_STATEMENT_TIMEOUT_MS:
+    _db_server_options.append(f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}')
+if DB_IDLE_IN_TRANSACTION_TIMEOUT_MS:
+    _db_server_options.append(f'-c idle_in_transaction_session_timeout={DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}')
+if _db_server_options:
+    DATABASES['default']['OPTIONS']['options'] = ' '.join(_db_server_options)
+
+# Driver-level pooling uses psycopg 3's pool extra (see requirements.txt).
+# Django does not allow persistent connections together with a pool, so
+# CONN_MAX_AGE is forced to 0.
+if os.environ.get('DB_POOL', 'False') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+
+
+# Defaults to a per-process local-memory cache; point CACHE_BACKEND and
+# CACHE_LOCATION at a shared backend (e.g. Redis or Memcached) to share
+# cached entries and invalidations between processes.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
+PUBLIC_ROOM_CACHE_TTL = int(os.environ.get('PUBLIC_ROOM_CACHE_TTL', '300'))
+PUBLIC_ROOM_CACHE_MISS_TTL = int(os.environ.get('PUBLIC_ROOM_CACHE_MISS_TTL', '30'))
+
+# Upper bound on items per bulk room request, which keeps each one to a
+# single INSERT/UPDATE/DELETE statement.
+ROOM_BULK_MAX_ITEMS = int(os.environ.get('ROOM_BULK_MAX_ITEMS', '500'))
+
+# Room lifetime: new rooms get expires_at = now + ROOM_DEFAULT_LIFETIME_HOURS
+# (0 leaves it unset). `manage.py expirerooms` closes expired rooms and moves
+# rooms closed for ROOM_ARCHIVE_AFTER_DAYS, with their notes, into the
+# archive tables, ROOM_EXPIRY_BATCH_SIZE rooms per transaction.
+ROOM_DEFAULT_LIFETIME_HOURS = int(os.environ.get('ROOM_DEFAULT_LIFETIME_HOURS', '0'))
+ROOM_ARCHIVE_AFTER_DAYS = int(os.environ.get('ROOM_ARCHIVE_AFTER_DAYS', '90'))
+ROOM_EXPIRY_BATCH_SIZE = int(os.environ.get('ROOM_EXPIRY_BATCH_SIZE', '500'))
+
+# Room-admission tokens for the real-time servers (interview_rooms.admission).
+# ROOM_ADMISSION_KEY (32 bytes or more) is shared with every node that
+# verifies them; when unset a key derived from SECRET_KEY is used, which only
+# this backend knows. The signaling consumer always checks tokens; the Node
+# relay (websocket/server.js) only when it is given the key.
+ROOM_ADMISSION_KEY = os.environ.get('ROOM_ADMISSION_KEY', '')
+ROOM_ADMISSION_TOKEN_TTL = int(os.environ.get('ROOM_ADMISSION_TOKEN_TTL', '300'))
 
 
 # Password validation
@@ -133,6 +253,104 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PASSWORD_HASHER picks the hasher for new and upgraded hashes: "scrypt"
+# (default, stdlib only), "argon2" (needs argon2-cffi) or "pbkdf2". The
+# others stay listed so existing hashes still verify; they are re-encoded
+# with the selected hasher and parameters on the user's next login.
+# Measure a candidate setting with `python -m benchmarks.hashing`.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+_PASSWORD_HASHERS = {
+    'argon2': 'user.hashers.TunedArgon2PasswordHasher',
+    'scrypt': 'user.hashers.TunedScryptPasswordHasher',
+    'pbkdf2': 'user.hashers.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', '2'))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', '19456'))  # KiB
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', '1'))
+SCRYPT_WORK_FACTOR = int(os.environ.get('SCRYPT_WORK_FACTOR', str(2 ** 14)))
+SCRYPT_BLOCK_SIZE = int(os.environ.get('SCRYPT_BLOCK_SIZE', '8'))
+SCRYPT_PARALLELISM = int(os.environ.get('SCRYPT_PARALLELISM', '1'))
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', '1000000'))
+# Threads that hash and verify passwords for the async auth views, so a
+# login never blocks the event loop or the thread that runs sync views.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+
+# Candidate code execution (code_execution.pool). Each process runs at most
+# CODE_EXEC_WORKERS programs at once and keeps CODE_EXEC_WARM_WORKERS booted
+# runtimes per language ready. Per run: CODE_EXEC_CPU_SECONDS of CPU,
+# CODE_EXEC_MEMORY_MB of memory (address space for Python, writable memory
+# and V8 heap for JavaScript), CODE_EXEC_TIMEOUT seconds of wall time,
+# CODE_EXEC_MAX_OUTPUT_BYTES of stdout plus stderr and
+# CODE_EXEC_MAX_PROCESSES processes and threads.
+# The process limit does not apply to root, so a backend running as root
+# runs programs as CODE_EXEC_UID; the runtimes must be executable by it.
+# CODE_EXEC_ISOLATION "pidns" runs each program in its own user, PID and
+# network namespaces, so nothing it starts outlives the run and it has no
+# network. It needs user namespaces (in Docker, a seccomp profile that
+# allows unshare, such as code_execution/seccomp.json); "none" only kills
+# the process group and leaves the network reachable.
+CODE_EXEC_WORKERS = int(os.environ.get('CODE_EXEC_WORKERS', str(os.cpu_count() or 1)))
+CODE_EXEC_WARM_WORKERS = int(os.environ.get('CODE_EXEC_WARM_WORKERS', '2'))
+CODE_EXEC_MAX_QUEUED_PER_ROOM = int(os.environ.get('CODE_EXEC_MAX_QUEUED_PER_ROOM', '4'))
+CODE_EXEC_CPU_SECONDS = int(os.environ.get('CODE_EXEC_CPU_SECONDS', '5'))
+CODE_EXEC_MEMORY_MB = int(os.environ.get('CODE_EXEC_MEMORY_MB', '256'))
+CODE_EXEC_TIMEOUT = float(os.environ.get('CODE_EXEC_TIMEOUT', '10'))
+CODE_EXEC_MAX_OUTPUT_BYTES = int(os.environ.get('CODE_EXEC_MAX_OUTPUT_BYTES', '65536'))
+CODE_EXEC_MAX_PROCESSES = int(os.environ.get('CODE_EXEC_MAX_PROCESSES', '32'))
+CODE_EXEC_UID = int(os.environ.get('CODE_EXEC_UID', '65534'))
+CODE_EXEC_ISOLATION = os.environ.get('CODE_EXEC_ISOLATION', 'pidns')
+CODE_EXEC_MAX_CODE_LENGTH = int(os.environ.get('CODE_EXEC_MAX_CODE_LENGTH', '65536'))
+CODE_EXEC_PYTHON = os.environ.get('CODE_EXEC_PYTHON', sys.executable)
+CODE_EXEC_NODE = os.environ.get('CODE_EXEC_NODE', 'node')
+
+# Signaling over websockets (signaling.consumers, served by backend.asgi at
+# /socket.io/). A single node needs nothing shared; for several, set
+# CHANNEL_LAYER_BACKEND=channels_redis.core.RedisChannelLayer with
+# CHANNEL_LAYER_URL, SIGNALING_STATE_BACKEND=cache and a shared cache.
+# Presence expires SIGNALING_PRESENCE_TTL seconds after its last heartbeat;
+# slots of a node silent for SIGNALING_NODE_TTL seconds are free to take.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': os.environ.get('CHANNEL_LAYER_BACKEND', 'signaling.layers.LocalChannelLayer'),
+    }
+}
+if os.environ.get('CHANNEL_LAYER_URL'):
+    CHANNEL_LAYERS['default']['CONFIG'] = {'hosts': [os.environ['CHANNEL_LAYER_URL']]}
+SIGNALING_STATE_BACKEND = os.environ.get('SIGNALING_STATE_BACKEND', 'memory')
+SIGNALING_PRESENCE_TTL = int(os.environ.get('SIGNALING_PRESENCE_TTL', '60'))
+SIGNALING_NODE_TTL = int(os.environ.get('SIGNALING_NODE_TTL', '10'))
+SIGNALING_PING_INTERVAL = float(os.environ.get('SIGNALING_PING_INTERVAL', '25'))
+SIGNALING_PING_TIMEOUT = float(os.environ.get('SIGNALING_PING_TIMEOUT', '20'))
+
+# Shared editor persistence (code_sessions). Operations are written in
+# batches: the signaling consumer buffers them for CODE_SESSION_FLUSH_INTERVAL
+# seconds, relays post them to the ingest endpoint in batches of up to
+# CODE_SESSION_MAX_BATCH_OPS. A full snapshot is taken every
+# CODE_SESSION_SNAPSHOT_OPS operations or CODE_SESSION_SNAPSHOT_INTERVAL
+# seconds of activity, which bounds how many operations a replay applies.
+# The buffer holds at most CODE_SESSION_MAX_QUEUED_OPS operations while the
+# database is failing; operations past that are dropped.
+# The ingest endpoint takes an admission token for the room or, from relays,
+# CODE_SESSION_RELAY_SECRET in the X-Relay-Secret header; unset, only tokens.
+CODE_SESSION_FLUSH_INTERVAL = float(os.environ.get('CODE_SESSION_FLUSH_INTERVAL', '1.0'))
+CODE_SESSION_MAX_PENDING_OPS = int(os.environ.get('CODE_SESSION_MAX_PENDING_OPS', '20000'))
+CODE_SESSION_MAX_QUEUED_OPS = int(os.environ.get('CODE_SESSION_MAX_QUEUED_OPS', '100000'))
+CODE_SESSION_MAX_BATCH_OPS = int(os.environ.get('CODE_SESSION_MAX_BATCH_OPS', '2000'))
+CODE_SESSION_SNAPSHOT_OPS = int(os.environ.get('CODE_SESSION_SNAPSHOT_OPS', '500'))
+CODE_SESSION_SNAPSHOT_INTERVAL = int(os.environ.get('CODE_SESSION_SNAPSHOT_INTERVAL', '60'))
+CODE_SESSION_MAX_CONTENT_LENGTH = int(os.environ.get('CODE_SESSION_MAX_CONTENT_LENGTH', '262144'))
+CODE_SESSION_RELAY_SECRET = os.environ.get('CODE_SESSION_RELAY_SECRET', '')
+
+# Live updates (live_updates, served by backend.asgi at /updates/): room and
+# note changes pushed to their owner's sockets over the channel layer above,
+# which has to be shared for writes made by other processes to reach them.
+# Events for the same room or note within LIVE_UPDATES_COALESCE_WINDOW
+# seconds are sent once, as the latest.
+LIVE_UPDATES_COALESCE_WINDOW = float(os.environ.get('LIVE_UPDATES_COALESCE_WINDOW', '0.25'))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -151,6 +369,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 AUTH_USER_MODEL = 'user.User'
+# ModelBackend, with the async login path hashing on the password-hash pool.
+AUTHENTICATION_BACKENDS = ['user.backends.PooledHashModelBackend']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,56 @@
+import datetime
+import decimal
+import uuid
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from backend.fastjson import BACKENDS, load_backend
+from backend.renderers import FastJSONRenderer
+from user.models import User
+
+
+class MetricsViewTests(TestCase):
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_without_a_token_only_staff_may_scrape(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        user = User.objects.create_user(email='ops@example.com', password='pw123456', full_name='Ops')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'note_write_buffer_depth', response.content)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_without_a_token_debug_is_open(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='s3cret', DEBUG=True)
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_backends_render_the_same_bytes(self):
+        data = {
+            'decimals': [decimal.Decimal(text) for text in ('1.10', '1E+2', '-0', '0.000001', '1e-7', '3')],
+            'uuid': uuid.UUID(int=1),
+            'at': datetime.datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc),
+            'text': 'line\u2028separator',
+        }
+        renderer = FastJSONRenderer()
+        renderer.json_backend = None
+        expected = renderer.render(data)
+        self.assertIn(b'"decimals":["1.10","1E+2","-0","0.000001","1E-7","3"]', expected)
+        for name in BACKENDS:
+            backend = load_backend(name)
+            if backend is None:
+                continue
+            with self.subTest(backend=name):
+                renderer.json_backend = backend
+                self.assertEqual(renderer.render(data), expected)
@@ -1,9 +1,14 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from backend.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('user.urls')),
     path('interview-rooms/', include('interview_rooms.urls')),
     path('interview-notes/', include('interview_notes.urls')),
+    path('code-execution/', include('code_execution.urls')),
+    path('code-sessions/', include('code_sessions.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
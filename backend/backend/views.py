@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from backend.metrics import render_histograms
+from backend.middleware import connection_stats
+from interview_notes.buffer import note_buffer
+
+
+def metrics(request):
+    """Prometheus text exposition of the request histograms and process gauges"""
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        # Without a token only staff sessions, or anyone while DEBUG, may scrape.
+        allowed = settings.DEBUG or request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+
+    lines = render_histograms()
+    gauges = {
+        'db_connections_opened_total': connection_stats()['connections_opened'],
+        'note_write_buffer_depth': note_buffer.stats()['depth'],
+        'note_write_buffer_last_flush_seconds': note_buffer.stats()['last_flush_seconds'],
+    }
+    for name, value in gauges.items():
+        lines += [f'# TYPE {name} gauge', f'{name} {value}']
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')
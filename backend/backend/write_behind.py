@@ -0,0 +1,65 @@
+"""
+Daemon-thread plumbing shared by the write-behind buffers
+(interview_notes.buffer, code_sessions.buffer, user.revocation).
+
+A subclass queues entries under self._lock, calls self._ensure_started()
+after queueing, and implements flush() and depth(). The thread starts on
+the first entry and calls flush() every `interval` seconds, or as soon as
+wake() is called; the interpreter's atexit hook runs a last flush. A
+flush that raises is logged and its entries are left to the subclass.
+"""
+import atexit
+import logging
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    # Names the thread and the log messages.
+    name = 'write-behind'
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def flush(self):
+        raise NotImplementedError
+
+    def depth(self):
+        """How many entries are waiting for a flush"""
+        raise NotImplementedError
+
+    def wake(self):
+        """Flushes now instead of at the end of the interval"""
+        self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self._flush_on_exit)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("%s flush failed", self.name)
+
+    def _flush_on_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("%s flush on shutdown failed; %d entries lost", self.name, self.depth())
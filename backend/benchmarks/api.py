@@ -0,0 +1,210 @@
+"""
+Load test for the REST API hot paths.
+
+    cd backend
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python manage.py migrate
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.api \
+        --concurrency 16 --requests 500 --output bench-results/$(git rev-parse --short HEAD).json
+
+Seeds users, rooms and notes (see benchmarks.seed), starts a server (or
+targets --base-url), then runs each scenario with --concurrency client
+threads, every thread logged in as its own seeded user. Queries per request
+come from the Server-Timing header, so the server needs PERF_SAMPLE_RATE=1.
+Compare two result files with `python -m benchmarks.compare old.json new.json`.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from itertools import count
+from urllib.parse import urlsplit
+
+import django
+
+from benchmarks.common import SERVERS, free_port, start_server, stop_server, summarize
+
+SCENARIOS = ('login', 'refresh', 'room_list', 'room_create', 'room_update', 'room_delete',
+             'public_room', 'note_autosave')
+
+
+class Session:
+    """Keep-alive HTTP client for one seeded user, holding its auth cookies"""
+
+    def __init__(self, base_url, email, rooms):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        self.email = email
+        self.rooms = rooms
+        self.created = []
+        self.cookies = {}
+
+    def request(self, method, path, body=None):
+        headers = {'Host': 'localhost', 'Content-Type': 'application/json'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            return 0, None, None
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return response.status, data, parse_queries(response.headers.get('Server-Timing', ''))
+
+    def login(self):
+        from benchmarks.seed import PASSWORD
+        return self.request('POST', '/auth/login/', {'email': self.email, 'password': PASSWORD})
+
+
+def parse_queries(server_timing):
+    for entry in server_timing.split(','):
+        if entry.strip().startswith('db;') and 'desc="' in entry:
+            return int(entry.split('desc="', 1)[1].split(' ', 1)[0])
+    return None
+
+
+def scenario_requests(name, session, sequence):
+    """Returns the (method, path, body, expected statuses) for one iteration of a scenario"""
+    room_pk, room_uuid = session.rooms[sequence % len(session.rooms)]
+    if name == 'login':
+        from benchmarks.seed import PASSWORD
+        return 'POST', '/auth/login/', {'email': session.email, 'password': PASSWORD}, (200,)
+    if name == 'refresh':
+        return 'POST', '/auth/refresh-token/', None, (200,)
+    if name == 'room_list':
+        return 'GET', '/interview-rooms/?limit=50', None, (200,)
+    if name == 'room_create':
+        return 'POST', '/interview-rooms/', {'name': f'bench-new-{os.getpid()}-{sequence}'}, (201,)
+    if name == 'room_update':
+        return 'PATCH', f'/interview-rooms/{room_pk}/', {'is_closed': sequence % 2 == 0}, (200,)
+    if name == 'room_delete':
+        if not session.created:
+            return None
+        return 'DELETE', f'/interview-rooms/{session.created.pop()}/', None, (204,)
+    if name == 'public_room':
+        return 'GET', f'/interview-rooms/public/{room_uuid}/', None, (200, 404)
+    if name == 'note_autosave':
+        content = f'Autosave {sequence}: ' + 'Strong problem decomposition. ' * 40
+        return 'POST', f'/interview-notes/{room_uuid}/', {'content': content}, (200, 202)
+    raise ValueError(name)
+
+
+def run_scenario(name, sessions, total):
+    latencies, queries, errors = [], [], 0
+    lock = threading.Lock()
+    sequence = count()
+
+    def worker(session):
+        nonlocal errors
+        while True:
+            index = next(sequence)
+            if index >= total:
+                return
+            planned = scenario_requests(name, session, index)
+            if planned is None:
+                return
+            method, path, body, expected = planned
+            started = time.perf_counter()
+            status, data, query_count = session.request(method, path, body)
+            elapsed = time.perf_counter() - started
+            if name == 'room_create' and status == 201:
+                session.created.append(json.loads(data)['id'])
+            with lock:
+                latencies.append(elapsed)
+                if query_count is not None:
+                    queries.append(query_count)
+                if status not in expected:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker, args=(session,)) for session in sessions]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors, queries)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', help="Target a running server instead of starting one")
+    parser.add_argument('--server', choices=sorted(SERVERS), default='wsgi')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help="Requests per scenario")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--rooms-per-user', type=int, default=1000)
+    parser.add_argument('--notes-per-user', type=int, default=50)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    from django.conf import settings
+    from benchmarks.seed import bench_email, seed
+
+    seeded_at = time.perf_counter()
+    rooms = seed(args.users, args.rooms_per_user, args.notes_per_user)
+    print(f"seeded in {time.perf_counter() - seeded_at:.1f}s", file=sys.stderr)
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        port = free_port()
+        process = start_server(args.server, port, args.workers, env={'PERF_SAMPLE_RATE': '1.0'})
+        base_url = f'http://127.0.0.1:{port}'
+
+    results = {}
+    try:
+        owners = list(rooms.items())
+        sessions = []
+        for index in range(args.concurrency):
+            user_index = index % len(owners)
+            session = Session(base_url, bench_email(user_index), owners[user_index][1])
+            session.login()
+            sessions.append(session)
+
+        for name in args.scenarios:
+            results[name] = run_scenario(name, sessions, args.requests)
+            print(name, json.dumps(results[name]), file=sys.stderr)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+        'server': 'external' if args.base_url else args.server,
+        'python': platform.python_version(),
+        'params': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import socket
+import statistics
+import subprocess
+import time
+
+SERVERS = {
+    'wsgi': ['gunicorn', 'backend.wsgi'],
+    'asgi': ['gunicorn', 'backend.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(latencies, elapsed, errors, queries=None):
+    """Latency percentiles in ms, throughput and, when known, mean queries per request"""
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+    if queries:
+        summary['queries_per_request'] = round(statistics.fmean(queries), 2)
+    return summary
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, workers, env=None):
+    command = SERVERS[mode] + ['--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning']
+    process = subprocess.Popen(command, env={**os.environ, 'SERVER_MODE': mode, **(env or {})})
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit(f"{mode} server did not start on port {port}")
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait()
@@ -0,0 +1,44 @@
+"""
+Prints per-scenario deltas between two benchmarks.api result files.
+
+    python -m benchmarks.compare bench-results/old.json bench-results/new.json
+"""
+import argparse
+import json
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request')
+
+
+def change(old, new):
+    if old is None or new is None:
+        return 'n/a'
+    if old == 0:
+        return '+0.0%' if new == 0 else 'new'
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    args = parser.parse_args()
+
+    with open(args.old) as fh:
+        old = json.load(fh)
+    with open(args.new) as fh:
+        new = json.load(fh)
+
+    print(f"{old.get('revision')} -> {new.get('revision')}")
+    print(f"{'scenario':<16}{'metric':<22}{'old':>12}{'new':>12}{'change':>10}")
+    for scenario in sorted(set(old['results']) | set(new['results'])):
+        before = old['results'].get(scenario, {})
+        after = new['results'].get(scenario, {})
+        for metric in METRICS:
+            if metric not in before and metric not in after:
+                continue
+            print(f"{scenario:<16}{metric:<22}{before.get(metric, '-'):>12}{after.get(metric, '-'):>12}"
+                  f"{change(before.get(metric), after.get(metric)):>10}")
+
+
+if __name__ == '__main__':
+    main()
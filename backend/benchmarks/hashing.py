@@ -0,0 +1,87 @@
+"""
+Password verification throughput per hasher, i.e. the ceiling on logins per
+core per second before any database or token work.
+
+    cd backend
+    python -m benchmarks.hashing --seconds 3 --threads 1 4
+
+Each hasher is measured with the parameters currently configured in
+settings (see PASSWORD_HASHER and friends), plus Django's stock PBKDF2 for
+reference. With several --threads values the same run shows how well the
+hash releases the GIL, which is what PASSWORD_HASH_WORKERS relies on.
+Hashers whose library is missing (argon2-cffi) are skipped.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import django
+
+HASHERS = (
+    'user.hashers.TunedScryptPasswordHasher',
+    'user.hashers.TunedArgon2PasswordHasher',
+    'user.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+)
+
+
+def verifications_per_second(hasher, encoded, seconds, threads):
+    done = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        nonlocal done
+        local = 0
+        while time.perf_counter() < deadline:
+            hasher.verify('bench-password', encoded)
+            local += 1
+        with lock:
+            done += local
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3.0, help="Measuring time per hasher and thread count")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1])
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    from django.utils.module_loading import import_string
+
+    results = {}
+    for path in HASHERS:
+        hasher = import_string(path)()
+        try:
+            encoded = hasher.encode('bench-password', hasher.salt())
+        except ValueError as exc:
+            print(f"{path}: skipped ({exc})", file=sys.stderr)
+            continue
+        summary = hasher.safe_summary(encoded)
+        params = {key: value for key, value in summary.items() if key not in ('salt', 'hash')}
+        results[path] = {
+            'params': {str(key): str(value) for key, value in params.items()},
+            'per_second': {
+                threads: round(verifications_per_second(hasher, encoded, args.seconds, threads), 1)
+                for threads in args.threads
+            },
+        }
+        print(path, json.dumps(results[path]), file=sys.stderr)
+
+    print(json.dumps({'cpus': os.cpu_count(), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
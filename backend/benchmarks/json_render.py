@@ -0,0 +1,128 @@
+"""
+Microbenchmark of the API JSON renderer and parser per backend.
+
+    cd backend
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.json_render --rows 1000
+
+Renders a room list and a note list shaped like the serializer output, plus
+the same rows as raw model values (UUIDs and datetimes left to the encoder),
+with DRF's JSONRenderer and FastJSONRenderer on every installed backend. It
+checks the fast output is byte-identical before timing it, then parses the
+rendered bodies back with JSONParser and FastJSONParser.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import django
+
+
+def payloads(rows):
+    started = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+    rooms = [
+        {
+            'id': index,
+            'room_id': uuid.uuid4(),
+            'name': f'Interview slot {index} – backend',
+            'created_at': started + timedelta(minutes=index, microseconds=index % 7),
+            'updated_at': started + timedelta(minutes=index),
+            'is_closed': index % 3 == 0,
+            'owner': 1,
+        }
+        for index in range(rows)
+    ]
+    notes = [
+        {
+            'id': index,
+            'room_id': str(uuid.uuid4()),
+            'interviewer': 1,
+            'interviewer_name': 'Zoë Interviewer',
+            'content': 'Strong problem decomposition, explained trade-offs clearly. ' * 20,
+            'created_at': started + timedelta(hours=index),
+            'updated_at': started + timedelta(hours=index, seconds=5),
+            'version': 3,
+        }
+        for index in range(rows)
+    ]
+    return {
+        'rooms (model values)': rooms,
+        'rooms (serialized)': serialized(rooms),
+        'notes (serialized)': serialized(notes),
+    }
+
+
+def serialized(rows):
+    # What DRF fields hand to the renderer: strings for UUIDs and datetimes.
+    from rest_framework.fields import DateTimeField
+    field = DateTimeField()
+    return [
+        {key: field.to_representation(value) if isinstance(value, datetime) else
+         str(value) if isinstance(value, uuid.UUID) else value for key, value in row.items()}
+        for row in rows
+    ]
+
+
+def per_call(func, seconds):
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seconds', type=float, default=1.0, help="Measuring time per case")
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from backend.fastjson import BACKENDS, load_backend
+    from backend.parsers import FastJSONParser
+    from backend.renderers import FastJSONRenderer
+
+    backends = [backend for backend in map(load_backend, BACKENDS) if backend is not None]
+    if not backends:
+        print("Neither orjson nor msgspec is installed", file=sys.stderr)
+
+    results = {}
+    for name, data in payloads(args.rows).items():
+        expected = JSONRenderer().render(data)
+        case = {'bytes': len(expected), 'render_ms': {}, 'parse_ms': {}}
+        case['render_ms']['stdlib'] = per_call(lambda: JSONRenderer().render(data), args.seconds) * 1000
+        case['parse_ms']['stdlib'] = per_call(
+            lambda: JSONParser().parse(io.BytesIO(expected)), args.seconds) * 1000
+
+        for backend in backends:
+            renderer = type('Renderer', (FastJSONRenderer,), {'json_backend': backend})()
+            parser_ = type('Parser', (FastJSONParser,), {'json_backend': backend})()
+            rendered = renderer.render(data)
+            if rendered != expected:
+                print(f"{name}: {backend.name} output differs from JSONRenderer", file=sys.stderr)
+            case['render_ms'][backend.name] = per_call(lambda: renderer.render(data), args.seconds) * 1000
+            case['parse_ms'][backend.name] = per_call(
+                lambda: parser_.parse(io.BytesIO(expected)), args.seconds) * 1000
+
+        for timings in (case['render_ms'], case['parse_ms']):
+            for key in timings:
+                timings[key] = round(timings[key], 3)
+        results[name] = case
+        print(name, json.dumps(case), file=sys.stderr)
+
+    print(json.dumps({'rows': args.rows, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
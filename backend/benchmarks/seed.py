@@ -0,0 +1,56 @@
+"""
+Seeds benchmark users, rooms and notes with bulk inserts.
+
+Users are named bench-<n>@example.com and share one password hash, so
+seeding tens of thousands of rows takes seconds. Seeding is idempotent:
+rows that already exist are kept.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+
+from interview_notes.models import InterviewNote
+from interview_rooms.models import Room
+from user.models import User
+
+PASSWORD = 'bench-password'
+NOTE_SIZES = (200, 2_000, 20_000, 100_000)
+NOTE_TEXT = "Candidate explained the trade-offs clearly and asked good follow-up questions. "
+
+BATCH_SIZE = 2000
+
+
+def bench_email(index):
+    return f'bench-{index}@example.com'
+
+
+def seed(users=20, rooms_per_user=1000, notes_per_user=50, rng=None):
+    """Returns {user_id: [room ids]} for the seeded users"""
+    rng = rng or random.Random(0)
+    password = make_password(PASSWORD)
+    emails = [bench_email(index) for index in range(users)]
+    User.objects.bulk_create(
+        [User(email=email, full_name=f'Bench {email}', password=password) for email in emails],
+        ignore_conflicts=True,
+    )
+    user_ids = list(User.objects.filter(email__in=emails).order_by('id').values_list('id', flat=True))
+
+    Room.objects.bulk_create(
+        [Room(owner_id=user_id, name=f'bench-room-{index}')
+         for user_id in user_ids for index in range(rooms_per_user)],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    rooms = {user_id: [] for user_id in user_ids}
+    for room_id, owner_id, uuid in Room.objects.filter(owner_id__in=user_ids).values_list('id', 'owner_id', 'room_id'):
+        rooms[owner_id].append((room_id, str(uuid)))
+
+    notes = []
+    for user_id in user_ids:
+        for room_pk, uuid in rooms[user_id][:notes_per_user]:
+            size = rng.choice(NOTE_SIZES)
+            content = (NOTE_TEXT * (size // len(NOTE_TEXT) + 1))[:size]
+            notes.append(InterviewNote(room_id=uuid, interview_room_id=room_pk, interviewer_id=user_id,
+                                       content=content))
+    InterviewNote.objects.bulk_create(notes, batch_size=BATCH_SIZE // 10, ignore_conflicts=True)
+    return rooms
@@ -0,0 +1,85 @@
+"""
+ModelSerializer vs the ValuesSerializer fast path on large lists.
+
+    cd backend
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python manage.py migrate
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.serializers --rows 10000
+
+Seeds one user with --rows rooms and --rows short notes, then times the
+work each list endpoint does between the query and the renderer: fetching
+the rows and turning them into primitives. Both paths are checked to
+render the same bytes first.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import django
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from benchmarks.seed import NOTE_TEXT, seed
+    from interview_notes.models import InterviewNote
+    from interview_notes.serializers import InterviewNoteSerializer
+    from interview_notes.views import NOTE_VALUES
+    from interview_rooms.models import Room
+    from interview_rooms.serializers import InterviewRoomSerializer, room_values_serializer
+
+    rooms_by_user = seed(users=1, rooms_per_user=args.rows, notes_per_user=0)
+    user_id, rooms = next(iter(rooms_by_user.items()))
+    InterviewNote.objects.bulk_create(
+        [InterviewNote(room_id=uuid, interviewer_id=user_id, content=NOTE_TEXT * 6) for _, uuid in rooms],
+        batch_size=500, ignore_conflicts=True,
+    )
+
+    room_values = room_values_serializer()
+    cases = {
+        'rooms': (
+            lambda: InterviewRoomSerializer(Room.objects.filter(owner_id=user_id).order_by('-id'), many=True).data,
+            lambda: room_values.many(room_values.values(Room.objects.filter(owner_id=user_id).order_by('-id'))),
+        ),
+        'notes': (
+            lambda: InterviewNoteSerializer(InterviewNote.objects.filter(interviewer_id=user_id), many=True).data,
+            lambda: NOTE_VALUES.many(NOTE_VALUES.values(InterviewNote.objects.filter(interviewer_id=user_id))),
+        ),
+    }
+
+    results = {}
+    for name, (model_path, values_path) in cases.items():
+        if JSONRenderer().render(model_path()) != JSONRenderer().render(values_path()):
+            print(f"{name}: outputs differ", file=sys.stderr)
+        model_seconds = best_of(model_path, args.repeat)
+        values_seconds = best_of(values_path, args.repeat)
+        results[name] = {
+            'rows': len(values_path()),
+            'model_serializer_ms': round(model_seconds * 1000, 1),
+            'values_serializer_ms': round(values_seconds * 1000, 1),
+            'speedup': round(model_seconds / values_seconds, 2),
+        }
+        print(name, json.dumps(results[name]), file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
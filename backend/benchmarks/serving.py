@@ -0,0 +1,106 @@
+"""
+Compares the WSGI (gunicorn sync workers) and ASGI (gunicorn + uvicorn
+workers) serving paths under many concurrent clients.
+
+    cd backend
+    python -m benchmarks.serving --concurrency 200 --requests 4000
+
+Each mode starts its own server on a free port with the same worker count,
+against the database configured by DJANGO_SETTINGS_MODULE, and hits the
+public room endpoint, which every candidate loads. --slow-client-ms makes
+each client trickle its request headers in over that many milliseconds, the
+way slow mobile connections do. Each server runs with SERVER_MODE set to its
+mode, so it serves the matching (sync or async) form of the hot views.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import django
+
+from benchmarks.common import SERVERS, free_port, start_server, stop_server, summarize
+
+
+async def fetch(port, path, slow_client):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f'GET {path} HTTP/1.1\r\n', 'Host: localhost\r\n', 'User-Agent: bench\r\n',
+             'Accept: application/json\r\n', 'Connection: close\r\n\r\n']
+    for index, line in enumerate(lines):
+        if slow_client and index:
+            await asyncio.sleep(slow_client / (len(lines) - 1))
+        writer.write(line.encode())
+        await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def drive(port, path, concurrency, total, slow_client=0.0):
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, path, slow_client)
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--slow-client-ms', type=float, default=0.0)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    from benchmarks.seed import seed
+
+    rooms = seed(users=1, rooms_per_user=1, notes_per_user=0)
+    path = f'/interview-rooms/public/{next(iter(rooms.values()))[0][1]}/'
+
+    results = {}
+    for mode in args.modes:
+        port = free_port()
+        process = start_server(mode, port, args.workers)
+        try:
+            asyncio.run(drive(port, path, args.concurrency, min(args.concurrency, args.requests)))  # warm up
+            results[mode] = asyncio.run(
+                drive(port, path, args.concurrency, args.requests, args.slow_client_ms / 1000)
+            )
+        finally:
+            stop_server(process)
+        print(mode, json.dumps(results[mode]), file=sys.stderr)
+
+    report = {
+        'workers': args.workers,
+        'concurrency': args.concurrency,
+        'slow_client_ms': args.slow_client_ms,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+"""
+SQLite stand-in for running the benchmarks without Postgres:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python manage.py migrate
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.api
+"""
+import os
+
+os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key-do-not-deploy')
+
+from backend.settings import *  # noqa: E402,F401,F403
+
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+DEBUG = False
+PERF_SAMPLE_RATE = 1.0
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_SQLITE_PATH', str(BASE_DIR / 'bench.sqlite3')),  # noqa: F405
+        'OPTIONS': {'timeout': 30},
+    }
+}
@@ -0,0 +1,310 @@
+"""
+Load and failover test for the signaling consumer (signaling.consumers).
+
+    cd backend
+    python -m benchmarks.signaling --levels 100 250 500 --node-ttl 2
+
+Rooms per node: starts one ASGI node (gunicorn + one uvicorn worker) and,
+for each level, opens a host and a guest websocket per room, joins, marks
+both ready and waits until every host is told to start negotiating. Each
+host then trickles --messages ICE candidates to its guest, one every
+--interval-ms, as browsers do. Reported per level: time until every room
+negotiates, relay latency percentiles, relayed messages per second, and the
+node's CPU seconds spent relaying and its resident memory. A level the node
+cannot sustain shows up as relay latency growing past --interval-ms. The
+clients run in this process; when they share the node's CPU, compare
+node_relay_cpu_s between levels rather than latency.
+
+Failover: two nodes in this process share a presence store (LocMemCache
+standing in for Redis) and the in-memory channel layer. Hosts connect to
+node A and guests to node B; node A then dies without running any
+disconnect handler, and its hosts reconnect to node B, retrying joinRoom
+until they get the host slot back. Reported: how long until every room has
+negotiated again, which is bounded by --node-ttl.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+import django
+
+from benchmarks.common import free_port, percentile, start_server, stop_server
+
+HANDSHAKE_TIMEOUT = 30
+
+
+class Peer:
+    """A socket.io-client over the websocket transport; send and recv move text frames"""
+
+    def __init__(self, send, recv):
+        self._send, self._recv = send, recv
+        self.queues = {}
+        self.reader = None
+
+    async def open(self):
+        self.sid = json.loads((await self._recv())[1:])['sid']
+        await self._send('40')
+        assert (await self._recv()).startswith('40')
+        self.reader = asyncio.ensure_future(self.read())
+        return self
+
+    async def read(self):
+        while True:
+            text = await self._recv()
+            if text == '2':
+                await self._send('3')
+            elif text.startswith('42'):
+                name, *args = json.loads(text[2:])
+                self.queue(name).put_nowait(args)
+
+    def queue(self, name):
+        return self.queues.setdefault(name, asyncio.Queue())
+
+    async def emit(self, event, data):
+        await self._send('42' + json.dumps([event, data]))
+
+    async def wait(self, event, timeout=HANDSHAKE_TIMEOUT):
+        return await asyncio.wait_for(self.queue(event).get(), timeout)
+
+    async def join(self, room_id, role, retry=None):
+        """Joins and marks ready; with retry, rejoins every `retry` seconds while the room is full"""
+        from interview_rooms.admission import issue_admission_token
+
+        token, _ = issue_admission_token({'room_id': room_id}, role)
+        while True:
+            full = self.queue('roomFull')
+            await self.emit('joinRoom', {'roomId': room_id, 'role': role, 'token': token})
+            assigned = asyncio.ensure_future(self.wait('roleAssigned'))
+            rejected = asyncio.ensure_future(full.get())
+            done, pending = await asyncio.wait({assigned, rejected}, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            if assigned in done:
+                break
+            if retry is None:
+                raise RuntimeError(f'Room {room_id} is full')
+            await asyncio.sleep(retry)
+        (role,) = assigned.result()
+        await self.emit('ready', {'roomId': room_id, 'role': role})
+        return role
+
+
+async def websocket_peer(port, origin):
+    import websockets
+
+    connection = await websockets.connect(
+        f'ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket', origin=origin,
+        open_timeout=HANDSHAKE_TIMEOUT, max_queue=None)
+    peer = await Peer(connection.send, connection.recv).open()
+    peer.close = connection.close
+    return peer
+
+
+async def asgi_peer(application):
+    from asgiref.testing import ApplicationCommunicator
+
+    communicator = ApplicationCommunicator(application, {
+        'type': 'websocket', 'path': '/socket.io/', 'query_string': b'EIO=4&transport=websocket',
+        'headers': [], 'subprotocols': [],
+    })
+
+    async def send(text):
+        await communicator.send_input({'type': 'websocket.receive', 'text': text})
+
+    async def recv():
+        return (await communicator.receive_output(HANDSHAKE_TIMEOUT))['text']
+
+    await communicator.send_input({'type': 'websocket.connect'})
+    assert (await communicator.receive_output(HANDSHAKE_TIMEOUT))['type'] == 'websocket.accept'
+    peer = await Peer(send, recv).open()
+    peer.communicator = communicator
+    return peer
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as fh:
+        for line in fh:
+            if line.startswith('VmRSS:'):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as fh:
+        fields = fh.read().rpartition(')')[2].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def worker_pid(process):
+    # gunicorn's master forks the uvicorn worker that holds the sockets.
+    with open(f'/proc/{process.pid}/task/{process.pid}/children') as fh:
+        children = fh.read().split()
+    return int(children[0]) if children else process.pid
+
+
+async def negotiate(pairs):
+    await asyncio.gather(*(host.wait('startNegotiation') for host, _ in pairs))
+
+
+async def capacity_level(port, origin, pid, rooms, messages, interval):
+    room_ids = [str(uuid.uuid4()) for _ in range(rooms)]
+    started = time.perf_counter()
+    pairs = []
+    for room_id in room_ids:
+        host, guest = await asyncio.gather(websocket_peer(port, origin), websocket_peer(port, origin))
+        pairs.append((host, guest))
+    connected = time.perf_counter()
+    await asyncio.gather(*(peer.join(room_id, role)
+                           for room_id, (host, guest) in zip(room_ids, pairs)
+                           for peer, role in ((host, 'host'), (guest, 'guest'))))
+    await negotiate(pairs)
+    negotiated = time.perf_counter()
+
+    latencies = []
+
+    async def relay(room_id, host, guest):
+        async def receive():
+            for _ in range(messages):
+                (candidate,) = await guest.wait('ice-candidate')
+                latencies.append(time.perf_counter() - candidate['sent'])
+
+        receiving = asyncio.ensure_future(receive())
+        for _ in range(messages):
+            await host.emit('ice-candidate', {'roomId': room_id, 'candidate': {'sent': time.perf_counter()}})
+            await asyncio.sleep(interval)
+        await receiving
+
+    relay_started, cpu_started = time.perf_counter(), cpu_seconds(pid)
+    await asyncio.gather(*(relay(room_id, host, guest) for room_id, (host, guest) in zip(room_ids, pairs)))
+    relay_elapsed = time.perf_counter() - relay_started
+
+    result = {
+        'rooms': rooms,
+        'connections': 2 * rooms,
+        'connect_s': round(connected - started, 2),
+        # Includes the consumer's 1 s + 0.5 s negotiation delays.
+        'negotiate_s': round(negotiated - connected, 2),
+        'relay_messages': len(latencies),
+        'relay_per_s': round(len(latencies) / relay_elapsed, 1),
+        'relay_p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'relay_p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'relay_p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'node_relay_cpu_s': round(cpu_seconds(pid) - cpu_started, 2),
+        'node_rss_mb': rss_mb(pid),
+    }
+    for host, guest in pairs:
+        for peer in (host, guest):
+            peer.reader.cancel()
+    return result, pairs
+
+
+async def close_all(pairs):
+    await asyncio.gather(*(peer.close() for pair in pairs for peer in pair))
+
+
+def capacity(levels, messages, interval):
+    from django.conf import settings
+
+    origin = settings.CORS_ALLOWED_ORIGINS[0]
+    port = free_port()
+    process = start_server('asgi', port, 1, {'SIGNALING_STATE_BACKEND': 'memory'})
+    results = []
+    try:
+        pid = worker_pid(process)
+        for rooms in levels:
+            async def level():
+                result, pairs = await capacity_level(port, origin, pid, rooms, messages, interval)
+                await close_all(pairs)
+                return result
+            result = asyncio.run(level())
+            print('capacity', json.dumps(result), file=sys.stderr)
+            results.append(result)
+    finally:
+        stop_server(process)
+    return results
+
+
+async def failover(rooms, node_ttl):
+    from django.core.cache.backends.locmem import LocMemCache
+
+    from signaling.consumers import SignalingConsumer
+    from signaling.presence import CacheStore, Presence, heartbeat
+
+    presence = Presence(CacheStore(LocMemCache('signaling-failover', {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}})),
+                        ttl=60, node_ttl=node_ttl)
+    node_a = SignalingConsumer.as_asgi(node_id='node-a', presence=presence)
+    node_b = SignalingConsumer.as_asgi(node_id='node-b', presence=presence)
+
+    room_ids = [str(uuid.uuid4()) for _ in range(rooms)]
+    pairs = [(await asgi_peer(node_a), await asgi_peer(node_b)) for _ in room_ids]
+    await asyncio.gather(*(peer.join(room_id, role)
+                           for room_id, (host, guest) in zip(room_ids, pairs)
+                           for peer, role in ((host, 'host'), (guest, 'guest'))))
+    await negotiate(pairs)
+    for _, guest in pairs:
+        guest.queues.clear()
+
+    # Node A dies: no disconnect handlers run and its heartbeat stops.
+    crashed = time.perf_counter()
+    for host, _ in pairs:
+        heartbeat.forget('node-a')
+        host.reader.cancel()
+        host.communicator.future.cancel()
+
+    recovery = []
+
+    async def reconnect(room_id, guest):
+        host = await asgi_peer(node_b)
+        await host.join(room_id, 'host', retry=0.25)
+        # The guest re-announces itself once the new host is seated.
+        await guest.wait('resetConnection')
+        await guest.emit('ready', {'roomId': room_id, 'role': 'guest'})
+        await host.wait('startNegotiation', timeout=node_ttl + HANDSHAKE_TIMEOUT)
+        recovery.append(time.perf_counter() - crashed)
+        return host
+
+    hosts = await asyncio.gather(*(reconnect(room_id, guest) for room_id, (_, guest) in zip(room_ids, pairs)))
+    for peer in (*hosts, *(guest for _, guest in pairs)):
+        peer.reader.cancel()
+        await peer.communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+    return {
+        'rooms': rooms,
+        'node_ttl_s': node_ttl,
+        'recovered': len(recovery),
+        # Includes the consumer's 1 s + 0.5 s negotiation delays.
+        'recovery_p50_s': round(percentile(recovery, 50), 2),
+        'recovery_max_s': round(max(recovery), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', nargs='+', type=int, default=[100, 250, 500],
+                        help="Rooms per node to test, one level after another")
+    parser.add_argument('--messages', type=int, default=20, help="ICE candidates relayed per room")
+    parser.add_argument('--interval-ms', type=float, default=50.0, help="Time between a host's candidates")
+    parser.add_argument('--failover-rooms', type=int, default=100)
+    parser.add_argument('--node-ttl', type=int, default=2)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+
+    report = {
+        'capacity': capacity(args.levels, args.messages, args.interval_ms / 1000),
+        'failover': asyncio.run(failover(args.failover_rooms, args.node_ttl)),
+    }
+    print('failover', json.dumps(report['failover']), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Sandboxed execution of candidate code in Python or JavaScript.
+
+Every run gets a fresh process, so nothing leaks from one run to the next,
+but the process is started before it is needed: the pool keeps
+CODE_EXEC_WARM_WORKERS spare runtimes per language that have already booted
+under their resource limits (see sandbox.py) and are blocked reading their
+program from stdin. A run takes a spare, writes the code and closes stdin,
+and a replacement is started in the background.
+
+Limits per run: CPU seconds, memory and process count via rlimits,
+a wall-clock timeout and an output cap enforced here; the process group is
+killed on any of them. With CODE_EXEC_ISOLATION = "pidns" each worker runs
+in its own PID and network namespaces: the kill tears it down whole,
+including processes that left the group, and programs cannot open network
+connections. Runs execute in a scratch directory with an
+empty environment. None of this hides the filesystem: run the backend as
+an unprivileged user, in a container without secrets mounted.
+
+At most CODE_EXEC_WORKERS runs execute at once in a process, and runs for
+the same room execute one at a time, with CODE_EXEC_MAX_QUEUED_PER_ROOM
+more allowed to wait.
+"""
+import atexit
+import codecs
+import os
+import selectors
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from backend.renderers import FastJSONRenderer
+
+SANDBOX = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox.py')
+LANGUAGES = ('python', 'javascript')
+MAX_FILE_BYTES = 1 << 20
+READ_SIZE = 65536
+# How often a run waiting for output checks whether the process has exited,
+# so descendants holding the pipes open cannot hold the run open.
+EXIT_POLL_SECONDS = 0.1
+
+_renderer = FastJSONRenderer()
+
+# Bootstraps that start the runtime and then block reading the program from
+# stdin; a warm worker is one that has got this far.
+PYTHON_BOOTSTRAP = (
+    "import sys\n"
+    "sys.stdout.reconfigure(line_buffering=True)\n"
+    "sys.stderr.reconfigure(line_buffering=True)\n"
+    "source = sys.stdin.read()\n"
+    "sys.stdin.close()\n"
+    "exec(compile(source, 'main.py', 'exec'), {'__name__': '__main__'})\n"
+)
+JAVASCRIPT_BOOTSTRAP = (
+    "let source = '';"
+    "process.stdin.setEncoding('utf8');"
+    "process.stdin.on('data', chunk => { source += chunk; });"
+    "process.stdin.on('end', () => { require('vm').runInThisContext(source, { filename: 'main.js' }); });"
+)
+
+
+class RoomBusy(Exception):
+    pass
+
+
+def runtime_command(language):
+    """Returns (command, sandbox.py MEMORY_LIMIT) for a language"""
+    if language == 'python':
+        return [settings.CODE_EXEC_PYTHON, '-I', '-S', '-c', PYTHON_BOOTSTRAP], 'as'
+    # V8 cannot start under a realistic RLIMIT_AS. RLIMIT_DATA still bounds
+    # its heap and off-heap buffers, and --max-old-space-size makes running
+    # out of heap a clean V8 error rather than a failed allocation.
+    return [settings.CODE_EXEC_NODE, f'--max-old-space-size={settings.CODE_EXEC_MEMORY_MB}', '-e',
+            JAVASCRIPT_BOOTSTRAP], 'data'
+
+
+class Worker:
+    """A booted, resource-limited runtime waiting for one program on stdin"""
+
+    def __init__(self, language):
+        command, memory_limit = runtime_command(language)
+        self.language = language
+        self.workdir = tempfile.mkdtemp(prefix='code-run-')
+        try:
+            if os.geteuid() == 0:
+                # sandbox.py switches to this user before running anything.
+                os.chown(self.workdir, settings.CODE_EXEC_UID, settings.CODE_EXEC_UID)
+            self.process = subprocess.Popen(
+                [sys.executable, '-I', '-S', SANDBOX, str(settings.CODE_EXEC_CPU_SECONDS),
+                 str(settings.CODE_EXEC_MEMORY_MB << 20), str(MAX_FILE_BYTES), str(settings.CODE_EXEC_MAX_PROCESSES),
+                 str(settings.CODE_EXEC_UID), memory_limit, settings.CODE_EXEC_ISOLATION, '--', *command],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                cwd=self.workdir,
+                env={'PATH': os.environ.get('PATH', os.defpath), 'HOME': self.workdir, 'LANG': 'C.UTF-8'},
+                start_new_session=True,
+            )
+        except OSError:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            raise
+        self.closed = False
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        if self.closed:
+            return
+        # The whole group, so children the program started go too; under
+        # "pidns" that includes the namespace's init, and with it the rest.
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout, self.process.stderr):
+            pipe.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class WarmPool:
+    def __init__(self, spares):
+        self.spares = spares
+        self._idle = {language: deque() for language in LANGUAGES}
+        self._lock = threading.Lock()
+        # Starting a process is a fork and exec; one thread keeps that off
+        # the request path.
+        self._spawner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='code-exec-spawn')
+
+    def acquire(self, language):
+        with self._lock:
+            idle = self._idle[language]
+            worker = None
+            while idle and worker is None:
+                worker = idle.popleft()
+                if not worker.alive():
+                    worker.close()
+                    worker = None
+        if worker is None:
+            worker = Worker(language)
+        self._spawner.submit(self.replenish, language)
+        return worker
+
+    def replenish(self, language):
+        while True:
+            with self._lock:
+                if len(self._idle[language]) >= self.spares:
+                    return
+            try:
+                worker = Worker(language)
+            except OSError:
+                # Runtime not installed; acquire() reports it per run.
+                return
+            with self._lock:
+                self._idle[language].append(worker)
+
+    def close(self):
+        with self._lock:
+            workers = [worker for idle in self._idle.values() for worker in idle]
+            for idle in self._idle.values():
+                idle.clear()
+        for worker in workers:
+            worker.kill()
+
+
+class RoomQueue:
+    """One run at a time per room, with at most `depth` more waiting"""
+
+    def __init__(self, depth):
+        self.depth = depth
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, room_id):
+        with self._lock:
+            entry = self._rooms.setdefault(room_id, [threading.Lock(), 0])
+            if entry[1] > self.depth:
+                raise RoomBusy(room_id)
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, room_id):
+        with self._lock:
+            entry = self._rooms[room_id]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._rooms[room_id]
+
+
+class Run:
+    """
+    One queued run, iterated as NDJSON lines: {"type": "stdout"|"stderr",
+    "data": ...} as output arrives, then a final {"type": "exit", "status":
+    ..., "exit_code": ..., "duration_ms": ...}. status is "ok", "error",
+    "timeout", "cpu_limit", "output_limit" or "unavailable".
+    """
+
+    def __init__(self, executor, room_id, language, code):
+        self.executor = executor
+        self.room_id = room_id
+        self.language = language
+        self.code = code
+        self._room_lock = executor.rooms.reserve(room_id)
+        self._reserved = True
+        self._events = self.events()
+        self._step = threading.Lock()
+
+    def __iter__(self):
+        while True:
+            with self._step:
+                event = next(self._events, None)
+            if event is None:
+                return
+            yield _renderer.render(event) + b'\n'
+
+    def aiter_lines(self):
+        """The same lines for ASGI servers, which need an async iterator to stream"""
+        return AsyncLines(self)
+
+    def close(self):
+        # Waits for a step in progress in another thread, bounded by the
+        # run's timeout, so a disconnect under ASGI still kills the process.
+        with self._step:
+            self._events.close()
+        self._release()
+
+    def _release(self):
+        if self._reserved:
+            self._reserved = False
+            self.executor.rooms.release(self.room_id)
+
+    def events(self):
+        executor = self.executor
+        try:
+            with self._room_lock, executor.slots:
+                try:
+                    worker = executor.pool.acquire(self.language)
+                except OSError as exc:
+                    yield {'type': 'stderr', 'data': f'{self.language} runtime is not available: {exc}\n'}
+                    yield {'type': 'exit', 'status': 'unavailable', 'exit_code': None, 'duration_ms': 0}
+                    return
+                try:
+                    yield from self.stream(worker)
+                finally:
+                    worker.kill()
+        finally:
+            self._release()
+
+    def stream(self, worker):
+        process = worker.process
+        started = time.monotonic()
+        deadline = started + settings.CODE_EXEC_TIMEOUT
+        try:
+            process.stdin.write(self.code.encode())
+            process.stdin.close()
+        except BrokenPipeError:
+            pass  # Died on startup; the exit status says why.
+
+        output_left = settings.CODE_EXEC_MAX_OUTPUT_BYTES
+        status = None
+        exited = False
+        decoders = {}
+        with selectors.DefaultSelector() as selector:
+            for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr)):
+                selector.register(pipe, selectors.EVENT_READ, name)
+                decoders[name] = codecs.getincrementaldecoder('utf-8')('replace')
+            while status is None and selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    status = 'timeout'
+                    break
+                ready = selector.select(0 if exited else min(remaining, EXIT_POLL_SECONDS))
+                if not ready:
+                    # Once exited, output it wrote is drained by the next
+                    # select; nothing more to read after that.
+                    if exited:
+                        break
+                    exited = process.poll() is not None
+                    continue
+                for key, _ in ready:
+                    chunk = os.read(key.fd, READ_SIZE)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+                    if len(chunk) > output_left:
+                        chunk, status = chunk[:output_left], 'output_limit'
+                    output_left -= len(chunk)
+                    text = decoders[key.data].decode(chunk)
+                    if text:
+                        yield {'type': key.data, 'data': text}
+                    if status is not None:
+                        break
+
+        if status is None:
+            try:
+                process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                status = 'timeout'
+        if status is not None:
+            worker.kill()
+        exit_code = process.returncode
+        if status is None:
+            status = 'ok' if exit_code == 0 else 'error'
+            if exit_code in (-signal.SIGXCPU, -signal.SIGKILL):
+                status = 'cpu_limit'
+        yield {'type': 'exit', 'status': status, 'exit_code': exit_code,
+               'duration_ms': round((time.monotonic() - started) * 1000)}
+
+
+class AsyncLines:
+    def __init__(self, run):
+        self.run = run
+
+    async def __aiter__(self):
+        # Each step blocks on the process's pipes, so it runs in a thread.
+        lines = iter(self.run)
+        next_line = sync_to_async(next, thread_sensitive=False)
+        while (line := await next_line(lines, None)) is not None:
+            yield line
+
+    def close(self):
+        self.run.close()
+
+
+class CodeExecutor:
+    def __init__(self):
+        self.pool = WarmPool(settings.CODE_EXEC_WARM_WORKERS)
+        self.rooms = RoomQueue(settings.CODE_EXEC_MAX_QUEUED_PER_ROOM)
+        self.slots = threading.BoundedSemaphore(settings.CODE_EXEC_WORKERS)
+        atexit.register(self.pool.close)
+
+    def submit(self, room_id, language, code):
+        """Queues a run; raises RoomBusy when the room's queue is full"""
+        return Run(self, room_id, language, code)
+
+
+executor = CodeExecutor()
@@ -0,0 +1,143 @@
+"""
+Launcher for one sandboxed run, executed as a script (no Django, no site
+packages) by code_execution.pool:
+
+    python -I -S sandbox.py CPU_SECONDS MEMORY_BYTES FILE_BYTES MAX_PROCESSES UID MEMORY_LIMIT ISOLATION -- COMMAND...
+
+Applies the resource limits and starts COMMAND under them, so the language
+runtime starts already limited. MEMORY_LIMIT says how MEMORY_BYTES is
+enforced: "as" caps the address space (RLIMIT_AS); "data" caps writable
+private memory (RLIMIT_DATA), for runtimes that reserve far more address
+space than they use (V8) and would not start under RLIMIT_AS. MAX_PROCESSES
+caps processes and threads (RLIMIT_NPROC), so a fork bomb runs out of
+forks. The kernel does not apply that limit to root, so a launcher started
+as root first switches to UID; the pool hands that user the scratch
+directory.
+
+With ISOLATION "pidns" the launcher moves into new user, PID and network
+namespaces and forks the namespace's init, which runs COMMAND as its only
+child. Nothing can leave a PID namespace, and the kernel kills everything
+in it when its init exits, so processes the program forks, setsid() or not,
+go when the runtime exits or when the pool kills the launcher's process
+group. Inside, the program has an unmapped uid and no capabilities, cannot
+see or signal the launcher or init, and has no network: only a loopback
+interface that is down. With ISOLATION "none" COMMAND is exec'd directly
+and contained only by its process group.
+
+The launcher exits the way the runtime did: with its exit code, or killed
+by the same signal.
+"""
+import ctypes
+import os
+import resource
+import signal
+import sys
+
+MAX_OPEN_FILES = 64
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+
+
+def limit(which, value):
+    resource.setrlimit(which, (value, value))
+
+
+def unshare(flags):
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.unshare(flags) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def resolve(program):
+    """The executable's path, looked up while its directories are still readable"""
+    if os.sep in program:
+        return program
+    for directory in os.environ.get('PATH', os.defpath).split(os.pathsep):
+        path = os.path.join(directory, program)
+        if os.access(path, os.X_OK):
+            return path
+    return program
+
+
+def execute(command):
+    try:
+        os.execv(command[0], command)
+    except OSError as exc:
+        print(f'sandbox: cannot run {command[0]}: {exc}', file=sys.stderr)
+        os._exit(127)
+
+
+def init(command, status_fd):
+    """PID 1 of the namespace: reaps until the runtime exits, then reports how"""
+    runtime = os.fork()
+    if runtime == 0:
+        os.close(status_fd)
+        execute(command)
+    while True:
+        pid, status = os.wait()
+        if pid == runtime:
+            os.write(status_fd, str(status).encode())
+            # Exiting takes everything else in the namespace with it.
+            os._exit(0)
+
+
+def exit_like(status):
+    if os.WIFSIGNALED(status):
+        signum = os.WTERMSIG(status)
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+    os._exit(os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1)
+
+
+def drop_root(uid):
+    os.setgroups([])
+    os.setgid(uid)
+    os.setuid(uid)
+
+
+def main(argv):
+    separator = argv.index('--')
+    cpu_seconds, memory_bytes, file_bytes, max_processes, uid = (int(value) for value in argv[1:separator - 2])
+    memory_limit, isolation = argv[separator - 2:separator]
+    command = [resolve(argv[separator + 1]), *argv[separator + 2:]]
+
+    if os.geteuid() == 0:
+        drop_root(uid)
+    if isolation == 'pidns':
+        try:
+            unshare(CLONE_NEWUSER | CLONE_NEWPID | CLONE_NEWNET)
+        except OSError as exc:
+            print(f'sandbox: cannot create namespaces: {exc}', file=sys.stderr)
+            os._exit(126)
+
+    # CPU time past the soft limit raises SIGXCPU; the hard limit is the
+    # SIGKILL backstop if the runtime ignores it.
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    limit(resource.RLIMIT_AS if memory_limit == 'as' else resource.RLIMIT_DATA, memory_bytes)
+    limit(resource.RLIMIT_FSIZE, file_bytes)
+    limit(resource.RLIMIT_CORE, 0)
+    limit(resource.RLIMIT_NOFILE, MAX_OPEN_FILES)
+    # Counted per user namespace, so under "pidns" only the sandbox's own
+    # processes count; otherwise every process of the backend's user does.
+    limit(resource.RLIMIT_NPROC, max_processes)
+
+    if isolation != 'pidns':
+        execute(command)
+
+    read_fd, status_fd = os.pipe()
+    init_pid = os.fork()
+    if init_pid == 0:
+        os.close(read_fd)
+        init(command, status_fd)
+    os.close(status_fd)
+    report = b''
+    while chunk := os.read(read_fd, 64):
+        report += chunk
+    _, status = os.waitpid(init_pid, 0)
+    exit_like(int(report) if report else status)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,10 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from code_execution.pool import LANGUAGES
+
+
+class CodeRunSerializer(serializers.Serializer):
+    language = serializers.ChoiceField(choices=LANGUAGES)
+    code = serializers.CharField(max_length=settings.CODE_EXEC_MAX_CODE_LENGTH, allow_blank=True,
+                                 trim_whitespace=False)
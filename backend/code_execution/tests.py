@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from code_execution import sandbox
+from code_execution.pool import CodeExecutor, executor
+from interview_rooms.models import Room
+from user.models import User
+
+
+def user_namespaces_available():
+    pid = os.fork()
+    if pid == 0:
+        try:
+            sandbox.unshare(sandbox.CLONE_NEWUSER | sandbox.CLONE_NEWPID)
+        except OSError:
+            os._exit(1)
+        os._exit(0)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0
+
+
+# Run as root, programs run as CODE_EXEC_UID, which may not reach the test
+# interpreter (e.g. one under /root); the system one is readable by anyone.
+PYTHON = shutil.which('python3', path=os.defpath) or settings.CODE_EXEC_PYTHON
+
+
+@override_settings(CODE_EXEC_PYTHON=PYTHON, CODE_EXEC_WARM_WORKERS=0, CODE_EXEC_TIMEOUT=5,
+                   CODE_EXEC_CPU_SECONDS=2, CODE_EXEC_ISOLATION='pidns')
+@skipUnless(user_namespaces_available(), "user namespaces are not available")
+class CodeRunTests(SimpleTestCase):
+    def run_code(self, code, language='python'):
+        events = [json.loads(line) for line in CodeExecutor().submit('room', language, code)]
+        output = ''.join(event['data'] for event in events if event['type'] == 'stdout')
+        return output, events[-1]
+
+    def test_ok_and_error(self):
+        output, result = self.run_code('print("hello")')
+        self.assertEqual((output, result['status'], result['exit_code']), ('hello\n', 'ok', 0))
+        _, result = self.run_code('raise SystemExit(3)')
+        self.assertEqual((result['status'], result['exit_code']), ('error', 3))
+
+    @override_settings(CODE_EXEC_TIMEOUT=1)
+    def test_timeout(self):
+        _, result = self.run_code('import time\ntime.sleep(30)')
+        self.assertEqual(result['status'], 'timeout')
+        self.assertLess(result['duration_ms'], 3000)
+
+    def test_cpu_limit(self):
+        _, result = self.run_code('while True:\n    pass')
+        self.assertEqual(result['status'], 'cpu_limit')
+
+    @override_settings(CODE_EXEC_MAX_OUTPUT_BYTES=100)
+    def test_output_limit(self):
+        output, result = self.run_code('while True:\n    print("x" * 50)')
+        self.assertEqual(result['status'], 'output_limit')
+        self.assertEqual(len(output), 100)
+
+    @override_settings(CODE_EXEC_MAX_PROCESSES=16)
+    def test_fork_bomb_runs_out_of_processes(self):
+        output, result = self.run_code(
+            'import os, time\n'
+            'forks = 0\n'
+            'try:\n'
+            '    while True:\n'
+            '        if os.fork() == 0:\n'
+            '            time.sleep(30)\n'
+            '            os._exit(0)\n'
+            '        forks += 1\n'
+            'except OSError:\n'
+            '    print(forks)\n')
+        self.assertEqual(result['status'], 'ok')
+        self.assertLess(int(output), 16)
+
+    def test_no_network(self):
+        listener = socket.create_server(('127.0.0.1', 0))
+        self.addCleanup(listener.close)
+        output, result = self.run_code(
+            'import socket\n'
+            'try:\n'
+            f'    socket.create_connection(("127.0.0.1", {listener.getsockname()[1]}), timeout=1)\n'
+            '    print("connected")\n'
+            'except OSError as exc:\n'
+            '    print(type(exc).__name__)\n')
+        self.assertEqual((output, result['status']), ('OSError\n', 'ok'))
+
+    @override_settings(CODE_EXEC_MEMORY_MB=128)
+    @skipUnless(shutil.which('node', path=os.defpath), "node is not installed")
+    def test_javascript_memory_is_limited_off_heap_too(self):
+        # 1 GiB of Buffers lives outside the V8 heap --max-old-space-size caps.
+        output, result = self.run_code(
+            'const buffers = [];\n'
+            'for (let i = 0; i < 64; i++) buffers.push(Buffer.alloc(16 << 20, 1));\n'
+            'console.log("allocated");\n', language='javascript')
+        self.assertEqual(output, '')
+        self.assertEqual(result['status'], 'error')
+
+    def test_escaped_processes_die_with_the_run(self):
+        # The child leaves the process group and keeps stdout open, writing
+        # to a file outside the scratch directory for as long as it lives.
+        shared = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, shared, ignore_errors=True)
+        os.chmod(shared, 0o777)
+        beacon = os.path.join(shared, 'beacon')
+        output, result = self.run_code(
+            'import os, time\n'
+            'if os.fork() == 0:\n'
+            '    os.setsid()\n'
+            '    while True:\n'
+            f'        with open({beacon!r}, "a") as file:\n'
+            '            file.write("x")\n'
+            '        time.sleep(0.02)\n'
+            f'while not os.path.exists({beacon!r}):\n'
+            '    time.sleep(0.01)\n'
+            'print("parent done")\n')
+
+        self.assertEqual((output, result['status'], result['exit_code']), ('parent done\n', 'ok', 0))
+        self.assertLess(result['duration_ms'], 2000)
+        size = os.path.getsize(beacon)
+        time.sleep(0.2)
+        self.assertEqual(os.path.getsize(beacon), size)
+
+
+class CodeRunViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(email='runs@example.com', password='pw123456', full_name='Owner')
+        cls.room = Room.objects.create(owner=owner, name='Runs')
+
+    def post(self, room_id, code='print(1)'):
+        return self.client.post(f'/code-execution/{room_id}/runs/', {'language': 'python', 'code': code},
+                                content_type='application/json', HTTP_HOST='localhost')
+
+    def test_unknown_room_is_404(self):
+        self.assertEqual(self.post(uuid.uuid4()).status_code, 404)
+
+    def test_full_room_queue_is_429(self):
+        room_id = str(self.room.room_id)
+        # One running plus CODE_EXEC_MAX_QUEUED_PER_ROOM waiting.
+        for _ in range(settings.CODE_EXEC_MAX_QUEUED_PER_ROOM + 1):
+            executor.rooms.reserve(room_id)
+            self.addCleanup(executor.rooms.release, room_id)
+        self.assertEqual(self.post(self.room.room_id).status_code, 429)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from code_execution.views import CodeRunView
+
+urlpatterns = [
+    path('<uuid:room_id>/runs/', CodeRunView.as_view(), name='code-run'),
+]
@@ -0,0 +1,41 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from code_execution.pool import RoomBusy, executor
+from code_execution.serializers import CodeRunSerializer
+from interview_rooms.cache import get_public_room
+
+
+# Create your views here.
+
+class CodeRunView(APIView):
+    """
+    Runs a program for an open room and streams its output as NDJSON (see
+    code_execution.pool.Run). Anyone with the room link may run code, like
+    the editor itself; runs for one room are queued one after another.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, room_id):
+        serializer = CodeRunSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if get_public_room(room_id) is None:
+            return Response({'detail': 'No Room matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            run = executor.submit(str(room_id), **serializer.validated_data)
+        except RoomBusy:
+            return Response({'detail': 'Too many runs are queued for this room.'},
+                            status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # An async iterator under ASGI, so output is streamed rather than
+        # collected in a thread first.
+        content = run.aiter_lines() if isinstance(request._request, ASGIRequest) else run
+        response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        # Stops nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
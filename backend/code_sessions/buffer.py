@@ -0,0 +1,119 @@
+"""
+Write-behind buffer for editor operations relayed by the signaling
+consumer.
+
+Operations are queued per room in arrival order. A daemon thread writes
+everything queued every CODE_SESSION_FLUSH_INTERVAL seconds, or sooner once
+CODE_SESSION_MAX_PENDING_OPS are waiting, with one append_operations() call
+for all rooms. Operations for rooms that are unknown or closed are dropped.
+
+Durability matches interview_notes.buffer: a clean shutdown flushes through
+an atexit hook and a crash loses at most one interval. A failed flush is
+retried room by room, so one room's bad batch cannot hold back the others;
+a room's operations go back in front of any queued since, and are logged
+and dropped once they have failed `max_attempts` flushes. At most
+CODE_SESSION_MAX_QUEUED_OPS operations are held; past that, new ones are
+dropped until a flush makes room.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+
+from backend.write_behind import WriteBehindBuffer
+from code_sessions.store import append_operations
+from interview_rooms.models import Room
+
+logger = logging.getLogger(__name__)
+
+
+class CodeOperationBuffer(WriteBehindBuffer):
+    name = 'code-session-write-behind'
+
+    def __init__(self, interval=1.0, max_pending=20000, max_queued=100000, max_attempts=5):
+        super().__init__(interval)
+        self.max_pending = max_pending
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self._pending = {}
+        self._depth = 0
+        # room_id -> flushes its queued operations have failed
+        self._attempts = {}
+        self._dropped = 0
+
+    def add(self, room_id, op):
+        """Queues a normalized operation for the room with UUID room_id"""
+        with self._lock:
+            if self._depth >= self.max_queued:
+                self._dropped += 1
+                return
+            self._pending.setdefault(room_id, []).append(op)
+            self._depth += 1
+            depth = self._depth
+        self._ensure_started()
+        if depth >= self.max_pending:
+            self.wake()
+
+    def depth(self):
+        with self._lock:
+            return self._depth
+
+    def flush(self):
+        """Writes the queued operations, returning how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._depth = self._pending, {}, 0
+                dropped, self._dropped = self._dropped, 0
+            if dropped:
+                logger.error("Dropped %d code operations: more than %d were queued", dropped, self.max_queued)
+            if not batch:
+                return 0
+            try:
+                written = self._write(batch)
+            except Exception:
+                logger.warning("Code session flush failed, retrying room by room", exc_info=True)
+            else:
+                self._succeeded(batch)
+                return written
+
+            written, failed = 0, {}
+            for room_id, ops in batch.items():
+                try:
+                    written += self._write({room_id: ops})
+                except Exception:
+                    logger.warning("Code operations for room %s failed to write", room_id, exc_info=True)
+                    failed[room_id] = ops
+            self._succeeded(batch.keys() - failed.keys())
+            self._requeue(failed)
+            return written
+
+    def _write(self, batch):
+        rooms = dict(Room.objects.filter(room_id__in=[uuid.UUID(room_id) for room_id in batch],
+                                         is_closed=False).values_list('room_id', 'id'))
+        return append_operations({rooms[uuid.UUID(room_id)]: ops for room_id, ops in batch.items()
+                                  if uuid.UUID(room_id) in rooms})
+
+    def _succeeded(self, room_ids):
+        with self._lock:
+            for room_id in room_ids:
+                self._attempts.pop(room_id, None)
+
+    def _requeue(self, failed):
+        with self._lock:
+            for room_id, ops in failed.items():
+                attempts = self._attempts.get(room_id, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(room_id, None)
+                    logger.error("Dropping %d code operations for room %s after %d failed writes",
+                                 len(ops), room_id, attempts)
+                    continue
+                self._attempts[room_id] = attempts
+                self._pending[room_id] = ops + self._pending.get(room_id, [])
+                self._depth += len(ops)
+
+
+code_operations = CodeOperationBuffer(
+    interval=settings.CODE_SESSION_FLUSH_INTERVAL,
+    max_pending=settings.CODE_SESSION_MAX_PENDING_OPS,
+    max_queued=settings.CODE_SESSION_MAX_QUEUED_OPS,
+)
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('interview_rooms', '0005_room_expires_at_archivedroom'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSession',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='code_session', serialize=False, to='interview_rooms.room')),
+                ('language', models.CharField(blank=True, max_length=32)),
+                ('content', models.TextField(blank=True)),
+                ('seq', models.PositiveBigIntegerField(default=0)),
+                ('snapshot_seq', models.PositiveBigIntegerField(default=0)),
+                ('snapshot_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CodeOperationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_seq', models.PositiveBigIntegerField()),
+                ('last_seq', models.PositiveBigIntegerField()),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('ops', models.JSONField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='code_operations', to='interview_rooms.room')),
+            ],
+            options={
+                'ordering': ['first_seq'],
+                'constraints': [models.UniqueConstraint(fields=('room', 'first_seq'), name='unique_code_operation_log_seq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CodeSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveBigIntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('language', models.CharField(blank=True, max_length=32)),
+                ('content', models.TextField(blank=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='code_snapshots', to='interview_rooms.room')),
+            ],
+            options={
+                'ordering': ['-seq'],
+                'indexes': [models.Index(fields=['room', 'taken_at'], name='code_snapshot_room_taken_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'seq'), name='unique_code_snapshot_seq')],
+            },
+        ),
+    ]
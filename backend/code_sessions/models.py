@@ -0,0 +1,67 @@
+from django.db import models
+
+from interview_rooms.models import Room
+
+
+# Create your models here.
+
+class CodeSession(models.Model):
+    """
+    The shared editor of a room as of its latest operation: seq operations
+    applied so far, and the seq of the newest CodeSnapshot.
+    """
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, primary_key=True, related_name='code_session')
+    language = models.CharField(max_length=32, blank=True)
+    content = models.TextField(blank=True)
+    seq = models.PositiveBigIntegerField(default=0)
+    snapshot_seq = models.PositiveBigIntegerField(default=0)
+    snapshot_at = models.DateTimeField(null=True, blank=True)
+    # Time of the latest operation; operation times never go below it.
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Code session of room {self.room_id} at op {self.seq}"
+
+
+class CodeSnapshot(models.Model):
+    """The editor's full state after operation seq, taken at that operation's time"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='code_snapshots')
+    seq = models.PositiveBigIntegerField()
+    taken_at = models.DateTimeField()
+    language = models.CharField(max_length=32, blank=True)
+    content = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'seq'], name='unique_code_snapshot_seq'),
+        ]
+        indexes = [
+            models.Index(fields=['room', 'taken_at'], name='code_snapshot_room_taken_idx'),
+        ]
+        ordering = ['-seq']
+
+    def __str__(self):
+        return f"Snapshot of room {self.room_id} at op {self.seq}"
+
+
+class CodeOperationLog(models.Model):
+    """
+    Append-only log of editor operations first_seq..last_seq, one row per
+    ingested batch rather than per keystroke. ops are the operations in
+    order, as normalized by code_sessions.ops.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='code_operations')
+    first_seq = models.PositiveBigIntegerField()
+    last_seq = models.PositiveBigIntegerField()
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    ops = models.JSONField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'first_seq'], name='unique_code_operation_log_seq'),
+        ]
+        ordering = ['first_seq']
+
+    def __str__(self):
+        return f"Operations {self.first_seq}-{self.last_seq} of room {self.room_id}"
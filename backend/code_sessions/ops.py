@@ -0,0 +1,105 @@
+"""
+Editor operations as the code editor sends them over the signaling socket,
+and how they change the code.
+
+Stored form, one dict per operation; `at` is epoch milliseconds:
+
+    {"at": ..., "type": "change", "range": [start line, start column,
+     end line, end column], "text": ..., "user": ...}
+    {"at": ..., "type": "reset", "text": ..., "user": ...}
+    {"at": ..., "type": "language", "language": ..., "user": ...}
+
+A change replaces a Monaco range (1-based lines and columns, clamped to the
+text the way Monaco clamps them) with its text; a reset replaces the whole
+text. Columns count code points, which matches Monaco's UTF-16 columns for
+everything outside the astral planes.
+"""
+from django.conf import settings
+
+TYPES = ('change', 'reset', 'language')
+RANGE_KEYS = ('startLineNumber', 'startColumn', 'endLineNumber', 'endColumn')
+MAX_LANGUAGE_LENGTH = 32
+MAX_USER_LENGTH = 255
+
+
+def _position(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"Invalid position {value!r}")
+    return value
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError("text must be a string")
+    if len(value) > settings.CODE_SESSION_MAX_CONTENT_LENGTH:
+        raise ValueError("text is too long")
+    return value
+
+
+def normalize_op(data, now_ms):
+    """
+    Returns the stored form of one operation given in the socket events'
+    shape: {"type": "change", "range": {...}, "text", "timestamp", "userId"},
+    {"type": "reset", "code", "userId"} or {"type": "language", "language",
+    "userId"}. A missing timestamp means now_ms. Raises ValueError.
+    """
+    if not isinstance(data, dict) or data.get('type') not in TYPES:
+        raise ValueError("type must be one of: " + ', '.join(TYPES))
+    timestamp = data.get('timestamp')
+    if isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)):
+        timestamp = now_ms
+    op = {'at': int(timestamp), 'type': data['type']}
+
+    if op['type'] == 'change':
+        change_range = data.get('range')
+        if not isinstance(change_range, dict):
+            raise ValueError("range must be an object")
+        op['range'] = [_position(change_range.get(key)) for key in RANGE_KEYS]
+        op['text'] = _text(data.get('text', ''))
+    elif op['type'] == 'reset':
+        op['text'] = _text(data.get('code', data.get('text')))
+    else:
+        language = data.get('language')
+        if not isinstance(language, str) or not 0 < len(language) <= MAX_LANGUAGE_LENGTH:
+            raise ValueError("language must be a short string")
+        op['language'] = language
+
+    user = data.get('userId')
+    if user is not None:
+        op['user'] = str(user)[:MAX_USER_LENGTH]
+    return op
+
+
+def _offset(text, line, column):
+    pos = 0
+    for _ in range(line - 1):
+        newline = text.find('\n', pos)
+        if newline < 0:
+            # Past the last line: Monaco clamps to the end of the text.
+            return len(text)
+        pos = newline + 1
+    end = text.find('\n', pos)
+    if end < 0:
+        end = len(text)
+    return min(pos + column - 1, end)
+
+
+def apply_op(state, op):
+    """
+    Applies a stored operation to state, a (language, content) pair, and
+    returns the new pair. An operation that would grow the content past
+    CODE_SESSION_MAX_CONTENT_LENGTH leaves it unchanged.
+    """
+    language, content = state
+    if op['type'] == 'language':
+        return op['language'], content
+    if op['type'] == 'reset':
+        new_content = op['text']
+    else:
+        start_line, start_column, end_line, end_column = op['range']
+        start = _offset(content, start_line, start_column)
+        end = max(_offset(content, end_line, end_column), start)
+        new_content = content[:start] + op['text'] + content[end:]
+    if len(new_content) > settings.CODE_SESSION_MAX_CONTENT_LENGTH:
+        return state
+    return language, new_content
@@ -0,0 +1,22 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class CodeOperationBatchSerializer(serializers.Serializer):
+    """A relay's batch of editor operations, in order (see code_sessions.ops)"""
+    ops = serializers.ListField(child=serializers.DictField(), allow_empty=False,
+                                max_length=settings.CODE_SESSION_MAX_BATCH_OPS)
+
+
+class CodeReplayQuerySerializer(serializers.Serializer):
+    at = serializers.DateTimeField(required=False)
+
+
+class CodeSessionStateSerializer(serializers.Serializer):
+    room_id = serializers.UUIDField()
+    seq = serializers.IntegerField()
+    at = serializers.DateTimeField(allow_null=True)
+    language = serializers.CharField()
+    content = serializers.CharField()
+    snapshot_seq = serializers.IntegerField()
+    replayed_ops = serializers.IntegerField()
@@ -0,0 +1,122 @@
+"""
+Writing and replaying a room's editor history.
+
+append_operations() writes any number of rooms' operation batches in one
+transaction with a fixed number of statements: an INSERT of missing
+sessions, a locking SELECT of the sessions, one bulk INSERT each for log
+rows and snapshots, and one bulk UPDATE of the sessions. Log rows hold up to
+CODE_SESSION_SNAPSHOT_OPS operations, so keystroke-rate editing costs a few
+rows per flush interval per room rather than one per keystroke.
+
+replay() starts from the newest snapshot at or before the requested time
+and applies the logged operations after it, at most about two snapshots'
+worth.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from code_sessions.models import CodeOperationLog, CodeSession, CodeSnapshot
+from code_sessions.ops import apply_op
+
+
+def to_datetime(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=dt_timezone.utc)
+
+
+def to_ms(value):
+    return int(value.timestamp() * 1000)
+
+
+def append_operations(ops_by_room, now=None):
+    """
+    Appends normalized operations ({Room pk: [op, ...]}, each list in
+    order) to the rooms' logs and advances their sessions. Operation times
+    are clamped to [the session's latest operation, now] so that a room's
+    log is ordered by time. Returns the number of operations written.
+    """
+    ops_by_room = {room: ops for room, ops in ops_by_room.items() if ops}
+    if not ops_by_room:
+        return 0
+    now = now or timezone.now()
+    now_ms = to_ms(now)
+    chunk_size = settings.CODE_SESSION_SNAPSHOT_OPS
+    snapshot_interval = settings.CODE_SESSION_SNAPSHOT_INTERVAL * 1000
+
+    with transaction.atomic():
+        CodeSession.objects.bulk_create(
+            [CodeSession(room_id=room, updated_at=now) for room in ops_by_room], ignore_conflicts=True)
+        sessions = list(CodeSession.objects.select_for_update().filter(room_id__in=ops_by_room).order_by('room_id'))
+
+        logs, snapshots, written = [], [], 0
+        for session in sessions:
+            ops = ops_by_room[session.room_id]
+            state = (session.language, session.content)
+            last_ms = to_ms(session.updated_at) if session.seq else 0
+            snapshot_ms = to_ms(session.snapshot_at) if session.snapshot_at else None
+            for start in range(0, len(ops), chunk_size):
+                chunk = ops[start:start + chunk_size]
+                for op in chunk:
+                    op['at'] = last_ms = min(max(op['at'], last_ms), now_ms)
+                    state = apply_op(state, op)
+                logs.append(CodeOperationLog(
+                    room_id=session.room_id, first_seq=session.seq + 1, last_seq=session.seq + len(chunk),
+                    started_at=to_datetime(chunk[0]['at']), ended_at=to_datetime(last_ms), ops=chunk,
+                ))
+                session.seq += len(chunk)
+                if (session.seq - session.snapshot_seq >= chunk_size or snapshot_ms is None
+                        or last_ms - snapshot_ms >= snapshot_interval):
+                    snapshot_ms = last_ms
+                    session.snapshot_seq = session.seq
+                    snapshots.append(CodeSnapshot(room_id=session.room_id, seq=session.seq,
+                                                  taken_at=to_datetime(last_ms), language=state[0],
+                                                  content=state[1]))
+            session.language, session.content = state
+            session.updated_at = to_datetime(last_ms)
+            session.snapshot_at = to_datetime(snapshot_ms)
+            written += len(ops)
+
+        CodeOperationLog.objects.bulk_create(logs)
+        CodeSnapshot.objects.bulk_create(snapshots)
+        CodeSession.objects.bulk_update(
+            sessions, ['language', 'content', 'seq', 'snapshot_seq', 'snapshot_at', 'updated_at'])
+    return written
+
+
+def replay(room, at=None):
+    """
+    The editor state of a room (a Room pk) after its last operation at or
+    before `at`, or the latest state without one: {seq, at, language,
+    content, snapshot_seq, replayed_ops}. seq 0 is the empty editor.
+    """
+    state = {'seq': 0, 'at': None, 'language': '', 'content': '', 'snapshot_seq': 0, 'replayed_ops': 0}
+    if at is None:
+        session = CodeSession.objects.filter(room_id=room).first()
+        if session is not None and session.seq:
+            state.update(seq=session.seq, at=session.updated_at, language=session.language,
+                         content=session.content, snapshot_seq=session.snapshot_seq)
+        return state
+
+    snapshot = (CodeSnapshot.objects.filter(room_id=room, taken_at__lte=at)
+                .order_by('-taken_at', '-seq').values('seq', 'taken_at', 'language', 'content').first())
+    if snapshot is not None:
+        state.update(seq=snapshot['seq'], at=snapshot['taken_at'], language=snapshot['language'],
+                     content=snapshot['content'], snapshot_seq=snapshot['seq'])
+
+    at_ms = to_ms(at)
+    current = (state['language'], state['content'])
+    logs = (CodeOperationLog.objects.filter(room_id=room, last_seq__gt=state['seq'], started_at__lte=at)
+            .order_by('first_seq').values_list('first_seq', 'ops'))
+    for first_seq, ops in logs:
+        for seq, op in enumerate(ops, start=first_seq):
+            if seq <= state['seq']:
+                continue
+            if op['at'] > at_ms:
+                break
+            current = apply_op(current, op)
+            state['seq'], state['at'] = seq, to_datetime(op['at'])
+            state['replayed_ops'] += 1
+    state['language'], state['content'] = current
+    return state
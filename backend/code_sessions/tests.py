@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from code_sessions.buffer import CodeOperationBuffer
+from code_sessions.models import CodeOperationLog, CodeSnapshot
+from code_sessions.ops import apply_op, normalize_op
+from code_sessions.store import append_operations, replay, to_datetime, to_ms
+from interview_rooms.admission import issue_admission_token, publish_revocations
+from interview_rooms.models import Room
+from user.models import User
+
+
+def change(line, column, text, at):
+    return normalize_op({'type': 'change', 'text': text, 'timestamp': at, 'range': {
+        'startLineNumber': line, 'startColumn': column, 'endLineNumber': line, 'endColumn': column}}, at)
+
+
+class ApplyOpTests(TestCase):
+    def test_monaco_ranges(self):
+        state = ('python', 'ab\ncd')
+        self.assertEqual(apply_op(state, change(2, 2, 'X', 0))[1], 'ab\ncXd')
+        replace = normalize_op({'type': 'change', 'text': 'Z', 'range': {
+            'startLineNumber': 1, 'startColumn': 2, 'endLineNumber': 2, 'endColumn': 2}}, 0)
+        self.assertEqual(apply_op(state, replace)[1], 'aZd')
+        # codeReset's range runs to Number.MAX_SAFE_INTEGER; it is clamped.
+        everything = normalize_op({'type': 'change', 'text': 'new', 'range': {
+            'startLineNumber': 1, 'startColumn': 1, 'endLineNumber': 2 ** 53 - 1, 'endColumn': 1}}, 0)
+        self.assertEqual(apply_op(state, everything)[1], 'new')
+
+    def test_invalid_ops(self):
+        for data in ({'type': 'nope'}, {'type': 'change', 'text': 'x'},
+                     {'type': 'change', 'text': 'x', 'range': {'startLineNumber': 0}},
+                     {'type': 'reset'}, {'type': 'language', 'language': ''}):
+            with self.assertRaises(ValueError):
+                normalize_op(data, 0)
+
+
+@override_settings(CODE_SESSION_SNAPSHOT_OPS=10, CODE_SESSION_SNAPSHOT_INTERVAL=3600)
+class CodeSessionStoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(email='owner@example.com', password='pw123456', full_name='Owner')
+        cls.room = Room.objects.create(owner=owner, name='Pairing')
+
+    def test_replay_at_any_time_from_nearest_snapshot(self):
+        start = to_ms(timezone.now()) - 60_000
+        ops = [change(1, index + 1, str(index % 10), start + index * 100) for index in range(35)]
+        self.assertEqual(append_operations({self.room.pk: ops[:20]}), 20)
+        append_operations({self.room.pk: ops[20:]})
+
+        expected = ''.join(str(index % 10) for index in range(35))
+        self.assertEqual(replay(self.room.pk)['content'], expected)
+        # One log row and at most one snapshot per 10 operations.
+        self.assertEqual(CodeOperationLog.objects.filter(room=self.room).count(), 4)
+        self.assertEqual(list(CodeSnapshot.objects.filter(room=self.room).values_list('seq', flat=True)),
+                         [30, 20, 10])
+
+        for count in (0, 1, 9, 10, 17, 35):
+            state = replay(self.room.pk, to_datetime(start + (count - 1) * 100 + 50) if count else to_datetime(start - 1))
+            self.assertEqual(state['content'], expected[:count])
+            self.assertEqual(state['seq'], count)
+            self.assertLess(state['replayed_ops'], 10)
+
+    def test_times_are_clamped_to_stay_ordered(self):
+        now = timezone.now()
+        append_operations({self.room.pk: [change(1, 1, 'a', to_ms(now) + 60_000)]}, now=now)
+        append_operations({self.room.pk: [change(1, 2, 'b', to_ms(now) - 60_000)]}, now=now + timedelta(seconds=1))
+        ats = [op['at'] for row in CodeOperationLog.objects.filter(room=self.room) for op in row.ops]
+        self.assertEqual(ats, [to_ms(now), to_ms(now)])
+
+    def test_buffer_flush_skips_closed_rooms(self):
+        closed = Room.objects.create(owner=self.room.owner, name='Closed', is_closed=True)
+        buffer = CodeOperationBuffer()
+        for room in (self.room, closed):
+            buffer.add(str(room.room_id), change(1, 1, 'x', to_ms(timezone.now())))
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(buffer.depth(), 0)
+        self.assertEqual(replay(self.room.pk)['content'], 'x')
+        self.assertEqual(replay(closed.pk)['seq'], 0)
+
+    def test_buffer_drops_a_failing_room_after_max_attempts(self):
+        broken = Room.objects.create(owner=self.room.owner, name='Broken')
+        buffer = CodeOperationBuffer(max_attempts=2)
+        now = to_ms(timezone.now())
+        # Not normalized: missing its text, so writing it raises.
+        buffer.add(str(broken.room_id), {'type': 'reset', 'at': now})
+        buffer.add(str(self.room.room_id), change(1, 1, 'x', now))
+
+        with self.assertLogs('code_sessions.buffer', 'WARNING'):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(replay(self.room.pk)['content'], 'x')
+        self.assertEqual(buffer.depth(), 1)
+
+        buffer.add(str(self.room.room_id), change(1, 2, 'y', now))
+        with self.assertLogs('code_sessions.buffer', 'ERROR'):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(replay(self.room.pk)['content'], 'xy')
+        self.assertEqual(buffer.depth(), 0)
+        self.assertEqual(replay(broken.pk)['seq'], 0)
+
+    def test_buffer_holds_at_most_max_queued_ops(self):
+        buffer = CodeOperationBuffer(max_queued=2)
+        for column in range(1, 4):
+            buffer.add(str(self.room.room_id), change(1, column, 'x', to_ms(timezone.now())))
+        self.assertEqual(buffer.depth(), 2)
+        with self.assertLogs('code_sessions.buffer', 'ERROR'):
+            self.assertEqual(buffer.flush(), 2)
+
+    def ingest(self, room, ops, **headers):
+        """headers are given as keyword arguments, e.g. X_Relay_Secret for X-Relay-Secret"""
+        return self.client.post(f'/code-sessions/{room.room_id}/operations/', {'ops': ops},
+                                content_type='application/json', HTTP_HOST='localhost', headers=headers)
+
+    def test_ingest_endpoint(self):
+        token, _ = issue_admission_token({'room_id': self.room.room_id}, 'host')
+        response = self.ingest(self.room, [{'type': 'reset', 'code': 'print(1)'}, {'type': 'bogus'}],
+                               Authorization=f'Bearer {token}')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'written': 1, 'skipped': 1})
+        self.assertEqual(replay(self.room.pk)['content'], 'print(1)')
+
+    @override_settings(CODE_SESSION_RELAY_SECRET='relay-secret')
+    def test_ingest_requires_relay_secret_or_admission(self):
+        ops = [{'type': 'reset', 'code': 'x'}]
+        self.assertEqual(self.ingest(self.room, ops).status_code, 403)
+        self.assertEqual(self.ingest(self.room, ops, X_Relay_Secret='wrong').status_code, 403)
+        other = Room.objects.create(owner=self.room.owner, name='Other')
+        token, _ = issue_admission_token({'room_id': other.room_id}, 'guest')
+        self.assertEqual(self.ingest(self.room, ops, Authorization=f'Bearer {token}').status_code, 403)
+        self.assertEqual(self.ingest(self.room, ops, X_Relay_Secret='relay-secret').status_code, 201)
+
+    def test_ingest_rejects_closed_rooms(self):
+        token, _ = issue_admission_token({'room_id': self.room.room_id}, 'host')
+        Room.objects.filter(pk=self.room.pk).update(is_closed=True, updated_at=timezone.now() + timedelta(seconds=1))
+        publish_revocations()
+        response = self.ingest(self.room, [{'type': 'reset', 'code': 'x'}], Authorization=f'Bearer {token}')
+        self.assertEqual(response.status_code, 403)
+        with override_settings(CODE_SESSION_RELAY_SECRET='relay-secret'):
+            response = self.ingest(self.room, [{'type': 'reset', 'code': 'x'}], X_Relay_Secret='relay-secret')
+        self.assertEqual(response.status_code, 404)
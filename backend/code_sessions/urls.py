@@ -0,0 +1,8 @@
+from django.urls import path
+
+from code_sessions.views import CodeOperationIngest, CodeSessionReplay
+
+urlpatterns = [
+    path('<uuid:room_id>/', CodeSessionReplay.as_view(), name='code-session-replay'),
+    path('<uuid:room_id>/operations/', CodeOperationIngest.as_view(), name='code-session-operations'),
+]
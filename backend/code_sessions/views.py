@@ -0,0 +1,88 @@
+import hmac
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from code_sessions.ops import normalize_op
+from code_sessions.serializers import (
+    CodeOperationBatchSerializer,
+    CodeReplayQuerySerializer,
+    CodeSessionStateSerializer,
+)
+from code_sessions.store import append_operations, replay, to_ms
+from interview_rooms.admission import AdmissionError, get_revocations, verify_admission_token
+from interview_rooms.models import Room
+
+
+# Create your views here.
+
+class RelayOrAdmitted(permissions.BasePermission):
+    """
+    Lets in relays presenting CODE_SESSION_RELAY_SECRET in X-Relay-Secret,
+    and clients with an admission token for the URL's room (Authorization:
+    Bearer) that has not been revoked by closing or deleting the room.
+    """
+
+    def has_permission(self, request, view):
+        secret = settings.CODE_SESSION_RELAY_SECRET
+        if secret and hmac.compare_digest(request.headers.get('X-Relay-Secret', '').encode(), secret.encode()):
+            return True
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme != 'Bearer':
+            return False
+        try:
+            verify_admission_token(token, view.kwargs['room_id'], get_revocations())
+        except AdmissionError:
+            return False
+        return True
+
+
+class CodeOperationIngest(APIView):
+    """
+    Appends a batch of editor operations for an open room, for relays that
+    buffer the editor's events (websocket/server.js). Malformed operations
+    are skipped and counted, as the relay passes on whatever clients sent.
+    Writers need the relay secret or an admission token (RelayOrAdmitted).
+    """
+    # The bearer token is an admission token, not a user's access token.
+    authentication_classes = []
+    permission_classes = [RelayOrAdmitted]
+
+    def post(self, request, room_id):
+        serializer = CodeOperationBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        room = Room.objects.filter(room_id=room_id, is_closed=False).values_list('id', flat=True).first()
+        if room is None:
+            return Response({'detail': 'No Room matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+
+        now = timezone.now()
+        ops = []
+        for data in serializer.validated_data['ops']:
+            try:
+                ops.append(normalize_op(data, to_ms(now)))
+            except ValueError:
+                continue
+        written = append_operations({room: ops}, now=now)
+        return Response({'written': written, 'skipped': len(serializer.validated_data['ops']) - written},
+                        status=status.HTTP_201_CREATED)
+
+
+class CodeSessionReplay(APIView):
+    """
+    The room's code as of ?at= (ISO 8601), rebuilt from the nearest earlier
+    snapshot and the operations after it; the latest code without it. For
+    the room's owner.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, room_id):
+        query = CodeReplayQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        room = Room.objects.filter(room_id=room_id, owner=request.user).values_list('id', flat=True).first()
+        if room is None:
+            return Response({'detail': 'No Room matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+        state = replay(room, query.validated_data.get('at'))
+        return Response(CodeSessionStateSerializer({'room_id': room_id, **state}).data, status=status.HTTP_200_OK)
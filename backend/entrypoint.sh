@@ -1,6 +1,26 @@
 #!/usr/bin/env bash
 set -e
 
+# ASGI serves the websockets (/updates/, /socket.io/) as well; WSGI does not.
+export SERVER_MODE=${SERVER_MODE:-asgi}
+# Every ASGI worker holds its own sockets, so several need a shared channel
+# layer, signaling presence and cache. Without them one worker is started,
+# and asking for more is an error.
+if [ "${CHANNEL_LAYER_BACKEND:-signaling.layers.LocalChannelLayer}" != "signaling.layers.LocalChannelLayer" ] &&
+   [ "${SIGNALING_STATE_BACKEND:-memory}" = "cache" ] &&
+   [ "${CACHE_BACKEND:-django.core.cache.backends.locmem.LocMemCache}" != "django.core.cache.backends.locmem.LocMemCache" ]; then
+  WORKERS=${GUNICORN_WORKERS:-3}
+elif [ "${SERVER_MODE}" = "asgi" ]; then
+  WORKERS=${GUNICORN_WORKERS:-1}
+  if [ "${WORKERS}" -gt 1 ]; then
+    echo "GUNICORN_WORKERS=${WORKERS} needs CHANNEL_LAYER_BACKEND=channels_redis.core.RedisChannelLayer" \
+         "with CHANNEL_LAYER_URL, SIGNALING_STATE_BACKEND=cache and a shared CACHE_BACKEND" >&2
+    exit 1
+  fi
+else
+  WORKERS=${GUNICORN_WORKERS:-3}
+fi
+
 # Wait for DB (simple wait; for production consider a robust wait-for-it)
 echo "Waiting for database..."
 python - <<'PY'
@@ -26,6 +46,12 @@ python manage.py migrate --noinput
 echo "Collecting static files..."
 python manage.py collectstatic --noinput || true
 
+if [ "${SERVER_MODE}" = "asgi" ]; then
+  ASGI_MODULE=${DJANGO_ASGI_MODULE:-backend.asgi}
+  echo "Starting gunicorn with uvicorn workers (${ASGI_MODULE})..."
+  exec gunicorn ${ASGI_MODULE}:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000 --workers ${WORKERS} --timeout 120
+fi
+
 WSGI_MODULE=${DJANGO_WSGI_MODULE:-backend.wsgi}
 echo "Starting gunicorn (${WSGI_MODULE})..."
-exec gunicorn ${WSGI_MODULE} --bind 0.0.0.0:8000 --workers 3 --timeout 120
+exec gunicorn ${WSGI_MODULE} --bind 0.0.0.0:8000 --workers ${WORKERS} --timeout 120
@@ -0,0 +1,162 @@
+"""
+Write-behind buffer for note autosaves.
+
+With settings.NOTE_WRITE_BEHIND enabled, InterviewNoteDetailAPIView.post
+acknowledges a save once the latest content for its (room_id, interviewer)
+pair is in this buffer. Saves for the same pair coalesce, so a burst of
+keystroke-rate autosaves becomes a single row in the next flush. A daemon
+thread flushes every NOTE_WRITE_BEHIND_INTERVAL seconds, or sooner once
+NOTE_WRITE_BEHIND_MAX_PENDING pairs are waiting, with one bulk upsert.
+
+Durability: an acknowledged save lives only in this process's memory until
+the next flush. A clean shutdown (SIGTERM handled by gunicorn/uvicorn, or a
+normal interpreter exit) flushes through an atexit hook; a hard kill or
+crash loses at most one interval of saves. A failed flush leaves its
+entries queued for the next one.
+
+Consistency: GET endpoints overlay buffered content, so reads served by the
+same process see their own writes. Entries stay buffered until their write
+has committed, and are then dropped unless a newer save replaced them.
+Pairs are keyed by the room's canonical id (see canonical_room_id). Other
+worker processes only see a save after it is flushed. Conditional saves,
+patches, and edits or deletes by note id flush the pair first and then go
+straight to the database.
+Live update events (live_updates.events) go out per flush, not per save.
+
+Metrics, from NoteWriteBuffer.stats():
+    depth               pairs waiting for the next flush
+    flushes             completed flushes
+    flushed_rows        rows written by all flushes
+    failed_flushes      flushes that raised, leaving their entries queued
+    last_flush_seconds  wall time of the most recent flush
+    max_flush_seconds   slowest flush so far
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from backend.write_behind import WriteBehindBuffer
+from live_updates.events import notes_updated
+
+from .models import InterviewNote, canonical_room_id
+
+
+@dataclass
+class PendingNote:
+    room_id: str
+    interviewer_id: int
+    content: str
+    interviewer_name: str | None
+    updated_at: datetime
+
+
+class NoteWriteBuffer(WriteBehindBuffer):
+    name = 'note-write-behind'
+
+    def __init__(self, interval=1.0, max_pending=5000):
+        super().__init__(interval)
+        self.max_pending = max_pending
+        self._pending = {}
+        self._stats = {
+            'flushes': 0,
+            'flushed_rows': 0,
+            'failed_flushes': 0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+        }
+
+    def add(self, room_id, interviewer_id, content, interviewer_name=None):
+        room_id = canonical_room_id(room_id)
+        entry = PendingNote(room_id, interviewer_id, content, interviewer_name, timezone.now())
+        with self._lock:
+            previous = self._pending.get((room_id, interviewer_id))
+            if interviewer_name is None and previous is not None:
+                entry.interviewer_name = previous.interviewer_name
+            self._pending[(room_id, interviewer_id)] = entry
+            depth = len(self._pending)
+        self._ensure_started()
+        if depth >= self.max_pending:
+            self.wake()
+        return entry
+
+    def get(self, room_id, interviewer_id):
+        with self._lock:
+            return self._pending.get((canonical_room_id(room_id), interviewer_id))
+
+    def for_interviewer(self, interviewer_id):
+        with self._lock:
+            return [entry for (_, owner), entry in self._pending.items() if owner == interviewer_id]
+
+    def overlay(self, note):
+        """Applies a buffered save, if any, on top of a note loaded from the database"""
+        entry = self.get(note.room_id, note.interviewer_id)
+        if entry is not None:
+            note.content = entry.content
+            note.updated_at = entry.updated_at
+            if entry.interviewer_name is not None:
+                note.interviewer_name = entry.interviewer_name
+        return note
+
+    def flush(self, keys=None):
+        """Writes pending saves, or only those for the given (room_id, interviewer_id) keys"""
+        with self._flush_lock:
+            with self._lock:
+                if keys is None:
+                    batch = dict(self._pending)
+                else:
+                    batch = {key: self._pending[key] for key in keys if key in self._pending}
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                written = self._write(batch)
+            except Exception:
+                self._stats['failed_flushes'] += 1
+                raise
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                for key, entry in batch.items():
+                    if self._pending.get(key) is entry:
+                        del self._pending[key]
+
+            self._stats['flushes'] += 1
+            self._stats['flushed_rows'] += written
+            self._stats['last_flush_seconds'] = elapsed
+            self._stats['max_flush_seconds'] = max(self._stats['max_flush_seconds'], elapsed)
+            return written
+
+    def flush_key(self, room_id, interviewer_id):
+        return self.flush(keys=[(canonical_room_id(room_id), interviewer_id)])
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        return {'depth': self.depth(), **self._stats}
+
+    def _write(self, batch):
+        named, unnamed = [], []
+        for entry in batch.values():
+            row = (entry.room_id, entry.interviewer_id, entry.interviewer_name or '',
+                   entry.content, entry.updated_at)
+            (unnamed if entry.interviewer_name is None else named).append(row)
+        with transaction.atomic():
+            written = (InterviewNote.objects.bulk_upsert(named, update_name=True)
+                       + InterviewNote.objects.bulk_upsert(unnamed, update_name=False))
+        # Only flushed saves are published, so each event carries the stored version.
+        notes_updated([(id, room_id, interviewer_id, version, len(batch[room_id, interviewer_id].content),
+                        batch[room_id, interviewer_id].updated_at)
+                       for id, room_id, interviewer_id, version in written])
+        return len(written)
+
+
+note_buffer = NoteWriteBuffer(
+    interval=settings.NOTE_WRITE_BEHIND_INTERVAL,
+    max_pending=settings.NOTE_WRITE_BEHIND_MAX_PENDING,
+)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_notes', '0005_alter_interviewnote_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewnote',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
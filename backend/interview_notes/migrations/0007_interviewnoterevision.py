@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_notes', '0006_interviewnote_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterviewNoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('ops', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='interview_notes.interviewnote')),
+            ],
+            options={
+                'ordering': ['-version'],
+                'constraints': [models.UniqueConstraint(fields=('note', 'version'), name='unique_note_revision_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:49
+
+import django.contrib.postgres.search
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 1000
+
+# Postgres only: other databases keep search_vector NULL and search through
+# the in-process index in interview_notes.search.
+CREATE_TRIGGER = """
+CREATE TRIGGER interviewnote_search_vector_update
+    BEFORE INSERT OR UPDATE OF content, interviewer_name ON interview_notes_interviewnote
+    FOR EACH ROW EXECUTE FUNCTION
+    tsvector_update_trigger(search_vector, 'pg_catalog.english', interviewer_name, content);
+"""
+# Rewriting content fires the trigger for the rows that predate it.
+BACKFILL_CHUNK = "UPDATE interview_notes_interviewnote SET content = content WHERE id >= %s AND id <= %s"
+CREATE_INDEX = """
+CREATE INDEX interviewnote_search_vector_gin ON interview_notes_interviewnote USING gin (search_vector);
+"""
+
+DROP_SEARCH = """
+DROP INDEX IF EXISTS interviewnote_search_vector_gin;
+DROP TRIGGER IF EXISTS interviewnote_search_vector_update ON interview_notes_interviewnote;
+"""
+
+
+def create_search(apps, schema_editor):
+    """
+    Installs the trigger, then fills search_vector for existing notes
+    CHUNK_SIZE rows at a time, each chunk in its own short transaction like
+    the 0011 backfill, and indexes the column once it is filled.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    InterviewNote = apps.get_model('interview_notes', 'InterviewNote')
+    db = schema_editor.connection.alias
+    schema_editor.execute(CREATE_TRIGGER)
+
+    last_id = 0
+    while True:
+        ids = list(
+            InterviewNote.objects.using(db)
+            .filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        with transaction.atomic(using=db):
+            schema_editor.execute(BACKFILL_CHUNK, params=[ids[0], ids[-1]])
+
+    schema_editor.execute(CREATE_INDEX)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('interview_notes', '0007_interviewnoterevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewnote',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search, drop_search),
+    ]
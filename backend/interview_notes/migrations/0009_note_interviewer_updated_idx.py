@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_notes', '0008_interviewnote_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interviewnote',
+            index=models.Index(fields=['interviewer', '-updated_at'], name='note_interviewer_updated_idx'),
+        ),
+    ]
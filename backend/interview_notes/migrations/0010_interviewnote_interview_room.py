@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_notes', '0009_note_interviewer_updated_idx'),
+        ('interview_rooms', '0004_room_owner_id_desc_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewnote',
+            name='interview_room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notes', to='interview_rooms.room'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+import uuid
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 1000
+
+
+def backfill_interview_room(apps, schema_editor):
+    """
+    Links existing notes to their rooms CHUNK_SIZE rows at a time, each
+    chunk in its own short transaction, so writers are never blocked for
+    longer than one chunk's UPDATE.
+    """
+    InterviewNote = apps.get_model('interview_notes', 'InterviewNote')
+    Room = apps.get_model('interview_rooms', 'Room')
+    db = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        chunk = list(
+            InterviewNote.objects.using(db)
+            .filter(id__gt=last_id, interview_room__isnull=True)
+            .order_by('id')
+            .values_list('id', 'room_id')[:CHUNK_SIZE]
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1][0]
+
+        uuids = {}
+        for note_id, room_id in chunk:
+            try:
+                uuids[note_id] = uuid.UUID(room_id)
+            except ValueError:
+                continue
+        rooms = dict(Room.objects.using(db).filter(room_id__in=set(uuids.values())).values_list('room_id', 'id'))
+        notes = [
+            InterviewNote(id=note_id, interview_room_id=rooms[room_uuid])
+            for note_id, room_uuid in uuids.items() if room_uuid in rooms
+        ]
+        with transaction.atomic(using=db):
+            InterviewNote.objects.using(db).bulk_update(notes, ['interview_room'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('interview_notes', '0010_interviewnote_interview_room'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_interview_room, migrations.RunPython.noop),
+    ]
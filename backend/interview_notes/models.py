@@ -1,19 +1,204 @@
+import uuid
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, router
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from interview_rooms.models import ArchivedRoom, Room
+
+
+class InterviewNoteManager(models.Manager):
+    # In model field order, which Model.from_db expects for partial rows.
+    RETURNING_FIELDS = ('id', 'room_id', 'interview_room', 'interviewer', 'interviewer_name', 'content',
+                        'created_at', 'updated_at', 'version')
+
+    def upsert(self, room_id, interviewer, content, interviewer_name=None, expected_version=None):
+        """
+        Inserts or updates the note for (room_id, interviewer) with a single
+        INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement.
+
+        When expected_version is given, an existing row is only overwritten
+        if its version still matches; otherwise nothing is written and None
+        is returned.
+        """
+        meta = self.model._meta
+        db = self._write_db()
+        connection = connections[db]
+        qn = connection.ops.quote_name
+        returning = [meta.get_field(name) for name in self.RETURNING_FIELDS]
+        sql, params = self._upsert_sql(
+            connection,
+            [(room_id, interviewer.pk, interviewer_name or '', content, timezone.now())],
+            update_name=interviewer_name is not None,
+        )
+        if expected_version is not None:
+            sql += f' WHERE {qn(meta.db_table)}.version = %s'
+            params.append(expected_version)
+        sql += f' RETURNING {", ".join(qn(field.column) for field in returning)}'
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+
+        values = [_from_db(connection, field, value) for field, value in zip(returning, row)]
+        return self.model.from_db(db, [field.attname for field in returning], values)
+
+    def bulk_upsert(self, rows, update_name=True):
+        """
+        Upserts many notes in one statement. rows are
+        (room_id, interviewer_id, interviewer_name, content, updated_at)
+        tuples with unique (room_id, interviewer_id) pairs. Returns the
+        (id, room_id, interviewer_id, version) of each row written.
+        """
+        if not rows:
+            return []
+        connection = connections[self._write_db()]
+        sql, params = self._upsert_sql(connection, rows, update_name=update_name)
+        sql += ' RETURNING id, room_id, interviewer_id, version'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _write_db(self):
+        return self._db or router.db_for_write(self.model)
+
+    def _upsert_sql(self, connection, rows, update_name):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        assignments = ['content = EXCLUDED.content', 'updated_at = EXCLUDED.updated_at',
+                       f'version = {table}.version + 1',
+                       'interview_room_id = EXCLUDED.interview_room_id']
+        if update_name:
+            assignments.append('interviewer_name = EXCLUDED.interviewer_name')
+
+        # interview_room_id is resolved from the room UUID inside the statement.
+        room_lookup = (f'(SELECT id FROM {connection.ops.quote_name(Room._meta.db_table)} '
+                       f'WHERE room_id = %s)')
+        params = []
+        for room_id, interviewer_id, interviewer_name, content, updated_at in rows:
+            updated_at = connection.ops.adapt_datetimefield_value(updated_at)
+            params += [room_id, interviewer_id, interviewer_name, content, updated_at, updated_at, 1,
+                       room_uuid_param(room_id, connection)]
+        values = ', '.join([f'(%s, %s, %s, %s, %s, %s, %s, {room_lookup})'] * len(rows))
+        sql = (
+            f'INSERT INTO {table} (room_id, interviewer_id, interviewer_name, content, '
+            f'created_at, updated_at, version, interview_room_id) VALUES {values} '
+            f'ON CONFLICT (room_id, interviewer_id) DO UPDATE SET {", ".join(assignments)}'
+        )
+        return sql, params
+
+
+def parse_room_uuid(room_id):
+    """Returns the UUID a note's room_id string names, or None for free-form ids"""
+    try:
+        return uuid.UUID(str(room_id))
+    except ValueError:
+        return None
+
+
+def canonical_room_id(room_id):
+    """The room_id a note is stored under: the canonical string of a UUID, other ids as given"""
+    value = parse_room_uuid(room_id)
+    return str(value) if value is not None else str(room_id)
+
+
+def room_uuid_param(room_id, connection):
+    value = parse_room_uuid(room_id)
+    if value is None:
+        return None
+    return Room._meta.get_field('room_id').get_db_prep_value(value, connection)
+
+
+def _from_db(connection, field, value):
+    expression = field.get_col(field.model._meta.db_table)
+    for converter in connection.ops.get_db_converters(expression) + expression.get_db_converters(connection):
+        value = converter(value, expression, connection)
+    return value
 
 
 class InterviewNote(models.Model):
+    # The room's UUID as text, which the note URLs are keyed on. Ids that
+    # are not a known room's UUID are accepted too; interview_room is the
+    # indexed integer link for those that are.
     room_id = models.CharField(max_length=255, db_index=True)
+    interview_room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='notes')
     interviewer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     interviewer_name = models.CharField(max_length=255, blank=True)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+    # Maintained by a Postgres trigger from interviewer_name and content on
+    # every write, raw upserts included; GIN-indexed by migration 0008.
+    # Stays NULL on other databases, which use interview_notes.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = InterviewNoteManager()
 
     class Meta:
         unique_together = ('room_id', 'interviewer')
+        indexes = [
+            models.Index(fields=['interviewer', '-updated_at'], name='note_interviewer_updated_idx'),
+        ]
+        ordering = ['-updated_at']
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        if self.interview_room_id is None:
+            room_uuid = parse_room_uuid(self.room_id)
+            if room_uuid is not None:
+                self.interview_room_id = Room.objects.filter(room_id=room_uuid).values_list('id', flat=True).first()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and self.interview_room_id is not None:
+                kwargs['update_fields'] = [*update_fields, 'interview_room']
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Notes for {self.candidate_name} - {self.room_id[:8]}"
+
+
+class InterviewNoteRevision(models.Model):
+    """
+    Delta that moved a note from version - 1 to version. Only patch saves
+    are recorded; full saves bump the version without a revision row.
+    """
+    note = models.ForeignKey(InterviewNote, on_delete=models.CASCADE, related_name='revisions')
+    version = models.PositiveIntegerField()
+    ops = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['note', 'version'], name='unique_note_revision_version')
+        ]
+        ordering = ['-version']
+
+    def __str__(self):
+        return f"Revision {self.version} of note {self.note_id}"
+
+
+class ArchivedInterviewNote(models.Model):
+    """
+    A note of an ArchivedRoom, keeping its original id and final content;
+    its room_id string is the room's UUID. Revision deltas are not archived.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    room = models.ForeignKey(ArchivedRoom, on_delete=models.CASCADE, related_name='notes')
+    interviewer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    interviewer_name = models.CharField(max_length=255, blank=True)
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
         ordering = ['-updated_at']
 
     def __str__(self):
-        return f"Notes for {self.candidate_name} - {self.room_id[:8]}"
\ No newline at end of file
+        return f"Archived note {self.id} for room {self.room_id}"
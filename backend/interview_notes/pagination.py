@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NoteCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the interviewer's notes, most recently edited
+    first, on the (interviewer, -updated_at) index.
+    """
+    ordering = '-updated_at'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 500
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
@@ -0,0 +1,15 @@
+def apply_ops(text, ops):
+    """
+    Applies splice operations to text, in order. Each op is a dict with a
+    code point offset `pos`, a number of characters to `delete` there and a
+    string to `insert` in their place. Offsets refer to the text as left by
+    the previous op. Raises ValueError if an op falls outside the text.
+    """
+    for op in ops:
+        pos = op['pos']
+        delete = op.get('delete', 0)
+        insert = op.get('insert', '')
+        if pos > len(text) or pos + delete > len(text):
+            raise ValueError(f"Operation at {pos} (delete {delete}) is outside a text of length {len(text)}")
+        text = text[:pos] + insert + text[pos + delete:]
+    return text
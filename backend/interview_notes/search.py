@@ -0,0 +1,169 @@
+"""
+Full-text search over an interviewer's notes.
+
+On Postgres the query runs against InterviewNote.search_vector (GIN index,
+kept current by a trigger) and ts_headline builds the snippets, so only the
+top `limit` rows are read back and no note body crosses the wire. Other
+databases, i.e. SQLite test and benchmark runs, go through NoteSearchIndex,
+an in-process inverted index built per interviewer on first use.
+
+Both return dicts with id, room_id, interviewer_name, updated_at, rank and
+snippet. Snippets are HTML-escaped with matches wrapped in <mark>.
+Autosaves still waiting in the write-behind buffer are not searchable until
+they are flushed.
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Count, F, Max
+from django.utils.html import escape
+
+from .models import InterviewNote
+
+SEARCH_CONFIG = 'english'
+RESULT_FIELDS = ('id', 'room_id', 'interviewer_name', 'updated_at')
+SNIPPET_WORDS = 30
+# Control characters that cannot appear in escaped text, swapped for <mark>
+# tags once the snippet has been escaped.
+MARK_START, MARK_STOP = '\x02', '\x03'
+
+WORD_RE = re.compile(r'\w+')
+
+
+def search_notes(user, query, limit=20):
+    if connection.vendor == 'postgresql':
+        return _search_postgres(user, query, limit)
+    return note_index.search(user.pk, query, limit)
+
+
+def _search_postgres(user, query, limit):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    rows = (
+        InterviewNote.objects
+        .filter(interviewer=user, search_vector=search_query)
+        .annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            snippet=SearchHeadline(
+                'content', search_query, config=SEARCH_CONFIG,
+                start_sel=MARK_START, stop_sel=MARK_STOP,
+                max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2, max_fragments=2,
+            ),
+        )
+        .order_by('-rank', '-updated_at')
+        .values(*RESULT_FIELDS, 'rank', 'snippet')[:limit]
+    )
+    return [{**row, 'snippet': mark(row['snippet'])} for row in rows]
+
+
+def mark(snippet):
+    return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_STOP, '</mark>')
+
+
+def tokenize(text):
+    return [word.lower() for word in WORD_RE.findall(text)]
+
+
+class NoteSearchIndex:
+    """
+    Pure-Python inverted index, one per interviewer: term -> {note id: term
+    frequency}. Before each search one aggregate query compares the row
+    count, latest updated_at and highest id with what was indexed; newer
+    notes are added incrementally, and if the index then holds more notes
+    than the table, the ids that no longer exist are pruned. Ranking is tf-idf normalised by note length, and every query term
+    must match, like websearch_to_tsquery without operators.
+    """
+
+    def __init__(self):
+        self._interviewers = {}
+        self._lock = threading.Lock()
+
+    def search(self, interviewer_id, query, limit=20):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            index = self._refresh(interviewer_id)
+            postings = [index['postings'].get(term, {}) for term in terms]
+            matches = set.intersection(*(set(posting) for posting in postings))
+            total = len(index['notes'])
+            scored = []
+            for note_id in matches:
+                note = index['notes'][note_id]
+                score = sum(
+                    posting[note_id] * math.log(1 + total / len(posting)) for posting in postings
+                ) / math.log(2 + note['length'])
+                scored.append((score, note['updated_at'], note_id))
+            scored.sort(reverse=True)
+            return [
+                {
+                    **{field: index['notes'][note_id][field] for field in RESULT_FIELDS},
+                    'rank': round(score, 6),
+                    'snippet': self.snippet(index['notes'][note_id]['content'], terms),
+                }
+                for score, _, note_id in scored[:limit]
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._interviewers.clear()
+
+    def _refresh(self, interviewer_id):
+        notes = InterviewNote.objects.filter(interviewer_id=interviewer_id)
+        state = notes.aggregate(count=Count('id'), latest=Max('updated_at'), max_id=Max('id'))
+        index = self._interviewers.get(interviewer_id)
+        if index is not None and index['state'] == state:
+            return index
+
+        if index is None or index['state']['latest'] is None:
+            index = self._interviewers[interviewer_id] = {'postings': {}, 'notes': {}}
+        else:
+            notes = notes.filter(updated_at__gt=index['state']['latest'])
+        for note in notes.values(*RESULT_FIELDS, 'content'):
+            self._add(index, note)
+        if len(index['notes']) > state['count']:
+            existing = set(InterviewNote.objects.filter(interviewer_id=interviewer_id).values_list('id', flat=True))
+            for note_id in index['notes'].keys() - existing:
+                self._remove(index, note_id)
+        index['state'] = state
+        if len(index['notes']) != state['count']:
+            # A write landed between the aggregate and the fetch; rebuild next time.
+            index['state'] = {**state, 'latest': None}
+        return index
+
+    def _add(self, index, note):
+        self._remove(index, note['id'])
+        tokens = tokenize(f"{note['interviewer_name']} {note['content']}")
+        counts = Counter(tokens)
+        for term, frequency in counts.items():
+            index['postings'].setdefault(term, {})[note['id']] = frequency
+        index['notes'][note['id']] = {**note, 'terms': list(counts), 'length': len(tokens)}
+
+    @staticmethod
+    def _remove(index, note_id):
+        previous = index['notes'].pop(note_id, None)
+        if previous is not None:
+            for term in previous['terms']:
+                index['postings'][term].pop(note_id, None)
+
+    @staticmethod
+    def snippet(content, terms):
+        words = list(WORD_RE.finditer(content))
+        wanted = set(terms)
+        first = next((i for i, word in enumerate(words) if word.group().lower() in wanted), 0)
+        window = words[max(0, first - SNIPPET_WORDS // 3):][:SNIPPET_WORDS]
+        if not window:
+            return ''
+        parts, cursor = [], window[0].start()
+        for word in window:
+            parts.append(escape(content[cursor:word.start()]))
+            text = escape(word.group())
+            parts.append(f'<mark>{text}</mark>' if word.group().lower() in wanted else text)
+            cursor = word.end()
+        return ''.join(parts)
+
+
+note_index = NoteSearchIndex()
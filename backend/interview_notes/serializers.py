@@ -1,11 +1,87 @@
 from rest_framework import serializers
-from .models import InterviewNote
+
+from interview_rooms.serializers import InterviewRoomSerializer
+from .models import ArchivedInterviewNote, InterviewNote
 
 class InterviewNoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = InterviewNote
         fields = ['id', 'room_id', 'interviewer', 'interviewer_name',
-                 'content', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+                 'content', 'created_at', 'updated_at', 'version']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'version']
+
+
+class InterviewNoteSummarySerializer(serializers.Serializer):
+    """List entry without the note body; fetch the body from the room's note endpoint"""
+    id = serializers.IntegerField(allow_null=True)
+    room_id = serializers.CharField()
+    interviewer_name = serializers.CharField()
+    updated_at = serializers.DateTimeField()
+    content_length = serializers.IntegerField()
+    preview = serializers.CharField()
+
+
+class NoteListQuerySerializer(serializers.Serializer):
+    summary = serializers.BooleanField(default=False)
+
+
+class InterviewNoteUpsertSerializer(serializers.Serializer):
+    content = serializers.CharField()
+    interviewer_name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    version = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        room_id = self.context.get('room_id', '')
+        if len(room_id) > InterviewNote._meta.get_field('room_id').max_length:
+            raise serializers.ValidationError({'room_id': 'Ensure this field has no more than 255 characters.'})
+        return attrs
+
+
+class NotePatchOpSerializer(serializers.Serializer):
+    pos = serializers.IntegerField(min_value=0)
+    delete = serializers.IntegerField(min_value=0, default=0)
+    insert = serializers.CharField(allow_blank=True, trim_whitespace=False, default='')
+
+
+class InterviewNotePatchSerializer(serializers.Serializer):
+    base_version = serializers.IntegerField(min_value=0)
+    ops = NotePatchOpSerializer(many=True, allow_empty=False)
+
+
+class NoteSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class NoteMetadataSerializer(serializers.ModelSerializer):
+    content_length = serializers.IntegerField()
+
+    class Meta:
+        model = InterviewNote
+        fields = ['id', 'room_id', 'interviewer_name', 'created_at', 'updated_at', 'version', 'content_length']
+
+
+class ArchivedInterviewNoteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedInterviewNote
+        fields = ['id', 'interviewer', 'interviewer_name', 'content', 'created_at', 'updated_at',
+                  'version', 'archived_at']
+
+
+class InterviewerArchivedNoteSerializer(ArchivedInterviewNoteSerializer):
+    """An archived note with the room it belongs to, for its interviewer"""
+    room_id = serializers.UUIDField(source='room.room_id')
+    room_name = serializers.CharField(source='room.name')
+
+    class Meta(ArchivedInterviewNoteSerializer.Meta):
+        fields = ['room_id', 'room_name', *ArchivedInterviewNoteSerializer.Meta.fields]
+
+
+class RoomWithNoteSerializer(serializers.Serializer):
+    """A note's room joined through interview_room, with the note's metadata but not its body"""
+    room = InterviewRoomSerializer(source='interview_room')
+    note = NoteMetadataSerializer(source='*')
 
 
+class NoteRoomsQuerySerializer(serializers.Serializer):
+    is_closed = serializers.BooleanField(required=False, allow_null=True, default=None)
@@ -1,3 +1,259 @@
-from django.test import TestCase
+import importlib
+import uuid
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.db import connection
+from django.db.models.functions import Length, Substr
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from interview_notes.buffer import NoteWriteBuffer
+from interview_notes.models import InterviewNote
+from interview_notes.search import NoteSearchIndex, note_index
+from interview_rooms.models import Room
+from backend.async_views import served_view
+from interview_notes.serializers import InterviewNoteSerializer, InterviewNoteSummarySerializer
+from interview_notes.views import (
+    NOTE_SUMMARY_VALUES,
+    NOTE_VALUES,
+    AsyncInterviewNoteDetailAPIView,
+    InterviewNoteDetailAPIView,
+)
+from user.models import User
+from user.tokens import UserRefreshToken
+
+
+class NoteValuesSerializerContractTests(TestCase):
+    """The .values() fast path must render exactly what the serializers render"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = User.objects.create_user(email='notes@example.com', password='pw123456', full_name='N')
+        InterviewNote.objects.create(room_id='room-a', interviewer=cls.interviewer, content='Plain note')
+        InterviewNote.objects.create(room_id='room-b', interviewer=cls.interviewer, interviewer_name='Zoë',
+                                     content='Unicode – “quotes”\n\tand whitespace ' * 20)
+        note = InterviewNote.objects.create(room_id='room-c', interviewer=cls.interviewer, content='')
+        note.content = 'edited'
+        note.save()
+
+    def assertSameJSON(self, expected, actual):
+        self.assertEqual(JSONRenderer().render(expected), JSONRenderer().render(actual))
+
+    def test_note_list_matches_model_serializer(self):
+        notes = InterviewNote.objects.filter(interviewer=self.interviewer)
+        self.assertSameJSON(InterviewNoteSerializer(notes, many=True).data, NOTE_VALUES.many(NOTE_VALUES.values(notes)))
+
+    def test_summary_list_matches_serializer(self):
+        notes = InterviewNote.objects.filter(interviewer=self.interviewer).annotate(
+            content_length=Length('content'), preview=Substr('content', 1, 200))
+        self.assertSameJSON(
+            InterviewNoteSummarySerializer(notes, many=True).data,
+            NOTE_SUMMARY_VALUES.many(NOTE_SUMMARY_VALUES.values(notes)),
+        )
+
+    def test_list_endpoint_matches_model_serializer(self):
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.interviewer).access_token)
+        response = self.client.get('/interview-notes/user-notes/', HTTP_HOST='localhost')
+        notes = InterviewNote.objects.filter(interviewer=self.interviewer)
+        self.assertEqual(response.content, JSONRenderer().render(InterviewNoteSerializer(notes, many=True).data))
+
+
+class NoteWriteBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = User.objects.create_user(email='buffer@example.com', password='pw123456', full_name='B')
+
+    def setUp(self):
+        self.buffer = NoteWriteBuffer(interval=3600)
+        self.room_id = uuid.uuid4()
+
+    def test_entries_stay_readable_until_written(self):
+        self.buffer.add(str(self.room_id), self.interviewer.pk, 'first')
+        write = self.buffer._write
+        seen = []
+
+        def write_and_save_again(batch):
+            seen.append(self.buffer.get(self.room_id, self.interviewer.pk).content)
+            written = write(batch)
+            self.buffer.add(str(self.room_id), self.interviewer.pk, 'second')
+            return written
+
+        with mock.patch.object(self.buffer, '_write', write_and_save_again):
+            self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(seen, ['first'])
+        # The save that arrived during the write is still queued.
+        self.assertEqual(self.buffer.get(self.room_id, self.interviewer.pk).content, 'second')
+        self.buffer.flush()
+        self.assertIsNone(self.buffer.get(self.room_id, self.interviewer.pk))
+        self.assertEqual(InterviewNote.objects.get(interviewer=self.interviewer).content, 'second')
+
+    def test_failed_flush_keeps_entries(self):
+        self.buffer.add(str(self.room_id), self.interviewer.pk, 'kept')
+        with mock.patch.object(self.buffer, '_write', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.buffer.flush()
+        self.assertEqual(self.buffer.stats()['depth'], 1)
+        self.assertEqual(self.buffer.get(self.room_id, self.interviewer.pk).content, 'kept')
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_keys_use_the_canonical_room_id(self):
+        self.buffer.add(str(self.room_id).upper(), self.interviewer.pk, 'upper')
+        self.assertEqual(self.buffer.get(self.room_id.hex, self.interviewer.pk).content, 'upper')
+        self.assertEqual(self.buffer.flush_key(self.room_id, self.interviewer.pk), 1)
+        self.assertEqual(InterviewNote.objects.get(interviewer=self.interviewer).room_id, str(self.room_id))
+
+
+async def resolve(awaitable):
+    return await awaitable
+
+
+class NoteDetailServingTests(TestCase):
+    """The sync (WSGI) and async (ASGI) forms of the detail view answer alike"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = User.objects.create_user(email='detail@example.com', password='pw123456', full_name='D')
+
+    def call(self, view, method, room_id, data=None, **headers):
+        request = getattr(RequestFactory(), method)(f'/interview-notes/{room_id}/', data,
+                                                    content_type='application/json', **headers)
+        request.COOKIES['access_token'] = str(UserRefreshToken.for_user(self.interviewer).access_token)
+        response = view.as_view()(request, room_id=room_id)
+        if view.view_is_async:
+            response = async_to_sync(resolve)(response)
+        response.render()
+        return response.status_code, response.data
+
+    def test_sync_and_async_forms_match(self):
+        results = []
+        for view in (InterviewNoteDetailAPIView, AsyncInterviewNoteDetailAPIView):
+            room_id = str(uuid.uuid4())
+            steps = [
+                self.call(view, 'get', room_id),
+                self.call(view, 'post', room_id, {'content': 'abc'}),
+                self.call(view, 'patch', room_id, {'base_version': 1, 'ops': [{'pos': 3, 'insert': 'd'}]}),
+                self.call(view, 'post', room_id, {'content': 'stale'}, HTTP_IF_MATCH='"1"'),
+                self.call(view, 'get', room_id),
+            ]
+            results.append([(code, data.get('content', data.get('version', data.get('detail'))))
+                            for code, data in steps])
+        self.assertEqual(results[0], [(404, 'No notes found for this room'), (200, 'abc'), (200, 2), (409, 2),
+                                      (200, 'abcd')])
+        self.assertEqual(results[0], results[1])
+
+    def test_served_form_follows_server_mode(self):
+        for mode, view in (('wsgi', InterviewNoteDetailAPIView), ('asgi', AsyncInterviewNoteDetailAPIView)):
+            with override_settings(SERVER_MODE=mode):
+                self.assertIs(served_view(InterviewNoteDetailAPIView, AsyncInterviewNoteDetailAPIView).view_class,
+                              view)
+
+
+class NoteSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = User.objects.create_user(email='search@example.com', password='pw123456', full_name='S')
+        cls.other = User.objects.create_user(email='other@example.com', password='pw123456', full_name='O')
+        cls.hashing = InterviewNote.objects.create(
+            room_id='room-a', interviewer=cls.interviewer, interviewer_name='Ada',
+            content='Explained consistent hashing <well>; hashing again for the ring.')
+        cls.design = InterviewNote.objects.create(
+            room_id='room-b', interviewer=cls.interviewer, content='System design: caching and hashing trade-offs')
+        InterviewNote.objects.create(room_id='room-c', interviewer=cls.other, content='hashing from someone else')
+
+    def setUp(self):
+        note_index.clear()
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.interviewer).access_token)
+
+    def search(self, **params):
+        return self.client.get('/interview-notes/search/', params, HTTP_HOST='localhost')
+
+    def test_endpoint_ranks_the_users_matches_with_escaped_snippets(self):
+        response = self.search(q='hashing')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result['id'] for result in results], [self.hashing.id, self.design.id])
+        self.assertEqual(set(results[0]), {'id', 'room_id', 'interviewer_name', 'updated_at', 'rank', 'snippet'})
+        self.assertIn('<mark>hashing</mark>', results[0]['snippet'])
+        self.assertIn('&lt;well&gt;', results[0]['snippet'])
+
+        # Every term must match; the interviewer name is searchable too.
+        self.assertEqual([result['id'] for result in self.search(q='caching hashing').json()], [self.design.id])
+        self.assertEqual([result['id'] for result in self.search(q='ada').json()], [self.hashing.id])
+        self.assertEqual(len(self.search(q='hashing', limit=1).json()), 1)
+        self.assertEqual(self.search(q='').status_code, 400)
+
+    def test_fallback_index_follows_writes_and_deletes(self):
+        index = NoteSearchIndex()
+        self.assertEqual([result['id'] for result in index.search(self.interviewer.pk, 'ring')], [self.hashing.id])
+
+        # Newer notes are added without a rebuild, edits replace old terms.
+        added = InterviewNote.objects.create(room_id='room-d', interviewer=self.interviewer, content='ring buffer')
+        self.hashing.content = 'Rewritten without the word'
+        self.hashing.save()
+        with self.assertNumQueries(2):
+            self.assertEqual([result['id'] for result in index.search(self.interviewer.pk, 'ring')], [added.id])
+        with self.assertNumQueries(1):
+            index.search(self.interviewer.pk, 'ring')
+
+        # Deleted notes are pruned, even when a new note keeps the row count.
+        added.delete()
+        self.assertEqual(index.search(self.interviewer.pk, 'ring'), [])
+        self.assertEqual(index.search(self.interviewer.pk, '!!'), [])
+        self.hashing.delete()
+        replacement = InterviewNote.objects.create(room_id='room-e', interviewer=self.interviewer,
+                                                   content='Rewritten ring')
+        self.assertEqual([result['id'] for result in index.search(self.interviewer.pk, 'rewritten')],
+                         [replacement.id])
+
+
+class NoteRoomsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.interviewer = User.objects.create_user(email='rooms@example.com', password='pw123456', full_name='R')
+        cls.open_room = Room.objects.create(owner=cls.interviewer, name='Open')
+        cls.closed_room = Room.objects.create(owner=cls.interviewer, name='Closed', is_closed=True)
+        cls.open_note = InterviewNote.objects.create(room_id=str(cls.open_room.room_id), interviewer=cls.interviewer,
+                                                     content='open notes')
+        # Written through the raw upsert, which resolves the room in SQL.
+        cls.closed_note = InterviewNote.objects.upsert(str(cls.closed_room.room_id).upper(), cls.interviewer,
+                                                       'closed')
+        InterviewNote.objects.create(room_id='not-a-room', interviewer=cls.interviewer, content='orphan')
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.interviewer).access_token)
+
+    def get(self, path='', **params):
+        return self.client.get(f'/interview-notes/rooms/{path}', params, HTTP_HOST='localhost')
+
+    def test_lists_rooms_with_note_metadata_in_one_query(self):
+        self.assertEqual(self.closed_note.interview_room_id, self.closed_room.id)
+        # One query for the user, one for the joined notes.
+        with self.assertNumQueries(2):
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        rows = {row['room']['id']: row for row in response.json()}
+        self.assertEqual(set(rows), {self.open_room.id, self.closed_room.id})
+        self.assertEqual(rows[self.open_room.id]['note']['id'], self.open_note.id)
+        self.assertEqual(rows[self.open_room.id]['note']['content_length'], len('open notes'))
+        self.assertNotIn('content', rows[self.open_room.id]['note'])
+
+        self.assertEqual([row['room']['id'] for row in self.get(is_closed='true').json()], [self.closed_room.id])
+        self.assertEqual([row['room']['id'] for row in self.get(is_closed='false').json()], [self.open_room.id])
+
+    def test_single_room_by_uuid(self):
+        response = self.get(f'{self.closed_room.room_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['room']['name'], 'Closed')
+        self.assertEqual(response.json()['note']['content_length'], len('closed'))
+        self.assertEqual(self.get(f'{uuid.uuid4()}/').status_code, 404)
+
+    def test_backfill_links_existing_notes_in_chunks(self):
+        backfill = importlib.import_module('interview_notes.migrations.0011_backfill_interview_room')
+        InterviewNote.objects.update(interview_room=None)
+
+        with mock.patch.object(backfill, 'CHUNK_SIZE', 1):
+            backfill.backfill_interview_room(apps, SimpleNamespace(connection=connection))
+        links = dict(InterviewNote.objects.values_list('content', 'interview_room_id'))
+        self.assertEqual(links, {'open notes': self.open_room.id, 'closed': self.closed_room.id, 'orphan': None})
@@ -1,19 +1,28 @@
 from django.urls import path
 
+from backend.async_views import served_view
 from interview_notes.views import InterviewNoteDetailAPIView, InterviewNoteListAPIView, InterviewNoteCreateAPIView, \
-    InterviewNoteUpdateAPIView
+    InterviewNoteUpdateAPIView, InterviewNoteSearchAPIView, InterviewNoteRoomsAPIView, AsyncInterviewNoteDetailAPIView
 
 urlpatterns = [
-    # Main endpoint for room-specific notes (what the frontend uses)
-    path('<str:room_id>/',
-         InterviewNoteDetailAPIView.as_view(),
-         name='interview-notes-detail'),
-
     # List all notes for current user
     path('user-notes/',
          InterviewNoteListAPIView.as_view(),
          name='interview-notes-list'),
 
+    # Full-text search over the current user's notes (?q=...&limit=...)
+    path('search/',
+         InterviewNoteSearchAPIView.as_view(),
+         name='interview-notes-search'),
+
+    # Rooms the current user has notes for, with note metadata (?is_closed=...)
+    path('rooms/',
+         InterviewNoteRoomsAPIView.as_view(),
+         name='interview-notes-rooms'),
+    path('rooms/<uuid:room_id>/',
+         InterviewNoteRoomsAPIView.as_view(),
+         name='interview-notes-room'),
+
     # Create new note
     path('create/',
          InterviewNoteCreateAPIView.as_view(),
@@ -23,4 +32,10 @@ urlpatterns = [
     path('note/<uuid:room_id>/',
          InterviewNoteUpdateAPIView.as_view(),
          name='interview-notes-update'),
-]
\ No newline at end of file
+
+    # Main endpoint for room-specific notes (what the frontend uses).
+    # Kept last so its catch-all <str:room_id> does not shadow the routes above.
+    path('<str:room_id>/',
+         served_view(InterviewNoteDetailAPIView, AsyncInterviewNoteDetailAPIView),
+         name='interview-notes-detail'),
+]
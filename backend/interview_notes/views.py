@@ -2,9 +2,57 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Length, Substr
 from django.shortcuts import get_object_or_404
-from .models import InterviewNote
-from .serializers import InterviewNoteSerializer
+from backend.async_views import AsyncAPIView
+from backend.fast_serializers import ValuesSerializer
+from backend.metrics import timing
+from live_updates.events import note_updated
+from .buffer import note_buffer
+from .models import InterviewNote, InterviewNoteRevision, canonical_room_id
+from .pagination import NoteCursorPagination
+from .patches import apply_ops
+from .search import search_notes
+from .serializers import (
+    InterviewNoteSerializer,
+    InterviewNoteSummarySerializer,
+    InterviewNoteUpsertSerializer,
+    InterviewNotePatchSerializer,
+    NoteListQuerySerializer,
+    NoteRoomsQuerySerializer,
+    NoteSearchQuerySerializer,
+    RoomWithNoteSerializer,
+)
+
+
+NOTE_VALUES = ValuesSerializer(InterviewNoteSerializer())
+NOTE_SUMMARY_VALUES = ValuesSerializer(InterviewNoteSummarySerializer())
+
+
+def parse_if_match(request):
+    """Returns the note version from an If-Match header such as '"3"', or None"""
+    value = request.headers.get('If-Match', '').strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    value = value.strip('"')
+    return int(value) if value.isdigit() else None
+
+
+def flush_buffered_note(room_id, user):
+    """Writes a buffered autosave through before a path that reads or writes the row directly"""
+    if settings.NOTE_WRITE_BEHIND:
+        note_buffer.flush_key(room_id, user.pk)
+
+
+def upsert_note(**kwargs):
+    """InterviewNote.objects.upsert() that also publishes the saved note, as post_save would"""
+    note = InterviewNote.objects.upsert(**kwargs)
+    if note is not None:
+        note_updated(note)
+    return note
 
 
 class InterviewNoteDetailAPIView(APIView):
@@ -15,54 +63,285 @@ class InterviewNoteDetailAPIView(APIView):
 
     def get(self, request, room_id):
         """Get notes for a specific room"""
+        room_id = canonical_room_id(room_id)
         try:
-            note = InterviewNote.objects.get(
-                room_id=room_id,
-                interviewer=request.user
-            )
-            serializer = InterviewNoteSerializer(note)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            note = InterviewNote.objects.get(room_id=room_id, interviewer=request.user)
         except InterviewNote.DoesNotExist:
+            note = None
+        return self.note_response(note, room_id, request.user)
+
+    def post(self, request, room_id):
+        """Create or update notes for a specific room in a single upsert"""
+        room_id = canonical_room_id(room_id)
+        response, data, expected_version = self.accept_save(request, room_id)
+        return response or self.save_note(room_id, request.user, data, expected_version)
+
+    def patch(self, request, room_id):
+        """Apply text edits against a known version instead of resending the whole note"""
+        serializer = InterviewNotePatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return self.apply_patch(room_id, request.user, serializer.validated_data)
+
+    def note_response(self, note, room_id, user):
+        pending = note_buffer.get(room_id, user.pk) if settings.NOTE_WRITE_BEHIND else None
+        if note is None and pending is not None:
+            note = InterviewNote(room_id=room_id, interviewer=user, created_at=pending.updated_at)
+        if note is None:
             return Response(
                 {'detail': 'No notes found for this room'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if pending is not None:
+            note_buffer.overlay(note)
 
-    def post(self, request, room_id):
-        """Create or update notes for a specific room"""
-        try:
-            # Try to get existing note
-            note = InterviewNote.objects.get(
-                room_id=room_id,
-                interviewer=request.user
+        serializer = InterviewNoteSerializer(note)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def accept_save(self, request, room_id):
+        """
+        Validates a save. Returns (response, None, None) when it is answered
+        without a database write (invalid, or buffered by write-behind), else
+        (None, validated data, expected version).
+        """
+        serializer = InterviewNoteUpsertSerializer(data=request.data, context={'room_id': room_id})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST), None, None
+
+        data = serializer.validated_data
+        expected_version = parse_if_match(request)
+        if expected_version is None:
+            expected_version = data.get('version')
+
+        if settings.NOTE_WRITE_BEHIND and expected_version is None:
+            pending = note_buffer.add(room_id, request.user.pk, data['content'], data.get('interviewer_name'))
+            return Response(
+                {'room_id': room_id, 'interviewer': request.user.pk, 'updated_at': pending.updated_at},
+                status=status.HTTP_202_ACCEPTED
+            ), None, None
+        return None, data, expected_version
+
+    def save_note(self, room_id, user, data, expected_version):
+        # Conditional saves compare against the stored version.
+        flush_buffered_note(room_id, user)
+        note = upsert_note(
+            room_id=room_id,
+            interviewer=user,
+            content=data['content'],
+            interviewer_name=data.get('interviewer_name'),
+            expected_version=expected_version,
+        )
+        if note is None:
+            current = InterviewNote.objects.filter(
+                room_id=room_id, interviewer=user
+            ).values_list('version', flat=True).first()
+            return Response(
+                {'detail': 'Note was modified by another save', 'version': current},
+                status=status.HTTP_409_CONFLICT
             )
-            # Update existing note
-            serializer = InterviewNoteSerializer(note, data=request.data, partial=True)
+
+        response = Response(InterviewNoteSerializer(note).data, status=status.HTTP_200_OK)
+        response['ETag'] = f'"{note.version}"'
+        return response
+
+    def apply_patch(self, room_id, user, data):
+        room_id = canonical_room_id(room_id)
+        flush_buffered_note(room_id, user)
+        with transaction.atomic():
+            note = InterviewNote.objects.select_for_update().filter(
+                room_id=room_id,
+                interviewer=user
+            ).first()
+            if note is None:
+                return Response({'detail': 'No notes found for this room'}, status=status.HTTP_404_NOT_FOUND)
+            if note.version != data['base_version']:
+                return Response(
+                    {'detail': 'Base version is stale', 'version': note.version},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            try:
+                note.content = apply_ops(note.content, data['ops'])
+            except ValueError as e:
+                return Response({'ops': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+            note.save(update_fields=['content', 'updated_at', 'version'])
+            InterviewNoteRevision.objects.create(note=note, version=note.version, ops=data['ops'])
+
+        response = Response({
+            'id': note.id,
+            'version': note.version,
+            'length': len(note.content),
+            'updated_at': note.updated_at,
+        }, status=status.HTTP_200_OK)
+        response['ETag'] = f'"{note.version}"'
+        return response
+
+
+class AsyncInterviewNoteDetailAPIView(AsyncAPIView, InterviewNoteDetailAPIView):
+    """
+    InterviewNoteDetailAPIView as served under ASGI. Reads use the async ORM;
+    writes need a raw cursor or a transaction, which the async ORM lacks, so
+    each runs in one thread hop.
+    """
+
+    async def get(self, request, room_id):
+        room_id = canonical_room_id(room_id)
+        try:
+            note = await InterviewNote.objects.aget(room_id=room_id, interviewer=request.user)
         except InterviewNote.DoesNotExist:
-            # Create new note
-            data = request.data.copy()
-            data['room_id'] = room_id
-            data['interviewer'] = request.user.id
-            serializer = InterviewNoteSerializer(data=data)
+            note = None
+        return self.note_response(note, room_id, request.user)
 
-        if serializer.is_valid():
-            serializer.save(interviewer=request.user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+    async def post(self, request, room_id):
+        room_id = canonical_room_id(room_id)
+        response, data, expected_version = self.accept_save(request, room_id)
+        return response or await sync_to_async(self.save_note)(room_id, request.user, data, expected_version)
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    async def patch(self, request, room_id):
+        serializer = InterviewNotePatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return await sync_to_async(self.apply_patch)(room_id, request.user, serializer.validated_data)
 
 
 class InterviewNoteListAPIView(APIView):
     """
-    List all interview notes for the current user
+    List all interview notes for the current user.
+
+    ?summary=true lists notes without their bodies: content length and a
+    preview cut in SQL instead. ?cursor=/?limit= page through the list, most
+    recently edited first.
     """
     permission_classes = [IsAuthenticated]
+    preview_length = 200
 
     def get(self, request):
         """Get all notes for current user"""
+        query = NoteListQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        summary = query.validated_data['summary']
+
         notes = InterviewNote.objects.filter(interviewer=request.user)
-        serializer = InterviewNoteSerializer(notes, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if summary:
+            notes = notes.annotate(
+                content_length=Length('content'),
+                preview=Substr('content', 1, self.preview_length),
+            )
+        serializer = NOTE_SUMMARY_VALUES if summary else NOTE_VALUES
+        notes = serializer.values(notes)
+
+        paginator = NoteCursorPagination()
+        paginated = paginator.is_requested(request)
+        if paginated:
+            notes = paginator.paginate_queryset(notes, request, view=self)
+        if settings.NOTE_WRITE_BEHIND:
+            # Pages only pick up buffered content for the notes they contain.
+            notes = self.overlay_buffered(list(notes), request.user, summary, append=not paginated)
+
+        with timing('serializer'):
+            data = serializer.many(notes)
+        if paginated:
+            return paginator.get_paginated_response(data)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def overlay_buffered(self, rows, user, summary, append=True):
+        """Applies buffered autosaves to .values() rows"""
+        pending = {entry.room_id: entry for entry in note_buffer.for_interviewer(user.pk)}
+        if not pending:
+            return rows
+        for row in rows:
+            entry = pending.get(row['room_id'])
+            if entry is not None:
+                self.overlay(row, entry, summary)
+        if not append:
+            return rows
+
+        stored = {row['room_id'] for row in rows}
+        for room_id, entry in pending.items():
+            if room_id in stored:
+                continue
+            row = {'id': None, 'room_id': room_id, 'interviewer_name': ''}
+            if not summary:
+                row.update(interviewer_id=user.pk, created_at=entry.updated_at, version=1)
+            rows.append(self.overlay(row, entry, summary))
+        rows.sort(key=lambda row: row['updated_at'], reverse=True)
+        return rows
+
+    def overlay(self, row, entry, summary):
+        row['updated_at'] = entry.updated_at
+        if summary:
+            row['content_length'] = len(entry.content)
+            row['preview'] = entry.content[:self.preview_length]
+        else:
+            row['content'] = entry.content
+        if entry.interviewer_name is not None:
+            row['interviewer_name'] = entry.interviewer_name
+        return row
+
+
+class InterviewNoteSearchAPIView(APIView):
+    """
+    Full-text search over the current user's notes, best matches first
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Search notes, returning ranked snippets instead of note bodies"""
+        query = NoteSearchQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = search_notes(request.user, query.validated_data['q'], query.validated_data['limit'])
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class InterviewNoteRoomsAPIView(APIView):
+    """
+    Rooms the current user has notes for, each with its note's metadata,
+    joined in one query through InterviewNote.interview_room
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self, user):
+        notes = InterviewNote.objects.filter(interviewer=user, interview_room__isnull=False)
+        return notes.select_related('interview_room').defer('content', 'search_vector').annotate(
+            content_length=Length('content'))
+
+    def get(self, request, room_id=None):
+        """List rooms with note metadata, or a single one by room UUID"""
+        notes = self.get_queryset(request.user)
+        if room_id is not None:
+            note = notes.filter(interview_room__room_id=room_id).first()
+            if note is None:
+                return Response({'detail': 'No notes found for this room'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(RoomWithNoteSerializer(self.overlay_buffered([note])[0]).data, status=status.HTTP_200_OK)
+
+        query = NoteRoomsQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        if query.validated_data['is_closed'] is not None:
+            notes = notes.filter(interview_room__is_closed=query.validated_data['is_closed'])
+
+        paginator = NoteCursorPagination()
+        if paginator.is_requested(request):
+            page = self.overlay_buffered(paginator.paginate_queryset(notes, request, view=self))
+            return paginator.get_paginated_response(RoomWithNoteSerializer(page, many=True).data)
+        notes = self.overlay_buffered(list(notes))
+        with timing('serializer'):
+            data = RoomWithNoteSerializer(notes, many=True).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    def overlay_buffered(self, notes):
+        if not settings.NOTE_WRITE_BEHIND:
+            return notes
+        for note in notes:
+            entry = note_buffer.get(note.room_id, note.interviewer_id)
+            if entry is not None:
+                note.updated_at = entry.updated_at
+                note.content_length = len(entry.content)
+        return notes
 
 
 class InterviewNoteCreateAPIView(APIView):
@@ -88,6 +367,7 @@ class InterviewNoteUpdateAPIView(APIView):
 
     def get_object(self, room_id, user):
         """Helper method to get note object by room_id and interviewer"""
+        flush_buffered_note(room_id, user)
         try:
             return InterviewNote.objects.get(room_id=room_id, interviewer=user)
         except InterviewNote.DoesNotExist:
@@ -0,0 +1,110 @@
+"""
+Signed room-admission tokens for the real-time servers.
+
+A token is an HS256 JWT with room_id, role ("host" or "guest"), iat and
+exp, issued only for an open room and valid for ROOM_ADMISSION_TOKEN_TTL
+seconds or until the room's expires_at, whichever comes first. Real-time
+nodes verify it offline with ROOM_ADMISSION_KEY, so a join or reconnect
+needs no backend request.
+
+Closing or deleting a room after a token was issued is covered by the
+revocation list: {room_id: closed_at} for rooms closed or deleted within the
+last token lifetime (older tokens have expired anyway), built from the
+partial index on closed rooms and the DeletedRoom rows the delete endpoints
+write, cached, and re-published whenever a room is closed or deleted. A
+token is revoked when its room is listed with closed_at at or after the
+token's iat. Nodes poll
+the list; a room closed between polls is noticed on the next one.
+"""
+import time
+from datetime import timedelta
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from django.utils.dateparse import parse_datetime
+
+from interview_rooms.models import DeletedRoom, Room
+
+ALGORITHM = 'HS256'
+ROLES = ('host', 'guest')
+REVOCATIONS_KEY = 'room-admission-revocations'
+# Upper bound on how long a cached list can miss a close made without
+# going through publish_revocations().
+REVOCATIONS_CACHE_TTL = 60
+
+
+class AdmissionError(Exception):
+    pass
+
+
+def signing_key():
+    # Without a configured key only this backend can verify tokens.
+    return settings.ROOM_ADMISSION_KEY or salted_hmac('room-admission', 'key').hexdigest()
+
+
+def issue_admission_token(room, role):
+    """room is a public room entry's data (see interview_rooms.cache)"""
+    now = int(time.time())
+    exp = now + settings.ROOM_ADMISSION_TOKEN_TTL
+    expires_at = room.get('expires_at')
+    if expires_at:
+        exp = min(exp, int(parse_datetime(expires_at).timestamp()))
+    payload = {'room_id': str(room['room_id']), 'role': role, 'iat': now, 'exp': exp}
+    return jwt.encode(payload, signing_key(), algorithm=ALGORITHM), payload
+
+
+def verify_admission_token(token, room_id=None, revoked=None):
+    """
+    Returns the payload of a valid token, optionally checking that it is
+    for room_id and not revoked by `revoked` ({room_id: closed_at}).
+    Raises AdmissionError otherwise.
+    """
+    try:
+        payload = jwt.decode(token, signing_key(), algorithms=[ALGORITHM],
+                             options={'require': ['room_id', 'role', 'iat', 'exp']})
+    except jwt.InvalidTokenError as exc:
+        raise AdmissionError(str(exc)) from exc
+    if room_id is not None and payload['room_id'] != str(room_id):
+        raise AdmissionError('Token is for another room')
+    closed_at = (revoked or {}).get(payload['room_id'])
+    if closed_at is not None and closed_at >= payload['iat']:
+        raise AdmissionError('Room was closed')
+    return payload
+
+
+def get_revocations():
+    """{room_id: closed_at epoch seconds} for rooms closed or deleted within a token lifetime"""
+    revoked = cache.get(REVOCATIONS_KEY)
+    if revoked is None:
+        since = revocation_window_start()
+        closed = Room.objects.filter(is_closed=True, updated_at__gte=since).values_list('room_id', 'updated_at')
+        deleted = DeletedRoom.objects.filter(deleted_at__gte=since).values_list('room_id', 'deleted_at')
+        revoked = {str(room_id): int(closed_at.timestamp()) for room_id, closed_at in [*closed, *deleted]}
+        cache.set(REVOCATIONS_KEY, revoked, REVOCATIONS_CACHE_TTL)
+    return revoked
+
+
+def revocation_window_start():
+    return timezone.now() - timedelta(seconds=settings.ROOM_ADMISSION_TOKEN_TTL)
+
+
+def record_deleted_rooms(room_ids):
+    """
+    Keeps room_ids in the revocation list after their rows are deleted. Call
+    inside the deleting transaction; rows past the token lifetime are pruned
+    on the way.
+    """
+    now = timezone.now()
+    DeletedRoom.objects.filter(deleted_at__lt=revocation_window_start()).delete()
+    DeletedRoom.objects.bulk_create([DeletedRoom(room_id=room_id, deleted_at=now) for room_id in room_ids],
+                                    update_conflicts=True, unique_fields=['room_id'], update_fields=['deleted_at'])
+    transaction.on_commit(publish_revocations)
+
+
+def publish_revocations():
+    """Drops the cached list so the next poll includes newly closed or deleted rooms"""
+    cache.delete(REVOCATIONS_KEY)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class InterviewRoomsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'interview_rooms'
+
+    def ready(self):
+        from interview_rooms import signals  # noqa: F401
@@ -0,0 +1,91 @@
+"""
+Room expiry and archival, driven by `manage.py expirerooms`.
+
+Expired open rooms are closed with one UPDATE per batch. Rooms that have
+been closed (i.e. not updated) for longer than the archive age are copied,
+with their notes, into ArchivedRoom / ArchivedInterviewNote and then
+deleted from the hot tables, one transaction per batch so locks stay short
+and an interrupted run loses nothing. A room's notes are those linked to it
+by interview_room, plus unlinked ones saved under its room_id string. Note
+revisions of archived notes are dropped; the archived note keeps its final
+content and version. Likewise the editor's snapshots and operation log are
+dropped and the archived room keeps its final code.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from code_sessions.models import CodeOperationLog, CodeSession, CodeSnapshot
+from interview_notes.models import ArchivedInterviewNote, InterviewNote, InterviewNoteRevision
+from interview_rooms.admission import publish_revocations
+from interview_rooms.cache import invalidate_public_rooms
+from interview_rooms.models import ArchivedRoom, Room
+from live_updates.events import rooms_closed
+
+ROOM_FIELDS = ('id', 'room_id', 'owner_id', 'name', 'created_at', 'updated_at', 'expires_at')
+NOTE_FIELDS = ('id', 'room_id', 'interview_room_id', 'interviewer_id', 'interviewer_name', 'content',
+               'created_at', 'updated_at', 'version')
+
+
+def close_expired_rooms(batch_size, now=None):
+    """Closes open rooms whose expires_at has passed. Returns the number closed."""
+    now = now or timezone.now()
+    expired = Room.objects.filter(is_closed=False, expires_at__lte=now).order_by('pk')
+    closed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(expired.select_for_update().values_list('id', 'room_id', 'owner_id')[:batch_size])
+            if not batch:
+                if closed:
+                    publish_revocations()
+                return closed
+            # updated_at marks when the room was closed, which the archive age
+            # is measured from.
+            closed += Room.objects.filter(id__in=[id for id, _, _ in batch], is_closed=False).update(
+                is_closed=True, updated_at=now)
+            room_ids = [room_id for _, room_id, _ in batch]
+            transaction.on_commit(lambda room_ids=room_ids: invalidate_public_rooms(room_ids))
+            rooms_closed(batch)
+
+
+def archive_closed_rooms(before, batch_size):
+    """
+    Moves rooms closed and untouched since `before`, and their notes, into
+    the archive tables. Returns (rooms archived, notes archived).
+    """
+    stale = Room.objects.filter(is_closed=True, updated_at__lt=before).order_by('pk')
+    rooms_archived = notes_archived = 0
+    while True:
+        with transaction.atomic():
+            rooms = list(stale.select_for_update().values(*ROOM_FIELDS)[:batch_size])
+            if not rooms:
+                return rooms_archived, notes_archived
+            ids = [room['id'] for room in rooms]
+            by_room_id = {str(room['room_id']): room['id'] for room in rooms}
+            notes = list(InterviewNote.objects.filter(
+                Q(interview_room_id__in=ids) | Q(interview_room__isnull=True, room_id__in=by_room_id)
+            ).values(*NOTE_FIELDS))
+            note_ids = [note['id'] for note in notes]
+            code = {room: (language, content) for room, language, content in
+                    CodeSession.objects.filter(room_id__in=ids).values_list('room_id', 'language', 'content')}
+
+            ArchivedRoom.objects.bulk_create([
+                ArchivedRoom(**room, code_language=code.get(room['id'], ('', ''))[0],
+                             code=code.get(room['id'], ('', ''))[1])
+                for room in rooms
+            ])
+            for note in notes:
+                room_id = note.pop('room_id')
+                note['room_id'] = note.pop('interview_room_id') or by_room_id[room_id]
+            ArchivedInterviewNote.objects.bulk_create([ArchivedInterviewNote(**note) for note in notes])
+
+            # Plain DELETEs: the only rows referencing these are the ones
+            # removed here, so no cascade collection is needed.
+            db = stale.db
+            InterviewNoteRevision.objects.filter(note_id__in=note_ids)._raw_delete(db)
+            InterviewNote.objects.filter(id__in=note_ids)._raw_delete(db)
+            for model in (CodeOperationLog, CodeSnapshot, CodeSession):
+                model.objects.filter(room_id__in=ids)._raw_delete(db)
+            Room.objects.filter(id__in=ids)._raw_delete(db)
+            rooms_archived += len(rooms)
+            notes_archived += len(notes)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.utils.encoders import JSONEncoder
+
+from interview_rooms.models import Room
+from interview_rooms.serializers import public_room_values_serializer
+
+# Stored for unknown or closed rooms so repeated misses skip the database too.
+MISSING = 'missing'
+
+
+def public_room_key(room_id):
+    return f'public-room:{room_id}'
+
+
+def get_public_room(room_id):
+    """
+    Returns {'data': ..., 'etag': ...} for an open room, or None when the
+    room does not exist or is closed. Both outcomes are cached.
+    """
+    key = public_room_key(room_id)
+    entry = cache.get(key)
+    if entry == MISSING:
+        return None
+    if entry is not None:
+        return entry
+
+    serializer = public_room_values_serializer()
+    room = serializer.values(Room.objects.filter(room_id=room_id, is_closed=False)).first()
+    entry, timeout = _build_entry(room)
+    cache.set(key, entry, timeout)
+    return None if entry == MISSING else entry
+
+
+async def aget_public_room(room_id):
+    """Async counterpart of get_public_room, for async views"""
+    key = public_room_key(room_id)
+    entry = await cache.aget(key)
+    if entry == MISSING:
+        return None
+    if entry is not None:
+        return entry
+
+    serializer = public_room_values_serializer()
+    room = await serializer.values(Room.objects.filter(room_id=room_id, is_closed=False)).afirst()
+    entry, timeout = _build_entry(room)
+    await cache.aset(key, entry, timeout)
+    return None if entry == MISSING else entry
+
+
+def _build_entry(row):
+    if row is None:
+        return MISSING, settings.PUBLIC_ROOM_CACHE_MISS_TTL
+
+    data = public_room_values_serializer().to_representation(row)
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+    return {'data': data, 'etag': f'"{hashlib.md5(body).hexdigest()}"'}, settings.PUBLIC_ROOM_CACHE_TTL
+
+
+def invalidate_public_room(room_id):
+    cache.delete(public_room_key(room_id))
+
+
+def invalidate_public_rooms(room_ids):
+    """For bulk updates and deletes, which send no model signals"""
+    cache.delete_many([public_room_key(room_id) for room_id in room_ids])
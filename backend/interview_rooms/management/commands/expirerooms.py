@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from interview_rooms.archive import archive_closed_rooms, close_expired_rooms
+
+
+class Command(BaseCommand):
+    help = "Closes expired rooms and moves long-closed rooms and their notes to the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ROOM_EXPIRY_BATCH_SIZE)
+        parser.add_argument('--archive-after-days', type=int, default=settings.ROOM_ARCHIVE_AFTER_DAYS,
+                            help="Archive rooms closed for this many days; negative disables archiving")
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Keep running, repeating every this many seconds")
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options['batch_size'], options['archive_after_days'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def run_once(self, batch_size, archive_after_days):
+        now = timezone.now()
+        closed = close_expired_rooms(batch_size, now=now)
+        rooms = notes = 0
+        if archive_after_days >= 0:
+            rooms, notes = archive_closed_rooms(now - timedelta(days=archive_after_days), batch_size)
+        self.stdout.write(f"Closed {closed} expired rooms, archived {rooms} rooms and {notes} notes")
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_rooms', '0003_room_is_closed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['owner', '-id'], name='room_owner_id_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:00
+
+import django.db.models.deletion
+import interview_rooms.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_rooms', '0004_room_owner_id_desc_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRoom',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('room_id', models.UUIDField(unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, default=interview_rooms.models.default_expires_at, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['expires_at'], name='room_open_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_closed', True)), fields=['updated_at'], name='room_closed_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedroom',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_rooms', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedroom',
+            index=models.Index(fields=['owner', '-id'], name='archived_room_owner_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_rooms', '0005_room_expires_at_archivedroom'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedroom',
+            name='code',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='archivedroom',
+            name='code_language',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview_rooms', '0006_archivedroom_code_archivedroom_code_language'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.UUIDField(unique=True)),
+                ('deleted_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
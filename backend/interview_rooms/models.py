@@ -1,12 +1,20 @@
 import uuid
+from datetime import timedelta
 
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from user.models import User
 
 
 # Create your models here.
 
+def default_expires_at():
+    hours = settings.ROOM_DEFAULT_LIFETIME_HOURS
+    return timezone.now() + timedelta(hours=hours) if hours else None
+
+
 class Room(models.Model):
     id = models.BigAutoField(primary_key=True)
     room_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, db_index=True)
@@ -15,12 +23,73 @@ class Room(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_closed = models.BooleanField(default=False)
+    # Closed by the expirerooms command once passed; None never expires.
+    expires_at = models.DateTimeField(null=True, blank=True, default=default_expires_at)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["owner", "name"], name="unique_room_name_per_owner")
         ]
+        indexes = [
+            models.Index(fields=["owner", "-id"], name="room_owner_id_desc_idx"),
+            # Partial indexes for the expirerooms scans: open rooms by expiry
+            # and closed rooms by the time they were last touched.
+            models.Index(fields=["expires_at"], condition=models.Q(is_closed=False),
+                         name="room_open_expires_idx"),
+            models.Index(fields=["updated_at"], condition=models.Q(is_closed=True),
+                         name="room_closed_updated_idx"),
+        ]
+        ordering = ["-id"]
+
+    # (name, is_closed) as loaded from the database, for live_updates to
+    # tell renames and closes apart from other saves. None when deferred.
+    loaded_state = (None, None)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_state = (instance.__dict__.get("name"), instance.__dict__.get("is_closed"))
+        return instance
+
+    def __str__(self):
+        return self.name
+
+
+class DeletedRoom(models.Model):
+    """
+    A room deleted within the last admission token lifetime, so the
+    revocation list (interview_rooms.admission) still covers its tokens
+    once its Room row is gone.
+    """
+    room_id = models.UUIDField(unique=True)
+    deleted_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return str(self.room_id)
+
+
+class ArchivedRoom(models.Model):
+    """
+    A closed room moved out of Room by the expirerooms command, keeping its
+    original id. Read-only; its notes are ArchivedInterviewNote rows, and
+    code holds the final state of its shared editor.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    room_id = models.UUIDField(unique=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_rooms")
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    expires_at = models.DateTimeField(null=True, blank=True)
+    code_language = models.CharField(max_length=32, blank=True)
+    code = models.TextField(blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "-id"], name="archived_room_owner_id_idx"),
+        ]
         ordering = ["-id"]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RoomCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the owner's rooms on the (owner, -id) index, so
+    fetching page N costs the same as fetching page 1.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 500
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
@@ -1,6 +1,10 @@
+from functools import lru_cache
+
+from django.conf import settings
 from rest_framework import serializers
 
-from interview_rooms.models import Room
+from backend.fast_serializers import ValuesSerializer
+from interview_rooms.models import ArchivedRoom, Room
 
 
 class InterviewRoomSerializer(serializers.ModelSerializer):
@@ -9,7 +13,107 @@ class InterviewRoomSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('owner',)
 
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 class PublicInterviewRoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
-        fields = ['id','room_id', 'name', 'created_at','owner','is_closed']
\ No newline at end of file
+        fields = ['id','room_id', 'name', 'created_at','owner','is_closed', 'expires_at']
+
+
+class ArchivedRoomSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedRoom
+        exclude = ('code_language', 'code')
+
+
+class ArchivedRoomDetailSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedRoom
+        fields = '__all__'
+
+
+class DashboardRoomSerializer(InterviewRoomSerializer):
+    """Room plus the current user's note activity, from InterviewRoomDashboard's annotations"""
+    has_note = serializers.BooleanField()
+    note_id = serializers.IntegerField(allow_null=True)
+    note_updated_at = serializers.DateTimeField(allow_null=True)
+    note_length = serializers.IntegerField(allow_null=True)
+
+
+class DashboardQuerySerializer(serializers.Serializer):
+    is_closed = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+
+# One entry per projection; validate_fields canonicalizes them, so there are
+# at most 2 ** (len(PROJECTABLE_FIELDS) - 1) of them.
+@lru_cache(maxsize=128)
+def room_values_serializer(fields=None):
+    """ValuesSerializer for InterviewRoomSerializer, per field projection (a tuple)"""
+    return ValuesSerializer(InterviewRoomSerializer(fields=fields))
+
+
+@lru_cache(maxsize=None)
+def dashboard_values_serializer():
+    return ValuesSerializer(DashboardRoomSerializer())
+
+
+@lru_cache(maxsize=None)
+def archived_room_values_serializer():
+    return ValuesSerializer(ArchivedRoomSerializer())
+
+
+@lru_cache(maxsize=None)
+def archived_room_detail_values_serializer():
+    return ValuesSerializer(ArchivedRoomDetailSerializer())
+
+
+@lru_cache(maxsize=None)
+def public_room_values_serializer():
+    return ValuesSerializer(PublicInterviewRoomSerializer())
+
+
+class RoomListQuerySerializer(serializers.Serializer):
+    PROJECTABLE_FIELDS = ('id', 'room_id', 'owner', 'name', 'created_at', 'updated_at', 'is_closed',
+                         'expires_at')
+
+    fields = serializers.CharField(required=False)
+    is_closed = serializers.BooleanField(required=False, allow_null=True, default=None)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate_fields(self, value):
+        """Returns the projection as a tuple in PROJECTABLE_FIELDS order, without duplicates"""
+        fields = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(fields - set(self.PROJECTABLE_FIELDS))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}")
+        # The cursor is built from id, so it is always loaded.
+        fields.add('id')
+        return tuple(name for name in self.PROJECTABLE_FIELDS if name in fields)
+
+
+class AdmissionQuerySerializer(serializers.Serializer):
+    role = serializers.ChoiceField(choices=('host', 'guest'), required=False)
+
+
+class RoomBulkItemSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+
+
+class RoomBulkCreateSerializer(serializers.Serializer):
+    rooms = RoomBulkItemSerializer(many=True, allow_empty=False, max_length=settings.ROOM_BULK_MAX_ITEMS)
+
+
+class RoomBulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                max_length=settings.ROOM_BULK_MAX_ITEMS)
+
+
+class RoomBulkCloseSerializer(RoomBulkIdsSerializer):
+    is_closed = serializers.BooleanField(default=True)
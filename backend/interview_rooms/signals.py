@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from interview_rooms.admission import publish_revocations
+from interview_rooms.cache import invalidate_public_room
+from interview_rooms.models import Room
+
+
+# Invalidation waits for the commit: done inside the transaction, a
+# concurrent read could cache the old row again before the change is visible.
+
+@receiver(post_save, sender=Room)
+def invalidate_public_room_on_save(sender, instance, **kwargs):
+    # Covers closing/reopening, renames and rooms created under a room_id
+    # that was negatively cached.
+    room_id = instance.room_id
+    transaction.on_commit(lambda: invalidate_public_room(room_id))
+    if instance.is_closed:
+        transaction.on_commit(publish_revocations)
+
+
+@receiver(post_delete, sender=Room)
+def invalidate_public_room_on_delete(sender, instance, **kwargs):
+    room_id = instance.room_id
+    transaction.on_commit(lambda: invalidate_public_room(room_id))
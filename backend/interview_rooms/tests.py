@@ -1,3 +1,378 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from code_sessions.models import CodeOperationLog, CodeSession, CodeSnapshot
+from interview_notes.models import InterviewNote, InterviewNoteRevision
+from interview_rooms.admission import AdmissionError, get_revocations, record_deleted_rooms, verify_admission_token
+from interview_rooms.cache import get_public_room
+from interview_rooms.models import ArchivedRoom, DeletedRoom, Room
+from interview_rooms.serializers import (
+    InterviewRoomSerializer,
+    PublicInterviewRoomSerializer,
+    RoomListQuerySerializer,
+    public_room_values_serializer,
+    room_values_serializer,
+)
+from user.models import User
+from user.tokens import UserRefreshToken
+
+
+class RoomValuesSerializerContractTests(TestCase):
+    """The .values() fast path must render exactly what the ModelSerializers render"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pw123456', full_name='Owner')
+        for index, name in enumerate(['Backend onsite', 'Zoë – system design', '', 'x y']):
+            Room.objects.create(owner=cls.owner, name=name or f'room {index}', is_closed=index % 2 == 1)
+
+    def assertSameJSON(self, expected, actual):
+        self.assertEqual(JSONRenderer().render(expected), JSONRenderer().render(actual))
+
+    def test_room_list_matches_model_serializer(self):
+        rooms = Room.objects.filter(owner=self.owner).order_by('-id')
+        serializer = room_values_serializer()
+        self.assertSameJSON(InterviewRoomSerializer(rooms, many=True).data, serializer.many(serializer.values(rooms)))
+
+    def test_projected_room_list_matches_model_serializer(self):
+        rooms = Room.objects.filter(owner=self.owner).order_by('-id')
+        for fields in (('id', 'name'), ('id', 'room_id', 'created_at', 'owner'), ('id', 'is_closed', 'updated_at')):
+            serializer = room_values_serializer(fields)
+            self.assertSameJSON(
+                InterviewRoomSerializer(rooms.only(*fields), many=True, fields=list(fields)).data,
+                serializer.many(serializer.values(rooms)),
+            )
+
+    def test_projections_are_canonical(self):
+        projections = set()
+        for value in ('name,is_closed', 'is_closed, name,name', 'id,is_closed,name,'):
+            query = RoomListQuerySerializer(data={'fields': value})
+            self.assertTrue(query.is_valid())
+            projections.add(query.validated_data['fields'])
+        self.assertEqual(projections, {('id', 'name', 'is_closed')})
+
+        query = RoomListQuerySerializer(data={'fields': 'name,password,email'})
+        self.assertFalse(query.is_valid())
+        self.assertEqual(query.errors['fields'], ['Unknown fields: email, password'])
+
+    def test_public_room_matches_model_serializer(self):
+        serializer = public_room_values_serializer()
+        for room in Room.objects.all():
+            row = serializer.values(Room.objects.filter(pk=room.pk)).get()
+            self.assertSameJSON(PublicInterviewRoomSerializer(room).data, serializer.to_representation(row))
+
+    def test_list_endpoint_matches_model_serializer(self):
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.owner).access_token)
+        response = self.client.get('/interview-rooms/', HTTP_HOST='localhost')
+        rooms = Room.objects.filter(owner=self.owner).order_by('-id')
+        self.assertEqual(response.content, JSONRenderer().render(InterviewRoomSerializer(rooms, many=True).data))
+
+
+class PublicRoomCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='cache@example.com', password='pw123456', full_name='Owner')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidated_once_the_change_commits(self):
+        room = Room.objects.create(owner=self.owner, name='Before')
+        self.assertEqual(get_public_room(room.room_id)['data']['name'], 'Before')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.name = 'After'
+            room.save()
+            # Not yet committed: a reader may still cache the old row, so
+            # the entry must not have been dropped already.
+            self.assertEqual(get_public_room(room.room_id)['data']['name'], 'Before')
+        self.assertEqual(get_public_room(room.room_id)['data']['name'], 'After')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.delete()
+        self.assertIsNone(get_public_room(room.room_id))
+
+
+class InterviewRoomBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='bulk@example.com', password='pw123456', full_name='Owner')
+        cls.other = User.objects.create_user(email='other@example.com', password='pw123456', full_name='Other')
+
+    def setUp(self):
+        cache.clear()
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.owner).access_token)
+
+    def bulk_delete(self, ids):
+        return self.client.delete('/interview-rooms/bulk/', {'ids': ids}, content_type='application/json',
+                                  HTTP_HOST='localhost')
+
+    def test_delete_cascades_to_code_sessions_unlinks_notes_and_clears_the_public_cache(self):
+        rooms = [Room.objects.create(owner=self.owner, name=f'Room {index}') for index in range(2)]
+        foreign = Room.objects.create(owner=self.other, name='Not mine')
+        note = InterviewNote.objects.create(room_id=str(rooms[0].room_id), interview_room=rooms[0],
+                                            interviewer=self.owner, content='keep me')
+        now = timezone.now()
+        for room in rooms:
+            CodeSession.objects.create(room=room, language='python', content='print(1)', seq=1, updated_at=now)
+            CodeSnapshot.objects.create(room=room, seq=1, taken_at=now, language='python', content='print(1)')
+            CodeOperationLog.objects.create(room=room, first_seq=1, last_seq=1, started_at=now, ended_at=now, ops=[])
+        self.assertIsNotNone(get_public_room(rooms[0].room_id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.bulk_delete([rooms[0].id, rooms[1].id, foreign.id])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'deleted': [rooms[0].id, rooms[1].id], 'not_found': [foreign.id]})
+
+        self.assertEqual(list(Room.objects.values_list('id', flat=True)), [foreign.id])
+        for model in (CodeSession, CodeSnapshot, CodeOperationLog):
+            self.assertFalse(model.objects.exists())
+        # SQLite defers foreign key checks to the commit, which a test never reaches.
+        connection.check_constraints()
+        note.refresh_from_db()
+        self.assertIsNone(note.interview_room_id)
+        self.assertEqual(note.content, 'keep me')
+        self.assertIsNone(get_public_room(rooms[0].room_id))
+
+
+class RoomAdmissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='admit@example.com', password='pw123456', full_name='Owner')
+
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(owner=self.owner, name='Admission')
+        self.room_id = str(self.room.room_id)
+
+    def admission(self, query='', owner=False):
+        if owner:
+            self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.owner).access_token)
+        return self.client.get(f'/interview-rooms/public/{self.room_id}/admission/{query}', HTTP_HOST='localhost')
+
+    def revocations(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/interview-rooms/admission/revocations/', HTTP_HOST='localhost', **headers)
+
+    def test_issues_host_to_the_owner_and_guest_to_everyone_else(self):
+        response = self.admission()
+        self.assertEqual((response.status_code, response.json()['role']), (200, 'guest'))
+        self.assertEqual(self.admission('?role=host').status_code, 403)
+
+        response = self.admission(owner=True)
+        self.assertEqual(response.json()['role'], 'host')
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        payload = verify_admission_token(response.json()['token'], self.room_id)
+        self.assertEqual((payload['room_id'], payload['role']), (self.room_id, 'host'))
+        self.assertEqual(self.admission('?role=guest', owner=True).json()['role'], 'guest')
+
+    def test_verify_rejects_other_rooms_and_bad_signatures(self):
+        token = self.admission().json()['token']
+        with self.assertRaises(AdmissionError):
+            verify_admission_token(token, Room.objects.create(owner=self.owner, name='Other').room_id)
+        with self.assertRaises(AdmissionError):
+            verify_admission_token(token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB'), self.room_id)
+
+    def test_closed_and_deleted_rooms_revoke_their_tokens(self):
+        token = self.admission().json()['token']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.is_closed = True
+            self.room.save()
+        self.assertEqual(self.admission().status_code, 404)
+        self.assertIn(self.room_id, get_revocations())
+        with self.assertRaises(AdmissionError):
+            verify_admission_token(token, self.room_id, get_revocations())
+
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.owner).access_token)
+        rooms = [Room.objects.create(owner=self.owner, name=f'Deleted {index}') for index in range(3)]
+        tokens = [self.client.get(f'/interview-rooms/public/{room.room_id}/admission/',
+                                  HTTP_HOST='localhost').json()['token'] for room in rooms]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/interview-rooms/{rooms[0].id}/', HTTP_HOST='localhost')
+                             .status_code, 204)
+            self.client.delete('/interview-rooms/bulk/', {'ids': [rooms[1].id, rooms[2].id]},
+                               content_type='application/json', HTTP_HOST='localhost')
+        revoked = get_revocations()
+        for room, token in zip(rooms, tokens):
+            self.assertIn(str(room.room_id), revoked)
+            with self.assertRaises(AdmissionError):
+                verify_admission_token(token, room.room_id, revoked)
+
+    def test_deleted_rooms_leave_the_list_after_a_token_lifetime(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.delete()
+            record_deleted_rooms([self.room.room_id])
+        DeletedRoom.objects.update(deleted_at=timezone.now() - timedelta(seconds=settings.ROOM_ADMISSION_TOKEN_TTL + 1))
+        cache.clear()
+        self.assertEqual(get_revocations(), {})
+
+        record_deleted_rooms([uuid.uuid4()])
+        self.assertEqual(DeletedRoom.objects.count(), 1)
+
+    def test_revocations_answer_304_until_the_list_changes(self):
+        response = self.revocations()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'revoked': {}, 'token_ttl': settings.ROOM_ADMISSION_TOKEN_TTL})
+        etag = response['ETag']
+        self.assertEqual(self.revocations(etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.is_closed = True
+            self.room.save()
+        response = self.revocations(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()['revoked']), [self.room_id])
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class InterviewRoomDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='dash@example.com', password='pw123456', full_name='Owner')
+        cls.other = User.objects.create_user(email='dash-other@example.com', password='pw123456', full_name='Other')
+        cls.noted = Room.objects.create(owner=cls.owner, name='With note')
+        cls.empty = Room.objects.create(owner=cls.owner, name='Without note', is_closed=True)
+        cls.note = InterviewNote.objects.create(room_id=str(cls.noted.room_id), interviewer=cls.owner,
+                                                content='twelve chars')
+        # Another interviewer's note in the same room is not the owner's activity.
+        InterviewNote.objects.create(room_id=str(cls.empty.room_id), interviewer=cls.other, content='theirs')
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.owner).access_token)
+
+    def get(self, etag=None, **params):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/interview-rooms/dashboard/', params, HTTP_HOST='localhost', **headers)
+
+    def test_rooms_are_annotated_with_the_users_note(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        rows = {row['id']: row for row in response.json()['results']}
+        self.assertEqual(list(rows), [self.empty.id, self.noted.id])
+        self.assertEqual(
+            {key: rows[self.noted.id][key] for key in ('has_note', 'note_id', 'note_length')},
+            {'has_note': True, 'note_id': self.note.id, 'note_length': len('twelve chars')})
+        self.assertIsNotNone(rows[self.noted.id]['note_updated_at'])
+        self.assertEqual(
+            {key: rows[self.empty.id][key] for key in ('has_note', 'note_id', 'note_updated_at', 'note_length')},
+            {'has_note': False, 'note_id': None, 'note_updated_at': None, 'note_length': None})
+
+        closed = self.get(is_closed='true').json()['results']
+        self.assertEqual([row['id'] for row in closed], [self.empty.id])
+        first = self.get(limit=1).json()
+        self.assertEqual(len(first['results']), 1)
+        self.assertIsNotNone(first['next'])
+
+    def test_etag_answers_304_until_a_room_or_note_changes(self):
+        etag = self.get()['ETag']
+        # User, two aggregates: the page itself is not built.
+        with self.assertNumQueries(3):
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertNotEqual(self.get(is_closed='true')['ETag'], etag)
+
+        self.note.content = 'edited'
+        self.note.save()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        Room.objects.filter(pk=self.empty.pk).update(name='Renamed', updated_at=timezone.now())
+        self.assertEqual(self.get(etag).status_code, 200)
+
+
+class RoomExpiryAndArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='archive@example.com', password='pw123456', full_name='Owner')
+        cls.other = User.objects.create_user(email='archive-other@example.com', password='pw123456',
+                                             full_name='Other')
+        now = timezone.now()
+        cls.expired = Room.objects.create(owner=cls.owner, name='Expired', expires_at=now - timedelta(minutes=1))
+        cls.running = Room.objects.create(owner=cls.owner, name='Running', expires_at=now + timedelta(hours=1))
+        cls.recent = Room.objects.create(owner=cls.owner, name='Closed recently', is_closed=True)
+        cls.stale = [Room.objects.create(owner=cls.owner, name=f'Stale {index}', is_closed=True)
+                     for index in range(3)]
+        Room.objects.filter(pk__in=[room.pk for room in cls.stale]).update(updated_at=now - timedelta(days=40))
+
+        room = cls.stale[0]
+        cls.notes = [
+            InterviewNote.objects.create(room_id=str(room.room_id), interviewer=user, content=f'{user.email} notes')
+            for user in (cls.owner, cls.other)
+        ]
+        InterviewNoteRevision.objects.create(note=cls.notes[0], version=2, ops=[])
+        # Saved under the room's id without the link to the room.
+        InterviewNote.objects.filter(pk=cls.notes[1].pk).update(interview_room=None)
+        CodeSession.objects.create(room=room, language='python', content='print(1)', seq=1, updated_at=now)
+        CodeSnapshot.objects.create(room=room, seq=1, taken_at=now, language='python', content='print(1)')
+        CodeOperationLog.objects.create(room=room, first_seq=1, last_seq=1, started_at=now, ended_at=now, ops=[])
+
+    def setUp(self):
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.owner).access_token)
+
+    def expire(self):
+        out = StringIO()
+        call_command('expirerooms', '--batch-size', '2', '--archive-after-days', '30', stdout=out)
+        return out.getvalue().strip()
+
+    def test_expires_open_rooms_and_archives_long_closed_ones_in_batches(self):
+        self.assertEqual(self.expire(), "Closed 1 expired rooms, archived 3 rooms and 2 notes")
+
+        # Closed just now, so archived only once it has been closed long enough.
+        self.assertTrue(Room.objects.get(pk=self.expired.pk).is_closed)
+        self.assertFalse(Room.objects.get(pk=self.running.pk).is_closed)
+        self.assertEqual(set(Room.objects.values_list('id', flat=True)),
+                         {self.expired.id, self.running.id, self.recent.id})
+        self.assertEqual(set(ArchivedRoom.objects.values_list('id', flat=True)), {room.id for room in self.stale})
+
+        # Notes move with their room, keeping their ids; the editor keeps its final code.
+        archived = ArchivedRoom.objects.get(pk=self.stale[0].pk)
+        self.assertEqual((archived.room_id, archived.code_language, archived.code),
+                         (self.stale[0].room_id, 'python', 'print(1)'))
+        self.assertEqual(
+            sorted(archived.notes.values_list('id', 'interviewer_id', 'content')),
+            sorted((note.id, note.interviewer_id, note.content) for note in self.notes))
+        self.assertFalse(InterviewNote.objects.filter(pk__in=[note.pk for note in self.notes]).exists())
+        self.assertFalse(InterviewNoteRevision.objects.exists())
+        for model in (CodeSession, CodeSnapshot, CodeOperationLog):
+            self.assertFalse(model.objects.exists())
+
+        self.assertEqual(self.expire(), "Closed 0 expired rooms, archived 0 rooms and 0 notes")
+
+    def test_archive_endpoints(self):
+        self.expire()
+
+        first = self.client.get('/interview-rooms/archive/', {'limit': 2}, HTTP_HOST='localhost').json()
+        second = self.client.get(first['next'], HTTP_HOST='localhost').json()
+        self.assertEqual([room['id'] for room in first['results'] + second['results']],
+                         [room.id for room in reversed(self.stale)])
+        self.assertNotIn('code', first['results'][0])
+
+        response = self.client.get(f'/interview-rooms/archive/{self.stale[0].room_id}/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['code'], 'print(1)')
+        # Only the requesting interviewer's archived notes are included.
+        self.assertEqual([note['id'] for note in response.json()['notes']], [self.notes[0].id])
+
+        self.client.cookies['access_token'] = str(UserRefreshToken.for_user(self.other).access_token)
+        self.assertEqual(self.client.get('/interview-rooms/archive/', HTTP_HOST='localhost').json()['results'], [])
+        response = self.client.get(f'/interview-rooms/archive/{self.stale[0].room_id}/', HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 404)
 
-# Create your tests here.
+        # Interviewers who do not own the room reach their archived notes here.
+        for url in ('/interview-rooms/archive/notes/', f'/interview-rooms/archive/{self.stale[0].room_id}/notes/'):
+            notes = self.client.get(url, HTTP_HOST='localhost').json()
+            self.assertEqual([(note['id'], note['room_id'], note['room_name']) for note in notes],
+                             [(self.notes[1].id, str(self.stale[0].room_id), 'Stale 0')])
+        notes = self.client.get(f'/interview-rooms/archive/{self.stale[1].room_id}/notes/', HTTP_HOST='localhost')
+        self.assertEqual(notes.json(), [])
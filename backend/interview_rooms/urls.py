@@ -1,9 +1,31 @@
 from django.urls import path
 
-from interview_rooms.views import InterviewRoomDetail, InterviewRooms, InterviewRoomPublicAccess
+from backend.async_views import served_view
+from interview_rooms.views import (
+    AdmissionRevocations,
+    ArchivedNotes,
+    ArchivedRoomDetail,
+    ArchivedRooms,
+    AsyncInterviewRoomAdmission,
+    AsyncInterviewRoomPublicAccess,
+    InterviewRoomBulk,
+    InterviewRoomAdmission,
+    InterviewRoomDashboard,
+    InterviewRoomDetail,
+    InterviewRoomPublicAccess,
+    InterviewRooms,
+)
 
 urlpatterns = [
     path('', InterviewRooms.as_view(), name='room-list-create'),
+    path('dashboard/', InterviewRoomDashboard.as_view(), name='room-dashboard'),
+    path('archive/', ArchivedRooms.as_view(), name='room-archive'),
+    path('archive/<uuid:room_id>/', ArchivedRoomDetail.as_view(), name='room-archive-detail'),
+    path('archive/notes/', ArchivedNotes.as_view(), name='room-archive-notes'),
+    path('archive/<uuid:room_id>/notes/', ArchivedNotes.as_view(), name='room-archive-room-notes'),
+    path('bulk/', InterviewRoomBulk.as_view(), name='room-bulk'),
     path('<int:id>/', InterviewRoomDetail.as_view(), name='room-detail'),
-    path('public/<uuid:room_id>/', InterviewRoomPublicAccess.as_view()),
+    path('public/<uuid:room_id>/', served_view(InterviewRoomPublicAccess, AsyncInterviewRoomPublicAccess), name='room-public-access'),
+    path('public/<uuid:room_id>/admission/', served_view(InterviewRoomAdmission, AsyncInterviewRoomAdmission), name='room-admission'),
+    path('admission/revocations/', AdmissionRevocations.as_view(), name='room-admission-revocations'),
 ]
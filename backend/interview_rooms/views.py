@@ -1,10 +1,44 @@
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, FilteredRelation, Max, Q
+from django.db.models.functions import Length
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from interview_rooms.models import Room
-from interview_rooms.serializers import InterviewRoomSerializer, PublicInterviewRoomSerializer
+from backend.async_views import AsyncAPIView
+from backend.metrics import timing
+from interview_notes.buffer import note_buffer
+from interview_notes.models import ArchivedInterviewNote, InterviewNote
+from interview_notes.serializers import ArchivedInterviewNoteSerializer, InterviewerArchivedNoteSerializer
+from interview_rooms.admission import (
+    get_revocations,
+    issue_admission_token,
+    publish_revocations,
+    record_deleted_rooms,
+)
+from interview_rooms.cache import aget_public_room, get_public_room, invalidate_public_rooms
+from interview_rooms.models import ArchivedRoom, Room
+from interview_rooms.pagination import RoomCursorPagination
+from interview_rooms.serializers import (
+    AdmissionQuerySerializer,
+    DashboardQuerySerializer,
+    InterviewRoomSerializer,
+    RoomBulkCloseSerializer,
+    RoomBulkCreateSerializer,
+    RoomBulkIdsSerializer,
+    RoomListQuerySerializer,
+    archived_room_detail_values_serializer,
+    archived_room_values_serializer,
+    dashboard_values_serializer,
+    room_values_serializer,
+)
+from live_updates.events import rooms_closed
 
 
 # Create your views here.
@@ -13,9 +47,33 @@ class InterviewRooms(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
+        query = RoomListQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
         rooms = Room.objects.filter(owner=request.user).order_by('-id')
-        serializer = InterviewRoomSerializer(rooms, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if params['is_closed'] is not None:
+            rooms = rooms.filter(is_closed=params['is_closed'])
+        if 'created_after' in params:
+            rooms = rooms.filter(created_at__gte=params['created_after'])
+        if 'created_before' in params:
+            rooms = rooms.filter(created_at__lt=params['created_before'])
+
+        serializer = room_values_serializer(params.get('fields'))
+        rooms = serializer.values(rooms)
+
+        # Without cursor/limit the endpoint keeps returning a plain list so
+        # existing clients are unaffected.
+        paginator = RoomCursorPagination()
+        if not paginator.is_requested(request):
+            with timing('serializer'):
+                data = serializer.many(rooms)
+            return Response(data, status=status.HTTP_200_OK)
+
+        page = paginator.paginate_queryset(rooms, request, view=self)
+        with timing('serializer'):
+            data = serializer.many(page)
+        return paginator.get_paginated_response(data)
 
     def post(self, request):
         serializer = InterviewRoomSerializer(data=request.data, context={'request': request})
@@ -23,6 +81,192 @@ class InterviewRooms(APIView):
         serializer.save(owner=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+class InterviewRoomDashboard(APIView):
+    """
+    The current user's rooms, each annotated with their own note's id,
+    updated_at and length, one cursor page (?limit=, default 50) per
+    request and one query per page: the note comes from a LEFT JOIN on
+    InterviewNote.interview_room restricted to the user.
+
+    The ETag is derived from a fingerprint of the user's rooms and notes
+    (counts and latest updated_at), so a matching If-None-Match is answered
+    with 304 after two aggregate queries and without building the page.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = DashboardQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        etag = self.etag(request)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.page(request, query.validated_data['is_closed'])
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def page(self, request, is_closed):
+        rooms = Room.objects.filter(owner=request.user).annotate(
+            user_note=FilteredRelation('notes', condition=Q(notes__interviewer=request.user)),
+            has_note=ExpressionWrapper(Q(user_note__id__isnull=False), output_field=BooleanField()),
+            note_id=F('user_note__id'),
+            note_updated_at=F('user_note__updated_at'),
+            note_length=Length('user_note__content'),
+        )
+        if is_closed is not None:
+            rooms = rooms.filter(is_closed=is_closed)
+        serializer = dashboard_values_serializer()
+
+        paginator = RoomCursorPagination()
+        page = paginator.paginate_queryset(serializer.values(rooms), request, view=self)
+        if settings.NOTE_WRITE_BEHIND:
+            self.overlay_buffered(page, request.user)
+        with timing('serializer'):
+            data = serializer.many(page)
+        return paginator.get_paginated_response(data)
+
+    def overlay_buffered(self, rows, user):
+        pending = {entry.room_id: entry for entry in note_buffer.for_interviewer(user.pk)}
+        for row in rows:
+            entry = pending.get(str(row['room_id']))
+            if entry is not None:
+                row.update(has_note=True, note_updated_at=entry.updated_at, note_length=len(entry.content))
+
+    def etag(self, request):
+        user = request.user
+        rooms = Room.objects.filter(owner=user).aggregate(count=Count('id'), updated=Max('updated_at'))
+        notes = InterviewNote.objects.filter(interviewer=user).aggregate(count=Count('id'), updated=Max('updated_at'))
+        parts = [user.pk, rooms['count'], rooms['updated'], notes['count'], notes['updated'],
+                 request.get_full_path()]
+        if settings.NOTE_WRITE_BEHIND:
+            parts += sorted((entry.room_id, entry.updated_at) for entry in note_buffer.for_interviewer(user.pk))
+        return f'"{hashlib.md5(repr(parts).encode()).hexdigest()}"'
+
+
+class ArchivedRooms(APIView):
+    """The owner's archived rooms, newest first, one cursor page at a time"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        serializer = archived_room_values_serializer()
+        paginator = RoomCursorPagination()
+        page = paginator.paginate_queryset(
+            serializer.values(ArchivedRoom.objects.filter(owner=request.user)), request, view=self)
+        with timing('serializer'):
+            data = serializer.many(page)
+        return paginator.get_paginated_response(data)
+
+
+class ArchivedRoomDetail(APIView):
+    """An archived room, with its final code and the current user's archived notes for it"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, room_id):
+        serializer = archived_room_detail_values_serializer()
+        room = serializer.values(ArchivedRoom.objects.filter(room_id=room_id, owner=request.user)).first()
+        if room is None:
+            return Response({'detail': 'No ArchivedRoom matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+        notes = ArchivedInterviewNote.objects.filter(room_id=room['id'], interviewer=request.user)
+        return Response({
+            **serializer.to_representation(room),
+            'notes': ArchivedInterviewNoteSerializer(notes, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+class ArchivedNotes(APIView):
+    """
+    The current user's archived notes, newest first, or those for one
+    archived room. Unlike ArchivedRoomDetail this is open to every
+    interviewer, not only the room's owner.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, room_id=None):
+        notes = ArchivedInterviewNote.objects.filter(interviewer=request.user).select_related('room')
+        if room_id is not None:
+            notes = notes.filter(room__room_id=room_id)
+        return Response(InterviewerArchivedNoteSerializer(notes, many=True).data, status=status.HTTP_200_OK)
+
+
+class InterviewRoomBulk(APIView):
+    """
+    Creates, closes or deletes up to ROOM_BULK_MAX_ITEMS rooms of the current
+    user per request. Each runs in one transaction with a fixed number of
+    queries: one lookup plus one INSERT or UPDATE; a delete runs one
+    statement per table it cascades to, one note UPDATE, the room DELETE and
+    the DeletedRoom writes.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = RoomBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['rooms']
+
+        try:
+            with transaction.atomic():
+                names = {item['name'] for item in items}
+                taken = set(Room.objects.filter(owner=request.user, name__in=names)
+                            .values_list('name', flat=True))
+
+                rooms, conflicts = [], []
+                for index, item in enumerate(items):
+                    name = item['name']
+                    if name in taken:
+                        conflicts.append({'index': index, 'name': name,
+                                          'detail': 'You already have a room with this name.'})
+                        continue
+                    taken.add(name)
+                    rooms.append(Room(owner=request.user, name=name))
+
+                created = Room.objects.bulk_create(rooms)
+        except IntegrityError:
+            # A concurrent request took one of the names after the lookup.
+            return Response({'detail': 'Room names changed during the request, retry.'},
+                            status=status.HTTP_409_CONFLICT)
+
+        data = {'created': InterviewRoomSerializer(created, many=True).data, 'conflicts': conflicts}
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_409_CONFLICT)
+
+    def patch(self, request):
+        serializer = RoomBulkCloseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        with transaction.atomic():
+            rooms = dict(Room.objects.select_for_update()
+                         .filter(owner=request.user, id__in=ids).values_list('id', 'room_id'))
+            # update() sends no post_save, so the public cache is cleared here.
+            Room.objects.filter(id__in=rooms).update(
+                is_closed=serializer.validated_data['is_closed'], updated_at=timezone.now())
+            transaction.on_commit(lambda: invalidate_public_rooms(rooms.values()))
+            if serializer.validated_data['is_closed']:
+                transaction.on_commit(publish_revocations)
+                rooms_closed([(id, room_id, request.user.pk) for id, room_id in rooms.items()])
+
+        return Response(self.bulk_result('updated', ids, rooms), status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        serializer = RoomBulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        with transaction.atomic():
+            rooms = dict(Room.objects.select_for_update()
+                         .filter(owner=request.user, id__in=ids).values_list('id', 'room_id'))
+            # Cascades to the rooms' code session rows and unlinks their notes
+            # (interview_room is SET_NULL); post_delete clears the public cache.
+            Room.objects.filter(id__in=rooms).delete()
+            record_deleted_rooms(rooms.values())
+
+        return Response(self.bulk_result('deleted', ids, rooms), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def bulk_result(key, ids, found):
+        return {key: [id for id in ids if id in found], 'not_found': [id for id in ids if id not in found]}
+
 class InterviewRoomDetail(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -45,13 +289,97 @@ class InterviewRoomDetail(APIView):
 
     def delete(self, request, id):
         room = self.get_object(request, id)
-        room.delete()
+        with transaction.atomic():
+            room.delete()
+            record_deleted_rooms([room.room_id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 class InterviewRoomPublicAccess(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, room_id):
-        room = get_object_or_404(Room, room_id=room_id, is_closed=False)
-        serializer = PublicInterviewRoomSerializer(room)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return self.room_response(request, get_public_room(room_id))
+
+    def room_response(self, request, entry):
+        if entry is None:
+            return Response({'detail': 'No Room matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = entry['etag']
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(entry['data'], status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        # Clients must revalidate so a closed room is noticed on the next load.
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class AsyncInterviewRoomPublicAccess(AsyncAPIView, InterviewRoomPublicAccess):
+    """InterviewRoomPublicAccess as served under ASGI"""
+
+    async def get(self, request, room_id):
+        return self.room_response(request, await aget_public_room(room_id))
+
+
+class InterviewRoomAdmission(APIView):
+    """
+    Issues a signed admission token for an open room (see
+    interview_rooms.admission). The owner is admitted as host, everyone
+    else as guest; ?role=guest lets the owner join as a guest. Served from
+    the public room cache, so it usually runs no queries.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, room_id):
+        query = self.parse_query(request)
+        return self.admission_response(request, query, get_public_room(room_id))
+
+    def parse_query(self, request):
+        query = AdmissionQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return query.validated_data
+
+    def admission_response(self, request, query, entry):
+        if entry is None:
+            return Response({'detail': 'No Room matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+        room = entry['data']
+
+        is_owner = request.user.is_authenticated and request.user.pk == room['owner']
+        role = query.get('role', 'host' if is_owner else 'guest')
+        if role == 'host' and not is_owner:
+            return Response({'detail': 'Only the room owner can join as host.'}, status=status.HTTP_403_FORBIDDEN)
+
+        token, payload = issue_admission_token(room, role)
+        response = Response({'token': token, 'role': role, 'expires_at': payload['exp']}, status=status.HTTP_200_OK)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class AsyncInterviewRoomAdmission(AsyncAPIView, InterviewRoomAdmission):
+    """InterviewRoomAdmission as served under ASGI"""
+
+    async def get(self, request, room_id):
+        query = self.parse_query(request)
+        return self.admission_response(request, query, await aget_public_room(room_id))
+
+
+class AdmissionRevocations(APIView):
+    """
+    The revocation list real-time nodes poll: {"revoked": {room_id:
+    closed_at}, "token_ttl": seconds}. Answers 304 to a matching
+    If-None-Match.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        revoked = get_revocations()
+        etag = '"{}"'.format(hashlib.md5(repr(sorted(revoked.items())).encode()).hexdigest())
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({'revoked': revoked, 'token_ttl': settings.ROOM_ADMISSION_TOKEN_TTL},
+                                status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
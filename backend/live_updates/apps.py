@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class LiveUpdatesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'live_updates'
+
+    def ready(self):
+        from live_updates import signals  # noqa: F401
@@ -0,0 +1,65 @@
+"""
+Pushes room and note changes (see live_updates.events) to the signed-in
+user's browser, so pages update in place instead of re-fetching.
+
+The socket authenticates like the REST API, from the access_token cookie,
+and joins the user's group; a handshake without a valid token is rejected.
+The socket is closed with code 4001 once the token expires, and the client
+reconnects after refreshing it. Nothing the client sends is acted on.
+"""
+import asyncio
+import time
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.http.cookie import parse_cookie
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend.authentication import CookieJWTAuthentication
+from live_updates.events import user_group
+from live_updates.fanout import fanout
+
+TOKEN_EXPIRED = 4001
+
+
+def authenticate(scope):
+    """The (user, validated token) of the scope's access_token cookie, or (None, None)"""
+    headers = dict(scope.get('headers', []))
+    raw_token = parse_cookie(headers.get(b'cookie', b'').decode('latin-1')).get('access_token')
+    if not raw_token:
+        return None, None
+    authentication = CookieJWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(token), token
+    except AuthenticationFailed:
+        return None, None
+
+
+class LiveUpdatesConsumer(AsyncWebsocketConsumer):
+    group = None
+    expiry = None
+
+    async def connect(self):
+        user, token = await database_sync_to_async(authenticate)(self.scope)
+        if user is None:
+            await self.close()
+            return
+        self.group = user_group(user.pk)
+        fanout.attach(asyncio.get_running_loop())
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        self.expiry = asyncio.get_running_loop().create_task(self.close_at(token['exp']))
+
+    async def disconnect(self, code):
+        if self.expiry is not None:
+            self.expiry.cancel()
+        if self.group is not None:
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def close_at(self, timestamp):
+        await asyncio.sleep(max(timestamp - time.time(), 0))
+        await self.close(code=TOKEN_EXPIRED)
+
+    async def live_event(self, message):
+        await self.send(text_data=message['text'])
@@ -0,0 +1,58 @@
+"""
+Change events pushed to signed-in users by live_updates.consumers.
+
+Each user has one group, "updates.user.<pk>", which receives the events of
+the rooms they own and the notes they wrote:
+
+    {"type": "room.closed", "id": ..., "room_id": ...}
+    {"type": "room.renamed", "id": ..., "room_id": ..., "name": ...}
+    {"type": "note.updated", "id": ..., "room_id": ..., "version": ...,
+     "length": ..., "updated_at": ...}
+
+id is the room's or note's primary key and room_id the room's UUID; a
+note's length counts the characters of its content. Events are published
+once the writing transaction commits and go through live_updates.fanout,
+which keeps only the latest of a burst for the same room or note.
+"""
+from django.db import transaction
+
+from live_updates.fanout import fanout
+
+
+def user_group(user_id):
+    return f'updates.user.{user_id}'
+
+
+def _publish(events):
+    """events are (user_id, key, event) triples"""
+    def publish():
+        for user_id, key, event in events:
+            fanout.publish(user_group(user_id), key, event)
+    transaction.on_commit(publish)
+
+
+def rooms_closed(rooms):
+    """Publishes room.closed for (id, room_id, owner_id) rows"""
+    _publish([(owner_id, ('room.closed', id), {'type': 'room.closed', 'id': id, 'room_id': room_id})
+              for id, room_id, owner_id in rooms])
+
+
+def room_renamed(room):
+    _publish([(room.owner_id, ('room.renamed', room.id),
+               {'type': 'room.renamed', 'id': room.id, 'room_id': room.room_id, 'name': room.name})])
+
+
+def notes_updated(notes):
+    """
+    Publishes note.updated for (id, room_id, interviewer_id, version, length,
+    updated_at) rows
+    """
+    _publish([(interviewer_id, ('note.updated', id), {
+        'type': 'note.updated', 'id': id, 'room_id': room_id, 'version': version,
+        'length': length, 'updated_at': updated_at,
+    }) for id, room_id, interviewer_id, version, length, updated_at in notes])
+
+
+def note_updated(note):
+    notes_updated([(note.id, note.room_id, note.interviewer_id, note.version, len(note.content),
+                    note.updated_at)])
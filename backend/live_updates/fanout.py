@@ -0,0 +1,117 @@
+"""
+Coalescing fan-out of live update events to channel-layer groups.
+
+publish() may be called from any thread. Events are keyed by (group, key);
+one published while an earlier one with the same key is still waiting
+replaces it, so a burst of saves to a note costs one message per
+LIVE_UPDATES_COALESCE_WINDOW instead of one per save. A daemon thread wakes
+on the first event after an idle spell, waits out the window and sends
+everything waiting; an idle process does no work at all.
+
+The in-memory channel layer belongs to the event loop its consumers run on,
+so consumers attach() that loop and sends are scheduled onto it. Without an
+attached loop (e.g. a WSGI worker publishing through Redis) the flushing
+thread sends itself.
+
+Delivery is best effort: a failed send is logged and dropped, and clients
+re-fetch what they show when they reconnect.
+
+Metrics, from LiveFanout.stats():
+    depth       events waiting for the next flush
+    published   events handed to publish()
+    coalesced   events replaced by a newer one before being sent
+    sent        group messages sent
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on waiting for the consumers' loop to take a flush.
+SEND_TIMEOUT = 10
+
+
+async def send_messages(messages):
+    layer = get_channel_layer()
+    for group, message in messages:
+        await layer.group_send(group, message)
+
+
+class LiveFanout:
+    def __init__(self, window=0.25):
+        self.window = window
+        self._pending = {}
+        self._loop = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {'published': 0, 'coalesced': 0, 'sent': 0}
+
+    def attach(self, loop):
+        """Sends from now on run on loop, the one the consumers are served from"""
+        self._loop = loop
+
+    def publish(self, group, key, event):
+        """Queues event, a JSON-serializable dict, for the group"""
+        with self._lock:
+            # Re-inserted so that a replaced event keeps the latest position.
+            if self._pending.pop((group, key), None) is not None:
+                self._stats['coalesced'] += 1
+            self._pending[(group, key)] = event
+            self._stats['published'] += 1
+        self._ensure_started()
+        self._wakeup.set()
+
+    def flush(self):
+        """Sends every waiting event; returns the number of group messages sent"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            # Encoded once here rather than by every receiving consumer.
+            messages = [(group, {'type': 'live.event', 'text': json.dumps(event, cls=DjangoJSONEncoder)})
+                        for (group, _), event in batch.items()]
+            loop = self._loop
+            if loop is not None and loop.is_running():
+                asyncio.run_coroutine_threadsafe(send_messages(messages), loop).result(SEND_TIMEOUT)
+            else:
+                async_to_sync(send_messages)(messages)
+            with self._lock:
+                self._stats['sent'] += len(messages)
+            return len(messages)
+
+    def stats(self):
+        with self._lock:
+            return {'depth': len(self._pending), **self._stats}
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-updates-fanout', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.window)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Live update fan-out failed; events dropped")
+
+
+fanout = LiveFanout(window=settings.LIVE_UPDATES_COALESCE_WINDOW)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from live_updates.consumers import LiveUpdatesConsumer
+
+websocket_urlpatterns = [
+    path('updates/', LiveUpdatesConsumer.as_asgi()),
+]
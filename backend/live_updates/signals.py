@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from interview_notes.models import InterviewNote
+from interview_rooms.models import Room
+from live_updates import events
+
+
+@receiver(post_save, sender=Room)
+def publish_room_changes(sender, instance, created, **kwargs):
+    # Compared with the values the instance was loaded with (Room.from_db);
+    # new instances have nothing to compare against.
+    loaded_name, loaded_closed = instance.loaded_state
+    instance.loaded_state = (instance.name, instance.is_closed)
+    if created:
+        return
+    if loaded_closed is False and instance.is_closed:
+        events.rooms_closed([(instance.id, instance.room_id, instance.owner_id)])
+    if loaded_name is not None and instance.name != loaded_name:
+        events.room_renamed(instance)
+
+
+@receiver(post_save, sender=InterviewNote)
+def publish_note_update(sender, instance, **kwargs):
+    events.note_updated(instance)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, TransactionTestCase
+
+from interview_notes.models import InterviewNote
+from interview_rooms.models import Room
+from live_updates.consumers import LiveUpdatesConsumer
+from live_updates.fanout import LiveFanout, fanout
+from user.models import User
+from user.tokens import UserRefreshToken
+
+
+def connect(cookie=''):
+    return ApplicationCommunicator(LiveUpdatesConsumer.as_asgi(), {
+        'type': 'websocket', 'path': '/updates/', 'query_string': b'',
+        'headers': [(b'cookie', cookie.encode())], 'subprotocols': [],
+    })
+
+
+class LiveFanoutTests(SimpleTestCase):
+    async def test_burst_for_one_key_is_sent_once_as_the_latest(self):
+        # A long window keeps the background thread out of the way.
+        coalescer = LiveFanout(window=60)
+        coalescer.attach(asyncio.get_running_loop())
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add('updates.user.1', channel)
+
+        coalescer.publish('updates.user.1', ('note.updated', 7), {'version': 1})
+        coalescer.publish('updates.user.1', ('room.closed', 1), {'type': 'room.closed'})
+        for version in (2, 3):
+            coalescer.publish('updates.user.1', ('note.updated', 7), {'version': version})
+        self.assertEqual(await sync_to_async(coalescer.flush)(), 2)
+
+        # The note's event is sent after the close that came before its latest save.
+        first, second = await layer.receive(channel), await layer.receive(channel)
+        self.assertEqual(json.loads(first['text']), {'type': 'room.closed'})
+        self.assertEqual(json.loads(second['text']), {'version': 3})
+        self.assertEqual(coalescer.stats(), {'depth': 0, 'published': 4, 'coalesced': 2, 'sent': 2})
+        await layer.group_discard('updates.user.1', channel)
+
+
+class LiveUpdatesConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='pw123456', full_name='Owner')
+        self.room = Room.objects.create(owner=self.owner, name='Backend round')
+        self.cookie = f'access_token={UserRefreshToken.for_user(self.owner).access_token}'
+        # Sends what earlier tests left waiting, before any socket listens.
+        fanout.flush()
+
+    async def open(self):
+        communicator = connect(self.cookie)
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEqual((await communicator.receive_output(2))['type'], 'websocket.accept')
+        return communicator
+
+    async def event(self, communicator):
+        await sync_to_async(fanout.flush)()
+        return json.loads((await communicator.receive_output(2))['text'])
+
+    async def test_rejects_sockets_without_a_valid_token(self):
+        for cookie in ('', 'access_token=nope'):
+            communicator = connect(cookie)
+            await communicator.send_input({'type': 'websocket.connect'})
+            self.assertEqual((await communicator.receive_output(2))['type'], 'websocket.close')
+
+    async def test_room_renamed_and_closed(self):
+        communicator = await self.open()
+
+        def update(**fields):
+            room = Room.objects.get(pk=self.room.pk)
+            for name, value in fields.items():
+                setattr(room, name, value)
+            room.save()
+
+        await database_sync_to_async(update)(name='Renamed')
+        self.assertEqual(await self.event(communicator), {
+            'type': 'room.renamed', 'id': self.room.pk, 'room_id': str(self.room.room_id), 'name': 'Renamed'})
+        await database_sync_to_async(update)(is_closed=True)
+        self.assertEqual(await self.event(communicator), {
+            'type': 'room.closed', 'id': self.room.pk, 'room_id': str(self.room.room_id)})
+        # Saving the closed room again is not another close.
+        await database_sync_to_async(update)(is_closed=True)
+        await sync_to_async(fanout.flush)()
+        self.assertTrue(await communicator.receive_nothing(0.2))
+
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(1)
+
+    async def test_note_updates_carry_version_and_length(self):
+        communicator = await self.open()
+
+        def save_note():
+            note = InterviewNote.objects.create(room_id=str(self.room.room_id), interviewer=self.owner,
+                                                content='first')
+            note.content = 'second draft'
+            note.save()
+            return note
+
+        note = await database_sync_to_async(save_note)()
+        event = await self.event(communicator)
+        # Both saves may land within one window and coalesce into the latest.
+        if event['version'] == 1:
+            event = await self.event(communicator)
+        self.assertEqual({key: event[key] for key in ('type', 'id', 'room_id', 'version', 'length')}, {
+            'type': 'note.updated', 'id': note.pk, 'room_id': str(self.room.room_id), 'version': 2,
+            'length': len('second draft')})
+
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(1)
@@ -0,0 +1,368 @@
+"""
+The signaling server of websocket/server.js as a Channels consumer, speaking
+Socket.IO over the websocket transport (see signaling.protocol) so the
+frontend's socket.io-client talks to either.
+
+Room and editor fan-out goes through channel-layer groups, so participants
+of one room may be connected to different nodes; presence lives in the
+store behind signaling.presence. Group names are "signal.<room_id>" for the
+call and "signal.<room_id>.code" for the code editor. Editor operations
+are also queued for code_sessions, which stores them in batches.
+
+Joining a room takes an admission token for it (interview_rooms.admission),
+whose role is the one requested; a room closed or deleted since the token
+was issued is left on the next heartbeat.
+"""
+import asyncio
+import json
+import re
+import secrets
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from code_execution.pool import RoomBusy, executor
+from code_execution.serializers import CodeRunSerializer
+from code_sessions.buffer import code_operations
+from code_sessions.ops import normalize_op
+from interview_rooms.admission import AdmissionError, get_revocations, verify_admission_token
+from interview_rooms.cache import aget_public_room
+from signaling import protocol
+from signaling.presence import get_presence, heartbeat
+
+ROOM_ID_RE = re.compile(r'[A-Za-z0-9_.-]{1,80}')
+# Number.MAX_SAFE_INTEGER, the end of the range a codeReset replaces
+MAX_SAFE_INTEGER = 2 ** 53 - 1
+# One id per process unless a node is given one in as_asgi(node_id=...).
+NODE_ID = uuid.uuid4().hex
+
+EVENTS = {
+    'joinRoom': 'join_room',
+    'ready': 'ready',
+    'needRenegotiate': 'need_renegotiate',
+    'offer': 'offer',
+    'answer': 'answer',
+    'ice-candidate': 'ice_candidate',
+    'connectionEstablished': 'connection_established',
+    'joinCodeEditor': 'join_code_editor',
+    'leaveCodeEditor': 'leave_code_editor',
+    'codeChange': 'code_change',
+    'languageChange': 'language_change',
+    'codeReset': 'code_reset',
+    'codeExecution': 'code_execution',
+    'debugRooms': 'debug_rooms',
+}
+
+
+def room_group(room_id):
+    return f'signal.{room_id}'
+
+
+def code_group(room_id):
+    return f'signal.{room_id}.code'
+
+
+class SignalingConsumer(AsyncWebsocketConsumer):
+    def __init__(self, *args, node_id=None, presence=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.node_id = node_id or NODE_ID
+        self.presence = presence or get_presence()
+
+    async def connect(self):
+        self.sid = secrets.token_urlsafe(15)
+        # room_id -> iat of the admission token it was joined with
+        self.rooms = {}
+        # room_id -> this socket's editor slot (see Presence.add_editor)
+        self.code_rooms = {}
+        self.tasks = set()
+        self.pong = asyncio.Event()
+        await self.accept()
+        await heartbeat.track(self.presence, self.node_id)
+        await self.send(protocol.open_packet(
+            self.sid, settings.SIGNALING_PING_INTERVAL, settings.SIGNALING_PING_TIMEOUT))
+        self.spawn(self.keepalive())
+
+    async def disconnect(self, code):
+        for task in list(self.tasks):
+            task.cancel()
+        for room_id in list(self.rooms):
+            left = await self.presence.leave(room_id, self.channel_name)
+            if left:
+                await self.presence.reset_negotiation(room_id)
+                await self.emit_to_room(room_group(room_id), 'resetConnection')
+                await self.emit_to_room(room_group(room_id), 'userLeft', {'socketId': self.sid})
+            await self.channel_layer.group_discard(room_group(room_id), self.channel_name)
+        for room_id, slot in list(self.code_rooms.items()):
+            user = await self.presence.remove_editor(room_id, slot)
+            if user is not None:
+                await self.emit_to_room(code_group(room_id), 'codeEditorUserLeft', user.get('id'))
+            await self.channel_layer.group_discard(code_group(room_id), self.channel_name)
+        heartbeat.forget(self.node_id)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        kind, value = protocol.parse(text_data)
+        if kind == 'pong':
+            self.pong.set()
+        elif kind == 'ping':
+            await self.send(protocol.EIO_PONG)
+        elif kind == 'connect':
+            await self.send(protocol.connect_packet(self.sid))
+        elif kind in ('disconnect', 'close'):
+            await self.close()
+        elif kind == 'event':
+            name, args = value
+            handler = EVENTS.get(name)
+            if handler is not None:
+                data = args[0] if args and isinstance(args[0], dict) else {}
+                await getattr(self, handler)(data)
+
+    # Sending
+
+    async def emit(self, event, *args):
+        await self.send(protocol.event_packet(event, *args))
+
+    async def emit_to_room(self, group, event, *args, include_self=False):
+        """socket.to(group).emit(), or io.to(group).emit() with include_self"""
+        await self.channel_layer.group_send(group, {
+            'type': 'signal.emit', 'event': event, 'args': list(args),
+            'exclude': None if include_self else self.channel_name,
+        })
+
+    async def emit_to(self, channel, event, *args):
+        await self.channel_layer.send(channel, {
+            'type': 'signal.emit', 'event': event, 'args': list(args), 'exclude': None,
+        })
+
+    async def signal_emit(self, message):
+        if message['exclude'] != self.channel_name:
+            await self.emit(message['event'], *message['args'])
+
+    # Background work
+
+    def spawn(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def later(self, delay, function, *args):
+        async def run():
+            await asyncio.sleep(delay)
+            await function(*args)
+        self.spawn(run())
+
+    async def keepalive(self):
+        """Engine.IO heartbeat; also keeps this socket's rooms from expiring"""
+        while True:
+            await asyncio.sleep(settings.SIGNALING_PING_INTERVAL)
+            self.pong.clear()
+            await self.send(protocol.EIO_PING)
+            try:
+                await asyncio.wait_for(self.pong.wait(), settings.SIGNALING_PING_TIMEOUT)
+            except asyncio.TimeoutError:
+                await self.close()
+                return
+            for room_id in {*self.rooms, *self.code_rooms}:
+                await self.presence.refresh(room_id, self.code_rooms.get(room_id))
+            if await self.room_closed():
+                await self.emit('roomClosed')
+                await self.close()
+                return
+
+    async def room_closed(self):
+        """Whether a room this socket was admitted to has been closed since"""
+        if not self.rooms:
+            return False
+        revoked = await sync_to_async(get_revocations)()
+        return any(revoked.get(room_id, -1) >= iat for room_id, iat in self.rooms.items())
+
+    # Video call
+
+    async def join_room(self, data):
+        room_id = data.get('roomId')
+        if not isinstance(room_id, str) or not ROOM_ID_RE.fullmatch(room_id):
+            return
+
+        # Verified with the same key the backend signs with, so unlike the
+        # Node relay this needs no ROOM_ADMISSION_KEY to be configured.
+        try:
+            admission = verify_admission_token(
+                str(data.get('token') or ''), room_id, await sync_to_async(get_revocations)())
+        except AdmissionError:
+            await self.emit('admissionDenied')
+            return
+        role, iat = admission['role'], admission['iat']
+
+        role, reset = await self.presence.join(room_id, role, self.node_id, self.channel_name)
+        if role is None:
+            await self.emit('roomFull')
+            return
+        if reset:
+            await self.presence.reset_negotiation(room_id)
+            await self.emit_to_room(room_group(room_id), 'resetConnection', include_self=True)
+
+        self.rooms[room_id] = iat
+        await self.channel_layer.group_add(room_group(room_id), self.channel_name)
+        await self.emit('roleAssigned', role)
+        await self.emit_to_room(room_group(room_id), 'userJoined', {'role': role, 'socketId': self.sid})
+        self.later(1, self.try_start_negotiation, room_id)
+
+    async def ready(self, data):
+        room_id = data.get('roomId')
+        if room_id not in self.rooms:
+            return
+        await self.presence.set_ready(room_id, data.get('role'))
+        self.later(0.5, self.try_start_negotiation, room_id)
+
+    async def try_start_negotiation(self, room_id):
+        if await self.presence.start_negotiation(room_id):
+            self.later(0.5, self.signal_host, room_id)
+
+    async def signal_host(self, room_id):
+        host = await self.presence.host(room_id)
+        if host:
+            await self.emit_to(host, 'startNegotiation')
+
+    async def need_renegotiate(self, data):
+        if data.get('roomId') in self.rooms:
+            await self.signal_host(data['roomId'])
+
+    async def relay(self, data, event, key):
+        """Relays to the call of a room this socket joined"""
+        if data.get('roomId') in self.rooms:
+            await self.emit_to_room(room_group(data['roomId']), event, data.get(key))
+
+    async def offer(self, data):
+        await self.relay(data, 'offer', 'offer')
+
+    async def answer(self, data):
+        await self.relay(data, 'answer', 'answer')
+
+    async def ice_candidate(self, data):
+        await self.relay(data, 'ice-candidate', 'candidate')
+
+    async def connection_established(self, data):
+        if data.get('roomId') in self.rooms:
+            await self.presence.refresh(data['roomId'])
+
+    # Code editor
+
+    async def join_code_editor(self, data):
+        room_id, user = data.get('roomId'), data.get('user')
+        if not isinstance(room_id, str) or not ROOM_ID_RE.fullmatch(room_id) or not isinstance(user, dict):
+            return
+        # The editor, and so code streaming and runs, is open only to sockets
+        # admitted to the room's call.
+        if room_id not in self.rooms:
+            await self.emit('admissionDenied')
+            return
+        if room_id in self.code_rooms:
+            await self.presence.remove_editor(room_id, self.code_rooms[room_id])
+        self.code_rooms[room_id], others = await self.presence.add_editor(room_id, self.channel_name, user)
+        await self.channel_layer.group_add(code_group(room_id), self.channel_name)
+        await self.emit_to_room(code_group(room_id), 'codeEditorUserJoined', user)
+        for other in others:
+            if other.get('id') != user.get('id'):
+                await self.emit('codeEditorUserJoined', other)
+
+    async def leave_code_editor(self, data):
+        room_id = data.get('roomId')
+        if room_id not in self.code_rooms:
+            return
+        await self.presence.remove_editor(room_id, self.code_rooms.pop(room_id))
+        await self.emit_to_room(code_group(room_id), 'codeEditorUserLeft', data.get('userId'))
+        await self.channel_layer.group_discard(code_group(room_id), self.channel_name)
+
+    def record(self, room_id, operation):
+        """Queues an editor operation for code_sessions; malformed ones are only relayed"""
+        try:
+            room_uuid = uuid.UUID(room_id)
+            op = normalize_op(operation, int(time.time() * 1000))
+        except ValueError:
+            return
+        code_operations.add(str(room_uuid), op)
+
+    async def code_change(self, data):
+        if data.get('roomId') in self.code_rooms:
+            change = data.get('change')
+            if isinstance(change, dict):
+                self.record(data['roomId'], {**change, 'type': 'change'})
+            await self.emit_to_room(code_group(data['roomId']), 'codeChange', change)
+
+    async def language_change(self, data):
+        if data.get('roomId') in self.code_rooms:
+            self.record(data['roomId'], {'type': 'language', 'language': data.get('language'),
+                                         'userId': data.get('userId')})
+            await self.emit_to_room(code_group(data['roomId']), 'languageChange',
+                                    {'language': data.get('language'), 'userId': data.get('userId')})
+
+    async def code_reset(self, data):
+        if data.get('roomId') in self.code_rooms:
+            self.record(data['roomId'], {'type': 'reset', 'code': data.get('code'), 'userId': data.get('userId')})
+            await self.emit_to_room(code_group(data['roomId']), 'codeChange', {
+                'range': {'startLineNumber': 1, 'startColumn': 1,
+                          'endLineNumber': MAX_SAFE_INTEGER, 'endColumn': 1},
+                'text': data.get('code'),
+                'timestamp': int(time.time() * 1000),
+                'userId': data.get('userId'),
+            })
+
+    async def code_execution(self, data):
+        if data.get('roomId') in self.code_rooms:
+            # Runs take seconds; the socket keeps relaying meanwhile.
+            self.spawn(self.execute_code(data['roomId'], data))
+
+    async def execute_code(self, room_id, data):
+        """Like executeCode in server.js, but on this node's executor"""
+        group = code_group(room_id)
+        serializer = CodeRunSerializer(data={'language': data.get('language'), 'code': data.get('code')})
+        if not serializer.is_valid():
+            await self.emit_to_room(group, 'codeExecutionResult',
+                                    {'error': f'Execution Error: {json.dumps(serializer.errors)}'},
+                                    include_self=True)
+            return
+        try:
+            uuid.UUID(room_id)
+        except ValueError:
+            room = None
+        else:
+            room = await aget_public_room(room_id)
+        if room is None:
+            await self.emit_to_room(group, 'codeExecutionResult',
+                                    {'error': 'Execution Error: No Room matches the given query.'}, include_self=True)
+            return
+        try:
+            run = executor.submit(room_id, **serializer.validated_data)
+        except RoomBusy:
+            await self.emit_to_room(group, 'codeExecutionResult',
+                                    {'error': 'Execution Error: Too many runs are queued for this room.'},
+                                    include_self=True)
+            return
+
+        output, errors, exit_event = [], [], None
+        lines = run.aiter_lines()
+        try:
+            async for line in lines:
+                event = json.loads(line)
+                if event['type'] == 'exit':
+                    exit_event = event
+                    continue
+                (output if event['type'] == 'stdout' else errors).append(event['data'])
+                await self.emit_to_room(group, 'codeExecutionOutput', event, include_self=True)
+        finally:
+            await sync_to_async(lines.close, thread_sensitive=False)()
+        if exit_event and exit_event['status'] not in ('ok', 'error'):
+            errors.append(f"\n[{exit_event['status']}]")
+        result = {'output': ''.join(output) or 'Code executed successfully (no output)'}
+        if errors:
+            result['error'] = ''.join(errors)
+        await self.emit_to_room(group, 'codeExecutionResult', result, include_self=True)
+
+    # Debugging
+
+    async def debug_rooms(self, data):
+        # The store is shared and not enumerable; report this socket's rooms.
+        rooms = {room_id: await self.presence.snapshot(room_id) for room_id in {*self.rooms, *self.code_rooms}}
+        await self.emit('debugInfo', {'rooms': rooms})
@@ -0,0 +1,23 @@
+import time
+
+from channels.layers import InMemoryChannelLayer
+
+
+class LocalChannelLayer(InMemoryChannelLayer):
+    """
+    InMemoryChannelLayer for a single signaling node. The stock layer sweeps
+    every channel and group for expired entries on each send and receive,
+    which makes a relay cost grow with the number of connected sockets; this
+    one sweeps at most once per SWEEP_INTERVAL seconds.
+    """
+    SWEEP_INTERVAL = 1.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._swept = 0.0
+
+    def _clean_expired(self):
+        now = time.monotonic()
+        if now - self._swept >= self.SWEEP_INTERVAL:
+            self._swept = now
+            super()._clean_expired()
@@ -0,0 +1,291 @@
+"""
+Room presence for the signaling consumer: the host and guest slots, their
+ready flags, whether negotiation has started, and the code editor's users.
+
+The rules are those of websocket/server.js; the state lives behind a small
+async key/value store chosen by SIGNALING_STATE_BACKEND:
+
+- "memory": a dict in this process, for a single signaling process.
+- "cache": the Django cache, shared by every node when CACHE_BACKEND is
+  Redis or Memcached (LocMemCache stands in for it in tests).
+
+Every key expires after SIGNALING_PRESENCE_TTL seconds unless a connected
+participant's heartbeat refreshes it, so abandoned rooms clean themselves
+up. Slots hold (node id, channel name) of the participant. Each node also
+refreshes a node key every SIGNALING_NODE_TTL / 3 seconds; a slot whose
+node key has expired belongs to a crashed node and is free to take, so
+after a failover clients can rejoin their old roles within
+SIGNALING_NODE_TTL seconds.
+"""
+import asyncio
+import time
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+ROLES = ('host', 'guest')
+
+
+class MemoryStore:
+    """Process-local store with per-key expiry"""
+
+    def __init__(self):
+        self._data = {}
+
+    def _get(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    async def get(self, key):
+        entry = self._get(key)
+        return None if entry is None else entry[0]
+
+    async def get_many(self, keys):
+        return {key: entry[0] for key in keys if (entry := self._get(key)) is not None}
+
+    async def set(self, key, value, timeout):
+        self._data[key] = (value, time.monotonic() + timeout)
+
+    async def add(self, key, value, timeout):
+        if self._get(key) is not None:
+            return False
+        self._data[key] = (value, time.monotonic() + timeout)
+        return True
+
+    async def touch(self, key, timeout):
+        entry = self._get(key)
+        if entry is not None:
+            self._data[key] = (entry[0], time.monotonic() + timeout)
+
+    async def incr(self, key, timeout):
+        entry = self._get(key) or (0, time.monotonic() + timeout)
+        self._data[key] = (entry[0] + 1, entry[1])
+        return entry[0] + 1
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+
+class CacheStore:
+    """The Django cache; add() and incr() are atomic on Redis and Memcached"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def get(self, key):
+        return await self.cache.aget(key)
+
+    async def get_many(self, keys):
+        return await self.cache.aget_many(keys)
+
+    async def set(self, key, value, timeout):
+        await self.cache.aset(key, value, timeout)
+
+    async def add(self, key, value, timeout):
+        return await self.cache.aadd(key, value, timeout)
+
+    async def touch(self, key, timeout):
+        await self.cache.atouch(key, timeout)
+
+    async def incr(self, key, timeout):
+        await self.cache.aadd(key, 0, timeout)
+        # BaseCache.aincr() is a get and a set; the backends' incr() is atomic.
+        return await sync_to_async(self.cache.incr)(key)
+
+    async def delete(self, key):
+        await self.cache.adelete(key)
+
+
+class Presence:
+    def __init__(self, store, ttl, node_ttl):
+        self.store = store
+        self.ttl = ttl
+        self.node_ttl = node_ttl
+
+    @staticmethod
+    def key(room_id, name):
+        return f'signal:{room_id}:{name}'
+
+    @staticmethod
+    def editor_key(room_id, slot):
+        return f'signal:{room_id}:editor:{slot}'
+
+    @staticmethod
+    def node_key(node):
+        return f'signal-node:{node}'
+
+    async def node_heartbeat(self, node):
+        await self.store.set(self.node_key(node), 1, self.node_ttl)
+
+    async def holders(self, room_id):
+        """{role: channel} for occupied slots whose node is alive"""
+        slots = await self.store.get_many([self.key(room_id, role) for role in ROLES])
+        slots = {role: slots[self.key(room_id, role)] for role in ROLES if self.key(room_id, role) in slots}
+        alive = await self.store.get_many([self.node_key(node) for node, _ in slots.values()])
+        return {role: channel for role, (node, channel) in slots.items() if self.node_key(node) in alive}
+
+    async def join(self, room_id, role, node, channel):
+        """
+        Seats channel as host or guest like joinRoom in server.js: a taken
+        host slot makes the joiner a guest, and a room with both slots taken
+        by others is full. Returns (role, reset), where reset says whether
+        negotiation must restart; role is None when the room is full.
+        """
+        for _ in range(3):
+            holders = await self.holders(room_id)
+            reset = holders.get(role) == channel
+
+            final = role
+            if role == 'host' and holders.get('host') not in (None, channel):
+                final = 'guest'
+            if final == 'guest' and holders.get('guest') not in (None, channel) and holders.get('host'):
+                return None, False
+            if holders.get(final) != channel:
+                reset = True
+
+            key = self.key(room_id, final)
+            if holders.get(final) is None:
+                if await self.store.get(key) is not None:
+                    # Held by a crashed node.
+                    await self.store.delete(key)
+                if not await self.store.add(key, (node, channel), self.ttl):
+                    continue
+            else:
+                await self.store.set(key, (node, channel), self.ttl)
+            await self.store.delete(self.key(room_id, f'{final}-ready'))
+            return final, reset
+        return None, False
+
+    async def set_ready(self, room_id, role):
+        if role not in ROLES:
+            role = 'guest'
+        await self.store.set(self.key(room_id, f'{role}-ready'), 1, self.ttl)
+
+    async def start_negotiation(self, room_id):
+        """Returns the host's channel if negotiation may start now, claiming it"""
+        holders = await self.holders(room_id)
+        if not (holders.get('host') and holders.get('guest')):
+            return None
+        ready = await self.store.get_many([self.key(room_id, f'{role}-ready') for role in ROLES])
+        if len(ready) < len(ROLES):
+            return None
+        if not await self.store.add(self.key(room_id, 'negotiating'), 1, self.ttl):
+            return None
+        return holders['host']
+
+    async def reset_negotiation(self, room_id):
+        await self.store.delete(self.key(room_id, 'negotiating'))
+
+    async def host(self, room_id):
+        return (await self.holders(room_id)).get('host')
+
+    async def leave(self, room_id, channel):
+        """Frees channel's slots in the room; returns the roles it held"""
+        slots = await self.store.get_many([self.key(room_id, role) for role in ROLES])
+        left = []
+        for role in ROLES:
+            if slots.get(self.key(room_id, role), (None, None))[1] == channel:
+                await self.store.delete(self.key(room_id, role))
+                await self.store.delete(self.key(room_id, f'{role}-ready'))
+                left.append(role)
+        return left
+
+    async def add_editor(self, room_id, channel, user):
+        """
+        Registers a code editor user in a slot key of its own, numbered by an
+        atomic counter, so joins and leaves on different nodes never
+        overwrite each other. Returns (slot, the room's other users).
+        """
+        slot = await self.store.incr(self.key(room_id, 'editor-seq'), self.ttl)
+        await self.store.set(self.editor_key(room_id, slot), (channel, user), self.ttl)
+        return slot, [other for other_channel, other in await self.editors(room_id) if other_channel != channel]
+
+    async def remove_editor(self, room_id, slot):
+        """Frees an editor slot; returns its user, or None if it had expired"""
+        entry = await self.store.get(self.editor_key(room_id, slot))
+        await self.store.delete(self.editor_key(room_id, slot))
+        return entry and entry[1]
+
+    async def editors(self, room_id):
+        """[(channel, user)] of the room's code editor users, in joining order"""
+        count = await self.store.get(self.key(room_id, 'editor-seq')) or 0
+        keys = [self.editor_key(room_id, slot) for slot in range(1, count + 1)]
+        entries = await self.store.get_many(keys)
+        return [entries[key] for key in keys if key in entries]
+
+    async def refresh(self, room_id, editor_slot=None):
+        """Keeps a room with a live participant, and its editor slot, from expiring"""
+        for name in (*ROLES, 'host-ready', 'guest-ready', 'negotiating', 'editor-seq'):
+            await self.store.touch(self.key(room_id, name), self.ttl)
+        if editor_slot is not None:
+            await self.store.touch(self.editor_key(room_id, editor_slot), self.ttl)
+
+    async def snapshot(self, room_id):
+        names = (*ROLES, 'host-ready', 'guest-ready', 'negotiating')
+        values = await self.store.get_many([self.key(room_id, name) for name in names])
+        state = {name: values.get(self.key(room_id, name)) for name in names}
+        state['editors'] = [user for _, user in await self.editors(room_id)]
+        return {
+            'host': state['host'] and state['host'][1],
+            'guest': state['guest'] and state['guest'][1],
+            'hostReady': bool(state['host-ready']),
+            'guestReady': bool(state['guest-ready']),
+            'negotiationStarted': bool(state['negotiating']),
+            'codeEditorUsers': state['editors'],
+        }
+
+
+class NodeHeartbeat:
+    """
+    Refreshes the node keys of the nodes served by this process, for as long
+    as a socket tracks them: every track() is paired with a forget().
+    """
+
+    def __init__(self):
+        # node -> sockets connected through it
+        self.nodes = {}
+        self._task = None
+        self._loop = None
+
+    async def track(self, presence, node):
+        if node not in self.nodes:
+            self.nodes[node] = 0
+            await presence.node_heartbeat(node)
+        self.nodes[node] += 1
+        self.presence = presence
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task.done():
+            self._loop = loop
+            self._task = loop.create_task(self.run())
+
+    def forget(self, node):
+        if node in self.nodes:
+            self.nodes[node] -= 1
+            if not self.nodes[node]:
+                del self.nodes[node]
+
+    async def beat(self):
+        for node in list(self.nodes):
+            await self.presence.node_heartbeat(node)
+
+    async def run(self):
+        while True:
+            await self.beat()
+            await asyncio.sleep(self.presence.node_ttl / 3)
+
+
+heartbeat = NodeHeartbeat()
+
+
+@lru_cache(maxsize=None)
+def get_presence():
+    if settings.SIGNALING_STATE_BACKEND == 'cache':
+        store = CacheStore(cache)
+    else:
+        store = MemoryStore()
+    return Presence(store, settings.SIGNALING_PRESENCE_TTL, settings.SIGNALING_NODE_TTL)
@@ -0,0 +1,70 @@
+"""
+The subset of Engine.IO v4 / Socket.IO v5 framing the signaling consumer
+speaks, enough for socket.io-client 4 over the websocket transport
+(`io(url, {transports: ['websocket']})`): the handshake, ping/pong, events
+on the default namespace and disconnect. No long-polling, acks or binary
+attachments; the signaling protocol uses none of them.
+"""
+import json
+
+# Engine.IO packet types
+EIO_OPEN, EIO_CLOSE, EIO_PING, EIO_PONG, EIO_MESSAGE = '0', '1', '2', '3', '4'
+# Socket.IO packet types, inside an Engine.IO message
+SIO_CONNECT, SIO_DISCONNECT, SIO_EVENT = '0', '1', '2'
+
+MAX_PAYLOAD = 1_000_000
+
+
+def open_packet(sid, ping_interval, ping_timeout):
+    return EIO_OPEN + json.dumps({
+        'sid': sid,
+        'upgrades': [],
+        'pingInterval': int(ping_interval * 1000),
+        'pingTimeout': int(ping_timeout * 1000),
+        'maxPayload': MAX_PAYLOAD,
+    })
+
+
+def connect_packet(sid):
+    return EIO_MESSAGE + SIO_CONNECT + json.dumps({'sid': sid})
+
+
+def event_packet(event, *args):
+    return EIO_MESSAGE + SIO_EVENT + json.dumps([event, *args], separators=(',', ':'))
+
+
+def parse(text):
+    """
+    Returns (kind, value) for a client frame: ('ping'|'pong'|'close', None),
+    ('connect', None), ('disconnect', None), ('event', (name, args)), or
+    (None, None) for anything this server does not handle.
+    """
+    if not text:
+        return None, None
+    if text[0] == EIO_PONG:
+        return 'pong', None
+    if text[0] == EIO_PING:
+        return 'ping', None
+    if text[0] == EIO_CLOSE:
+        return 'close', None
+    if text[0] != EIO_MESSAGE or len(text) < 2:
+        return None, None
+
+    kind, body = text[1], text[2:]
+    if kind == SIO_CONNECT:
+        return 'connect', None
+    if kind == SIO_DISCONNECT:
+        return 'disconnect', None
+    if kind != SIO_EVENT:
+        return None, None
+    # Default namespace only; an ack id (digits) may precede the array.
+    start = body.find('[')
+    if start < 0 or not body[:start].isdigit() and start:
+        return None, None
+    try:
+        payload = json.loads(body[start:])
+    except ValueError:
+        return None, None
+    if not isinstance(payload, list) or not payload or not isinstance(payload[0], str):
+        return None, None
+    return 'event', (payload[0], payload[1:])
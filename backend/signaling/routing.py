@@ -0,0 +1,7 @@
+from django.urls import path
+
+from signaling.consumers import SignalingConsumer
+
+websocket_urlpatterns = [
+    path('socket.io/', SignalingConsumer.as_asgi()),
+]
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import time
+import uuid
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from interview_rooms.admission import REVOCATIONS_KEY, issue_admission_token
+from signaling.consumers import SignalingConsumer
+from signaling.presence import CacheStore, MemoryStore, Presence, heartbeat
+
+
+class Client:
+    """A socket.io-client over the websocket transport, driven by hand"""
+
+    def __init__(self, application):
+        self.communicator = ApplicationCommunicator(application, {
+            'type': 'websocket', 'path': '/socket.io/', 'query_string': b'EIO=4&transport=websocket',
+            'headers': [], 'subprotocols': [],
+        })
+
+    async def connect(self):
+        await self.communicator.send_input({'type': 'websocket.connect'})
+        self.assert_equal((await self.communicator.receive_output(1))['type'], 'websocket.accept')
+        self.sid = json.loads((await self.receive())[1:])['sid']
+        await self.send('40')
+        self.assert_equal((await self.receive())[:2], '40')
+        return self
+
+    @staticmethod
+    def assert_equal(first, second):
+        assert first == second, (first, second)
+
+    async def send(self, text):
+        await self.communicator.send_input({'type': 'websocket.receive', 'text': text})
+
+    async def receive(self, timeout=1):
+        return (await self.communicator.receive_output(timeout))['text']
+
+    async def emit(self, event, data):
+        await self.send('42' + json.dumps([event, data]))
+
+    async def event(self, timeout=2):
+        """The next event as [name, *args], skipping Engine.IO pings"""
+        while True:
+            text = await self.receive(timeout)
+            if text.startswith('42'):
+                return json.loads(text[2:])
+
+    async def events_until(self, name, timeout=3):
+        seen = []
+        while not seen or seen[-1][0] != name:
+            seen.append(await self.event(timeout))
+        return seen
+
+    async def disconnect(self):
+        await self.communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await self.communicator.wait(1)
+
+
+class SignalingConsumerTests(SimpleTestCase):
+    def setUp(self):
+        self.presence = Presence(MemoryStore(), ttl=60, node_ttl=10)
+        self.application = SignalingConsumer.as_asgi(presence=self.presence)
+        self.room_id = str(uuid.uuid4())
+        # An empty revocation list, without a database.
+        cache.set(REVOCATIONS_KEY, {})
+        self.addCleanup(cache.delete, REVOCATIONS_KEY)
+
+    def token(self, role):
+        return issue_admission_token({'room_id': self.room_id}, role)[0]
+
+    async def join(self, role, application=None):
+        client = await Client(application or self.application).connect()
+        await client.emit('joinRoom', {'roomId': self.room_id, 'token': self.token(role)})
+        return client
+
+    async def test_roles_offer_relay_and_negotiation(self):
+        host = await self.join('host')
+        self.assertIn(['roleAssigned', 'host'], await host.events_until('roleAssigned'))
+        # A second "host" is seated as the guest.
+        guest = await self.join('host')
+        self.assertIn(['roleAssigned', 'guest'], await guest.events_until('roleAssigned'))
+        self.assertEqual((await host.events_until('userJoined'))[-1][1]['role'], 'guest')
+
+        for client, role in ((host, 'host'), (guest, 'guest')):
+            await client.emit('ready', {'roomId': self.room_id, 'role': role})
+        await host.events_until('startNegotiation')
+
+        await host.emit('offer', {'roomId': self.room_id, 'offer': {'type': 'offer', 'sdp': 'v=0'}})
+        self.assertEqual((await guest.events_until('offer'))[-1], ['offer', {'type': 'offer', 'sdp': 'v=0'}])
+        await guest.emit('ice-candidate', {'roomId': self.room_id, 'candidate': {'candidate': 'c'}})
+        self.assertEqual((await host.events_until('ice-candidate'))[-1], ['ice-candidate', {'candidate': 'c'}])
+
+        await host.disconnect()
+        await guest.disconnect()
+
+    async def test_relays_only_to_joined_rooms(self):
+        host, guest = await self.join('host'), await self.join('guest')
+        await host.events_until('roleAssigned')
+        await guest.events_until('roleAssigned')
+        outsider = await Client(self.application).connect()
+
+        await outsider.emit('offer', {'roomId': self.room_id, 'offer': 'forged'})
+        await host.emit('offer', {'roomId': self.room_id, 'offer': 'sdp'})
+        self.assertEqual((await guest.events_until('offer'))[-1], ['offer', 'sdp'])
+
+        for client in (host, guest, outsider):
+            await client.disconnect()
+
+    async def test_join_requires_a_valid_admission_token(self):
+        client = await Client(self.application).connect()
+        for token in (None, 'forged', issue_admission_token({'room_id': 'another-room'}, 'host')[0]):
+            await client.emit('joinRoom', {'roomId': self.room_id, 'role': 'host', 'token': token})
+            self.assertEqual(await client.event(), ['admissionDenied'])
+
+        token = self.token('guest')
+        cache.set(REVOCATIONS_KEY, {self.room_id: int(time.time())})
+        await client.emit('joinRoom', {'roomId': self.room_id, 'token': token})
+        self.assertEqual(await client.event(), ['admissionDenied'])
+        await client.disconnect()
+
+    async def test_code_editor_requires_admission_to_the_room(self):
+        # Not a UUID, so the editor operations are relayed but not stored.
+        self.room_id = 'admission-room'
+        host, guest = await self.join('host'), await self.join('guest')
+        await host.events_until('roleAssigned')
+        await guest.events_until('roleAssigned')
+        for client, name in ((host, 'Host'), (guest, 'Guest')):
+            await client.emit('joinCodeEditor', {'roomId': self.room_id, 'user': {'id': name, 'name': name}})
+        self.assertEqual((await host.events_until('codeEditorUserJoined'))[-1][1]['id'], 'Guest')
+
+        outsider = await Client(self.application).connect()
+        await outsider.emit('joinRoom', {'roomId': self.room_id, 'role': 'guest', 'token': 'forged'})
+        self.assertEqual(await outsider.event(), ['admissionDenied'])
+        await outsider.emit('joinCodeEditor', {'roomId': self.room_id, 'user': {'id': 'Outsider'}})
+        self.assertEqual(await outsider.event(), ['admissionDenied'])
+        await outsider.emit('codeChange', {'roomId': self.room_id, 'change': {'text': 'forged'}})
+        await outsider.emit('codeExecution', {'roomId': self.room_id, 'language': 'python', 'code': 'print(1)'})
+
+        await guest.emit('codeChange', {'roomId': self.room_id, 'change': {'text': 'x'}})
+        self.assertEqual((await host.events_until('codeChange'))[-1], ['codeChange', {'text': 'x'}])
+
+        for client in (host, guest, outsider):
+            await client.disconnect()
+
+    async def test_full_room_and_disconnect_frees_slot(self):
+        host, guest = await self.join('host'), await self.join('guest')
+        await host.events_until('roleAssigned')
+        await guest.events_until('roleAssigned')
+        third = await self.join('guest')
+        self.assertEqual(await third.event(), ['roomFull'])
+
+        await guest.disconnect()
+        self.assertEqual((await host.events_until('userLeft'))[-1][1], {'socketId': guest.sid})
+        await third.emit('joinRoom', {'roomId': self.room_id, 'token': self.token('guest')})
+        self.assertIn(['roleAssigned', 'guest'], await third.events_until('roleAssigned'))
+
+        await host.disconnect()
+        await third.disconnect()
+
+    async def test_failover_to_another_node(self):
+        # Two nodes sharing a store; LocMemCache stands in for Redis.
+        presence = Presence(CacheStore(LocMemCache(f'signal-{self.room_id}', {})), ttl=60, node_ttl=10)
+        node_a = SignalingConsumer.as_asgi(node_id='node-a', presence=presence)
+        node_b = SignalingConsumer.as_asgi(node_id='node-b', presence=presence)
+
+        host = await self.join('host', node_a)
+        await host.events_until('roleAssigned')
+        guest = await self.join('host', node_b)
+        self.assertIn(['roleAssigned', 'guest'], await guest.events_until('roleAssigned'))
+
+        # Node A dies without running any disconnect handlers: its heartbeat
+        # stops and its node key expires.
+        heartbeat.forget('node-a')
+        await presence.store.delete(presence.node_key('node-a'))
+        host.communicator.future.cancel()
+
+        # The host reconnects to node B and gets the host slot back.
+        rejoined = await self.join('host', node_b)
+        self.assertIn(['roleAssigned', 'host'], await rejoined.events_until('roleAssigned'))
+        await rejoined.emit('offer', {'roomId': self.room_id, 'offer': 'sdp'})
+        self.assertEqual((await guest.events_until('offer'))[-1], ['offer', 'sdp'])
+
+        await rejoined.disconnect()
+        await guest.disconnect()
+        await asyncio.sleep(0)
+
+
+class PresenceTests(SimpleTestCase):
+    async def test_concurrent_editor_joins_and_leaves_are_all_kept(self):
+        # Two nodes sharing a store; LocMemCache stands in for Redis.
+        store = CacheStore(LocMemCache('presence-editors', {}))
+        nodes = [Presence(store, ttl=60, node_ttl=10) for _ in range(2)]
+        joined = await asyncio.gather(*(
+            nodes[index % 2].add_editor('room', f'channel-{index}', {'id': index}) for index in range(10)))
+        self.assertEqual(sorted(user['id'] for _, user in await nodes[0].editors('room')), list(range(10)))
+
+        await asyncio.gather(*(nodes[index % 2].remove_editor('room', slot)
+                               for index, (slot, _) in enumerate(joined) if index % 2))
+        self.assertEqual([user['id'] for _, user in await nodes[1].editors('room')], [0, 2, 4, 6, 8])
+
+    async def test_node_heartbeat_lasts_while_a_socket_tracks_it(self):
+        presence = Presence(MemoryStore(), ttl=60, node_ttl=10)
+        for _ in range(2):
+            await heartbeat.track(presence, 'tracked-node')
+        heartbeat.forget('tracked-node')
+        self.assertIn('tracked-node', heartbeat.nodes)
+        heartbeat.forget('tracked-node')
+        self.assertNotIn('tracked-node', heartbeat.nodes)
@@ -0,0 +1,26 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+from .passwords import acheck_password, ahash_password
+
+
+class PooledHashModelBackend(ModelBackend):
+    """
+    ModelBackend whose async path hashes on the password-hash pool instead
+    of the event loop, for django.contrib.auth.aauthenticate().
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await User._default_manager.aget_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash anyway so a missing account takes as long as a wrong password.
+            await ahash_password(password)
+            return None
+        if await acheck_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,66 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class UserCache:
+    """
+    Bounded, per-process LRU cache of User rows with a TTL on every entry.
+
+    The TTL caps how long another worker process can serve a stale row,
+    since invalidation signals only reach the process that saved the user.
+    They are only sent by Model.save() and delete(): code that changes users
+    with QuerySet.update() or bulk_update() must call invalidate() for each
+    of them, or this process serves the old row until the TTL runs out.
+    Callers get their own copy of a cached row, as requests on other threads
+    may be reading the same entry.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.copy(user)
+
+    def set(self, user):
+        if self.maxsize <= 0:
+            return
+        key = str(user.pk)
+        with self._lock:
+            self._entries[key] = (copy.copy(user), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL,
+)
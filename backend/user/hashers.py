@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+# The algorithm names are unchanged, so hashes written with other parameters
+# still verify and are re-encoded with the current ones on the next login
+# (Django compares the stored parameters in must_update).
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = settings.SCRYPT_WORK_FACTOR
+    block_size = settings.SCRYPT_BLOCK_SIZE
+    parallelism = settings.SCRYPT_PARALLELISM
+    # hashlib refuses to use more than 32 MiB unless told otherwise. This is
+    # only a ceiling: the memory used follows the parameters stored with each
+    # hash, so hashes from a larger work factor keep verifying after a
+    # downgrade.
+    maxmem = 512 * 1024 * 1024
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.PBKDF2_ITERATIONS
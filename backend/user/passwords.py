@@ -0,0 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+# hashlib.scrypt, pbkdf2_hmac and argon2-cffi release the GIL, so these
+# threads hash in parallel on separate cores.
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,
+                               thread_name_prefix='password-hash')
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def ahash_password(raw_password):
+    return await _run(make_password, raw_password)
+
+
+def _verify(raw_password, encoded):
+    """Returns (matches, needs_rehash) without saving anything"""
+    outdated = []
+    matches = check_password(raw_password, encoded, setter=outdated.append)
+    return matches, bool(outdated)
+
+
+async def acheck_password(user, raw_password):
+    """
+    User.acheck_password with the hash work done on the password-hash pool.
+    Upgrades an outdated hash in place like check_password does.
+    """
+    matches, needs_rehash = await _run(_verify, raw_password, user.password)
+    if matches and needs_rehash:
+        user.password = await ahash_password(raw_password)
+        await user.asave(update_fields=['password'])
+    return matches
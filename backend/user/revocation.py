@@ -0,0 +1,145 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from backend.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+
+def denylist_key(jti):
+    return f'jwt-deny:{jti}'
+
+
+def is_revoked(jti, exp):
+    """
+    Checks the cache denylist, then the BlacklistedToken rows on a miss: an
+    evicted entry or a token blacklisted in "db" mode leave the denylist
+    without the jti. Either answer from the table is cached for the token's
+    remaining lifetime, so each token costs at most one query; revoke()
+    overwrites a cached "not revoked".
+    """
+    revoked = cache.get(denylist_key(jti))
+    if revoked is not None:
+        return bool(revoked)
+    if BlacklistedToken.objects.filter(token__jti=jti).exists():
+        revoke(jti, exp)
+        return True
+    # add(), not set(): a revoke() since the query must not be overwritten.
+    cache.add(denylist_key(jti), 0, remaining_lifetime(exp))
+    return False
+
+
+def revoke(jti, exp):
+    """Denies the token until it would have expired anyway"""
+    cache.set(denylist_key(jti), 1, remaining_lifetime(exp))
+
+
+def remaining_lifetime(exp):
+    return max(1, int(exp - time.time()) + 1)
+
+
+class BatchedTokenWriter(WriteBehindBuffer):
+    """
+    Queues OutstandingToken and BlacklistedToken rows and writes them from a
+    daemon thread every `interval` seconds with bulk inserts, so login and
+    logout never wait on the token tables. Rows are an audit trail only;
+    revocation checks read the cache denylist first. Queued rows are flushed
+    at interpreter exit and lost on a hard kill.
+
+    A batch that fails is retried row by row, so one bad row cannot hold
+    back the others; a row still failing after `max_attempts` flushes is
+    logged and dropped.
+    """
+
+    name = 'token-writer'
+
+    def __init__(self, interval=2.0, max_attempts=5):
+        super().__init__(interval)
+        self.max_attempts = max_attempts
+        self._outstanding = []
+        self._blacklisted = []
+
+    def outstand(self, token, user_id):
+        with self._lock:
+            self._outstanding.append((token, user_id, 0))
+        self._ensure_started()
+
+    def blacklist(self, token, user_id):
+        with self._lock:
+            self._blacklisted.append((token, user_id, 0))
+        self._ensure_started()
+
+    def depth(self):
+        with self._lock:
+            return len(self._outstanding) + len(self._blacklisted)
+
+    def flush(self):
+        """Writes the queued rows, returning how many of each were written"""
+        with self._flush_lock:
+            with self._lock:
+                outstanding, self._outstanding = self._outstanding, []
+                blacklisted, self._blacklisted = self._blacklisted, []
+            try:
+                self._write(outstanding, blacklisted)
+            except Exception:
+                logger.warning("Batched token write failed, retrying row by row", exc_info=True)
+            else:
+                return len(outstanding), len(blacklisted)
+
+            failed_outstanding = [entry for entry in outstanding if not self._write_one([entry], [])]
+            failed_blacklisted = [entry for entry in blacklisted if not self._write_one([], [entry])]
+            with self._lock:
+                self._outstanding[:0] = self._retry(failed_outstanding)
+                self._blacklisted[:0] = self._retry(failed_blacklisted)
+            return len(outstanding) - len(failed_outstanding), len(blacklisted) - len(failed_blacklisted)
+
+    def _write_one(self, outstanding, blacklisted):
+        try:
+            with transaction.atomic():
+                self._write(outstanding, blacklisted)
+        except Exception:
+            logger.warning("Token row write failed", exc_info=True)
+            return False
+        return True
+
+    def _retry(self, entries):
+        retry = []
+        for token, user_id, attempts in entries:
+            if attempts + 1 < self.max_attempts:
+                retry.append((token, user_id, attempts + 1))
+            else:
+                logger.error("Dropping token row for jti %s after %d failed writes",
+                             token.payload.get('jti'), attempts + 1)
+        return retry
+
+    def _write(self, outstanding, blacklisted):
+        # Blacklisted tokens are outstanded too: one issued before the fast
+        # path was enabled has no row yet.
+        rows = [
+            OutstandingToken(
+                jti=token.payload['jti'],
+                user_id=user_id,
+                token=str(token),
+                created_at=token.current_time,
+                expires_at=datetime_from_epoch(token.payload['exp']),
+            )
+            for token, user_id, _ in outstanding + blacklisted
+        ]
+        if rows:
+            OutstandingToken.objects.bulk_create(rows, ignore_conflicts=True)
+        if blacklisted:
+            jtis = [token.payload['jti'] for token, _, _ in blacklisted]
+            ids = OutstandingToken.objects.filter(jti__in=jtis).values_list('id', flat=True)
+            BlacklistedToken.objects.bulk_create(
+                [BlacklistedToken(token_id=token_id) for token_id in ids],
+                ignore_conflicts=True,
+            )
+
+
+token_writer = BatchedTokenWriter(interval=settings.JWT_TOKEN_WRITE_INTERVAL)
@@ -10,6 +10,17 @@ class UserRegisterSerializer(serializers.ModelSerializer):
 
 
     def create(self, validated_data):
+        # RegisterView hashes on its worker pool and passes the result in.
+        password_hash = validated_data.pop('password_hash', None)
+        if password_hash is not None:
+            user = User(
+                email=User.objects.normalize_email(validated_data['email']),
+                full_name=validated_data['full_name'],
+                password=password_hash,
+            )
+            user.save()
+            return user
+
         user = User.objects.create_user(
             email=validated_data['email'],
             full_name=validated_data['full_name'],
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_on_save(sender, instance, **kwargs):
+    # Any save may flip is_active or replace the password hash, so the
+    # cached row is dropped unconditionally rather than diffed.
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_delete(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
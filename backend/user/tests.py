@@ -1,3 +1,231 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.hashers import check_password, get_hashers, make_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.async_views import served_view
+from backend.authentication import CookieJWTAuthentication
+from user.cache import user_cache
+from user.models import User
+from user.revocation import BatchedTokenWriter, denylist_key, revoke
+from user.tokens import UserRefreshToken
+from user.views import AsyncLoginView, AsyncRegisterView, LoginView, RegisterView
+
+
+class CookieJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='auth@example.com', password='pw123456', full_name='Auth User')
+
+    def setUp(self):
+        user_cache.clear()
+        self.token = str(UserRefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self):
+        request = RequestFactory().get('/')
+        request.COOKIES['access_token'] = self.token
+        return CookieJWTAuthentication().authenticate(request)[0]
+
+    @override_settings(AUTH_USER_RESOLUTION='db')
+    def test_db_mode_loads_the_row_every_time(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.authenticate().pk, self.user.pk)
+
+    @override_settings(AUTH_USER_RESOLUTION='cached')
+    def test_cached_mode_loads_the_row_once_and_hands_out_copies(self):
+        with self.assertNumQueries(1):
+            first = self.authenticate()
+        with self.assertNumQueries(0):
+            second = self.authenticate()
+        self.assertEqual(second.pk, self.user.pk)
+        self.assertIsNot(first, second)
+        second.full_name = 'Changed by one request'
+        self.assertEqual(self.authenticate().full_name, 'Auth User')
+
+    @override_settings(AUTH_USER_RESOLUTION='cached')
+    def test_cached_row_is_dropped_on_save_and_delete(self):
+        self.authenticate()
+        self.user.full_name = 'Renamed'
+        self.user.save()
+        self.assertIsNone(user_cache.get(self.user.pk))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate().full_name, 'Renamed')
+
+        self.user.delete()
+        self.assertIsNone(user_cache.get(self.user.pk))
+
+    @override_settings(AUTH_USER_RESOLUTION='stateless')
+    def test_stateless_mode_builds_the_user_from_claims(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual((user.pk, user.email, user.full_name), (self.user.pk, 'auth@example.com', 'Auth User'))
+        self.assertFalse(user._state.adding)
+
+    @override_settings(AUTH_USER_RESOLUTION='stateless')
+    def test_stateless_mode_loads_the_row_without_user_claims(self):
+        token = AccessToken.for_user(self.user)
+        self.assertNotIn('email', token)
+        self.token = str(token)
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        self.assertEqual((user.pk, user.email, user.full_name), (self.user.pk, 'auth@example.com', 'Auth User'))
+
+    @override_settings(AUTH_USER_RESOLUTION='cached')
+    def test_cached_row_needs_explicit_invalidation_after_queryset_update(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(full_name='Bulk renamed')
+        self.assertEqual(self.authenticate().full_name, 'Auth User')
+        user_cache.invalidate(self.user.pk)
+        self.assertEqual(self.authenticate().full_name, 'Bulk renamed')
+
+
+class TokenRevocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='revoke@example.com', password='pw123456', full_name='Revoke')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_mode_falls_back_to_the_blacklist_table(self):
+        # Blacklisted in another process: the row exists, this cache has no entry.
+        with override_settings(JWT_REVOCATION_MODE='db'):
+            token = UserRefreshToken.for_user(self.user)
+            token.blacklist()
+
+        with override_settings(JWT_REVOCATION_MODE='cache'):
+            with self.assertNumQueries(1), self.assertRaises(TokenError):
+                token.check_blacklist()
+            self.assertIsNotNone(cache.get(denylist_key(token['jti'])))
+            with self.assertNumQueries(0), self.assertRaises(TokenError):
+                token.check_blacklist()
+
+            with override_settings(JWT_REVOCATION_MODE='db'):
+                live = UserRefreshToken.for_user(self.user)
+            with self.assertNumQueries(1):
+                live.check_blacklist()
+            # Not revoked is remembered too, until revoke() replaces it.
+            with self.assertNumQueries(0):
+                live.check_blacklist()
+            revoke(live['jti'], live['exp'])
+            with self.assertNumQueries(0), self.assertRaises(TokenError):
+                live.check_blacklist()
+
+    def test_writer_isolates_a_failing_row_and_drops_it_eventually(self):
+        writer = BatchedTokenWriter(interval=3600, max_attempts=2)
+        good, bad = UserRefreshToken(), UserRefreshToken()
+        del bad['exp']
+        writer.outstand(good, self.user.pk)
+        writer.outstand(bad, self.user.pk)
+        writer.blacklist(good, self.user.pk)
+
+        with self.assertLogs('user.revocation', 'WARNING'):
+            self.assertEqual(writer.flush(), (1, 1))
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=good['jti']).exists())
+
+        with self.assertLogs('user.revocation', 'ERROR'):
+            self.assertEqual(writer.flush(), (0, 0))
+        self.assertEqual(writer.flush(), (0, 0))
+        self.assertFalse(OutstandingToken.objects.filter(jti=bad['jti']).exists())
+
+    def test_prunetokens_deletes_expired_rows_in_batches(self):
+        now = timezone.now()
+        for index in range(3):
+            expired = OutstandingToken.objects.create(
+                user=self.user, jti=f'expired-{index}', token='x', expires_at=now - timedelta(minutes=1))
+            if index:
+                BlacklistedToken.objects.create(token=expired)
+        OutstandingToken.objects.create(user=self.user, jti='live', token='x', expires_at=now + timedelta(days=1))
+
+        out = StringIO()
+        call_command('prunetokens', '--batch-size', '2', stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Deleted 3 outstanding and 2 blacklisted tokens")
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class AsyncLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='login@example.com', password='pw123456', full_name='Login')
+
+    async def test_login_goes_through_the_backends_and_signals(self):
+        failures = []
+
+        def record(sender, credentials, **kwargs):
+            failures.append(credentials['email'])
+
+        user_login_failed.connect(record)
+        self.addCleanup(user_login_failed.disconnect, record)
+
+        async def login(email, password):
+            request = AsyncRequestFactory().post('/auth/login/', {'email': email, 'password': password},
+                                                 content_type='application/json')
+            return await AsyncLoginView.as_view()(request)
+
+        response = await login('login@example.com', 'pw123456')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.cookies)
+
+        for email, password in (('login@example.com', 'wrong'), ('nobody@example.com', 'pw123456')):
+            self.assertEqual((await login(email, password)).status_code, 401)
+        self.assertEqual(failures, ['login@example.com', 'nobody@example.com'])
+
+    async def test_async_register(self):
+        request = AsyncRequestFactory().post(
+            '/auth/register/', {'email': 'new@example.com', 'full_name': 'New', 'password': 'pw123456'},
+            content_type='application/json')
+        response = await AsyncRegisterView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh_token', response.cookies)
+        user = await User.objects.aget(email='new@example.com')
+        self.assertTrue(await sync_to_async(user.check_password)('pw123456'))
+
+    async def test_outdated_hash_is_upgraded_on_login(self):
+        # Hashed with a configured but not preferred algorithm.
+        outdated = make_password('pw123456', hasher=get_hashers()[-1].algorithm)
+        await User.objects.filter(pk=self.user.pk).aupdate(password=outdated)
+
+        user = await aauthenticate(email='login@example.com', password='pw123456')
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.backend, 'user.backends.PooledHashModelBackend')
+        stored = (await User.objects.aget(pk=self.user.pk)).password
+        self.assertNotEqual(stored, outdated)
+        self.assertTrue(check_password('pw123456', stored))
+
+
+class SyncLoginTests(TestCase):
+    def post(self, view, path, data):
+        return view.as_view()(RequestFactory().post(path, data, content_type='application/json'))
+
+    def test_register_then_log_in(self):
+        response = self.post(RegisterView, '/auth/register/',
+                             {'email': 'sync@example.com', 'full_name': 'Sync', 'password': 'pw123456'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.cookies)
+        self.assertEqual(self.post(RegisterView, '/auth/register/',
+                                   {'email': 'sync@example.com', 'full_name': 'Sync', 'password': 'pw123456'}
+                                   ).status_code, 400)
+
+        response = self.post(LoginView, '/auth/login/', {'email': 'sync@example.com', 'password': 'pw123456'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh_token', response.cookies)
+        self.assertEqual(self.post(LoginView, '/auth/login/',
+                                   {'email': 'sync@example.com', 'password': 'wrong'}).status_code, 401)
+
+    def test_served_form_follows_server_mode(self):
+        for mode, views in (('wsgi', (RegisterView, LoginView)), ('asgi', (AsyncRegisterView, AsyncLoginView))):
+            with override_settings(SERVER_MODE=mode):
+                self.assertIs(served_view(RegisterView, AsyncRegisterView).view_class, views[0])
+                self.assertIs(served_view(LoginView, AsyncLoginView).view_class, views[1])
@@ -0,0 +1,47 @@
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+from .revocation import is_revoked, revoke, token_writer
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the profile claims needed to rebuild a
+    lightweight user without touching the database. The claims are copied
+    to every access token minted from it.
+
+    With JWT_REVOCATION_MODE = "cache" revocation is checked against the
+    cache denylist, falling back to the blacklist table on a miss, and the
+    outstanding/blacklisted rows are written in the background, so
+    login/logout never touch the token tables.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        if not fast_revocation():
+            token = super().for_user(user)
+        else:
+            # Skip BlacklistMixin.for_user, which inserts the outstanding row inline.
+            token = super(BlacklistMixin, cls).for_user(user)
+            token_writer.outstand(token, user.pk)
+        token['email'] = user.email
+        token['full_name'] = user.full_name
+        return token
+
+    def check_blacklist(self):
+        if not fast_revocation():
+            return super().check_blacklist()
+        if is_revoked(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        if not fast_revocation():
+            return super().blacklist()
+        revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        token_writer.blacklist(self, self.payload.get(api_settings.USER_ID_CLAIM))
+
+
+def fast_revocation():
+    return settings.JWT_REVOCATION_MODE == 'cache'
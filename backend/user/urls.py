@@ -1,10 +1,12 @@
-from django.urls import path
-from .views import RegisterView, LoginView, LogoutView, MeView, RefreshAccessTokenView
-
-urlpatterns = [
-    path('register/', RegisterView.as_view()),
-    path('login/', LoginView.as_view()),
-    path('logout/', LogoutView.as_view()),
-    path('refresh-token/', RefreshAccessTokenView.as_view()),
-    path('me/', MeView.as_view()),
-]
+from django.urls import path
+from backend.async_views import served_view
+from .views import RegisterView, AsyncRegisterView, LoginView, AsyncLoginView, LogoutView, MeView, AsyncMeView, \
+    RefreshAccessTokenView
+
+urlpatterns = [
+    path('register/', served_view(RegisterView, AsyncRegisterView), name='register'),
+    path('login/', served_view(LoginView, AsyncLoginView), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('refresh-token/', RefreshAccessTokenView.as_view(), name='refresh-token'),
+    path('me/', served_view(MeView, AsyncMeView), name='me'),
+]
@@ -1,16 +1,18 @@
 from datetime import timedelta
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.contrib.auth import aauthenticate, authenticate
 from django.utils.timezone import now
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.contrib.auth import authenticate
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.http import JsonResponse
+from backend.async_views import AsyncAPIView
+from .passwords import ahash_password
 from .serializers import UserRegisterSerializer, UserSerializer
+from .tokens import UserRefreshToken
 
 
 class RegisterView(APIView):
@@ -18,59 +20,66 @@ class RegisterView(APIView):
 
     def post(self, request):
         serializer = UserRegisterSerializer(data=request.data)
-
         if serializer.is_valid():
-            serializer.save()
-            user = authenticate(
-                email=request.data['email'],
-                password=request.data['password']
-            )
-            if user is None:
-                return Response({"error": "Invalid credentials"}, status=401)
+            return login_response(UserRefreshToken.for_user(serializer.save()))
+        return Response({
+            "errors": serializer.errors
+        }, status=400)
 
-            refresh = RefreshToken.for_user(user)
-            response = JsonResponse({"message": "Login successful"})
-            response.set_cookie(
-                key='access_token',
-                value=str(refresh.access_token),
-                httponly=True,
-                samesite='Lax'
-            )
-            response.set_cookie(
-                key='refresh_token',
-                value=str(refresh),
-                httponly=True,
-                samesite='Lax'
-            )
-            return response
+
+class AsyncRegisterView(AsyncAPIView, RegisterView):
+    """RegisterView as served under ASGI, hashing on the password pool"""
+
+    async def post(self, request):
+        serializer = UserRegisterSerializer(data=request.data)
+
+        if await sync_to_async(serializer.is_valid)():
+            password_hash = await ahash_password(serializer.validated_data['password'])
+            user = await sync_to_async(serializer.save)(password_hash=password_hash)
+            return login_response(await sync_to_async(UserRefreshToken.for_user)(user))
 
         return Response({
             "errors": serializer.errors
         }, status=400)
+
+
 class LoginView(APIView):
     permission_classes = (AllowAny,)
+
     def post(self, request):
         data = request.data
-        user = authenticate(email=data['email'], password=data['password'])
+        user = authenticate(request, email=data['email'], password=data['password'])
         if user is None:
             return Response({"error": "Invalid credentials"}, status=401)
+        return login_response(UserRefreshToken.for_user(user))
 
-        refresh = RefreshToken.for_user(user)
-        response = JsonResponse({"message": "Login successful"})
-        response.set_cookie(
-            key='access_token',
-            value=str(refresh.access_token),
-            httponly=True,
-            samesite='Lax'
-        )
-        response.set_cookie(
-            key='refresh_token',
-            value=str(refresh),
-            httponly=True,
-            samesite='Lax'
-        )
-        return response
 
+class AsyncLoginView(AsyncAPIView, LoginView):
+    """LoginView as served under ASGI, checking the password on the password pool"""
+
+    async def post(self, request):
+        data = request.data
+        user = await aauthenticate(request, email=data['email'], password=data['password'])
+        if user is None:
+            return Response({"error": "Invalid credentials"}, status=401)
+        return login_response(await sync_to_async(UserRefreshToken.for_user)(user))
+
+
+def login_response(refresh):
+    response = Response({"message": "Login successful"})
+    response.set_cookie(
+        key='access_token',
+        value=str(refresh.access_token),
+        httponly=True,
+        samesite='Lax'
+    )
+    response.set_cookie(
+        key='refresh_token',
+        value=str(refresh),
+        httponly=True,
+        samesite='Lax'
+    )
+    return response
 
 
 class LogoutView(APIView):
@@ -82,7 +91,7 @@ class LogoutView(APIView):
             if not refresh_token:
                 return Response({"error": "Refresh token is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-            token = RefreshToken(refresh_token)
+            token = UserRefreshToken(refresh_token)
             token.blacklist()
 
 
@@ -103,7 +112,7 @@ class RefreshAccessTokenView(APIView):
             return Response({"error": "Refresh token not found in cookies"}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            refresh = RefreshToken(refresh_token)
+            refresh = UserRefreshToken(refresh_token)
             new_access = refresh.access_token
             access_exp = now() + timedelta(minutes=15)
 
@@ -131,4 +140,11 @@ class MeView(APIView):
             'id': user.id,
             'email': user.email,
             'full_name': user.full_name,
-        })
\ No newline at end of file
+        })
+
+
+class AsyncMeView(AsyncAPIView, MeView):
+    """MeView as served under ASGI"""
+
+    async def get(self, request):
+        return MeView.get(self, request)
\ No newline at end of file
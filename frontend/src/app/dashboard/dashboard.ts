@@ -1,9 +1,11 @@
-import { Component } from '@angular/core';
+import { Component, OnDestroy, OnInit } from '@angular/core';
 import {DatePipe, NgClass, NgComponentOutlet, NgIf} from '@angular/common';
 import {RoomDialogComponent} from '../room-dialog.component/room-dialog.component';
-import {InterviewsService, Note, Room} from '../services/interview.service';
+import {DashboardRoom, InterviewsService, Note, Room} from '../services/interview.service';
+import {LiveUpdatesService} from '../services/live-updates';
 import {RouterLink} from '@angular/router';
 import {FormBuilder, FormGroup, ReactiveFormsModule, Validators} from '@angular/forms';
+import {Subscription} from 'rxjs';
 
 
 interface InterviewNote {
@@ -44,20 +46,22 @@ function toContent(raw: unknown): NoteContent {
 })
 
 
-export class DashboardComponent {
+export class DashboardComponent implements OnInit, OnDestroy {
     showDialog = false;
     RoomDialogComponent = RoomDialogComponent;
 
-    userInterviewRooms: Room[] = [];
+    userInterviewRooms: DashboardRoom[] = [];
     selectedRoom: Room | null = null;
     notesOpen = false;
     notesLoading = false;
     notesError: string | null = null;
 
     notesForm!: FormGroup;
+    private liveUpdates?: Subscription;
 
     constructor(
         public interviewServices: InterviewsService,
+        private live: LiveUpdatesService,
         private fb: FormBuilder
     ) {
         this.notesForm = this.fb.group({
@@ -69,10 +73,19 @@ export class DashboardComponent {
             recommendation: ['']
         });
     }
-    ngOnInit() { this.loadRooms(); }
+    ngOnInit() {
+        this.loadRooms();
+        // Closes and renames made elsewhere (other tabs, expiry) arrive pushed.
+        this.liveUpdates = this.live.updates('room.closed', 'room.renamed').subscribe(update => {
+            this.userInterviewRooms = this.userInterviewRooms.map(r => r.id !== update.id ? r
+                : update.type === 'room.closed' ? { ...r, is_closed: true } : { ...r, name: update.name });
+        });
+    }
+
+    ngOnDestroy() { this.liveUpdates?.unsubscribe(); }
 
     loadRooms() {
-        this.interviewServices.getRooms().subscribe(rooms => this.userInterviewRooms = rooms);
+        this.interviewServices.getDashboard().subscribe(rooms => this.userInterviewRooms = rooms);
     }
 
     openCreate() { this.selectedRoom = null; this.showDialog = true; }
@@ -86,7 +99,7 @@ export class DashboardComponent {
         this.interviewServices.closeInterview(room.id, next).subscribe({
             next: (updated) => {
                 // локален ъпдейт
-                this.userInterviewRooms = this.userInterviewRooms.map(r => r.id === updated.id ? updated : r);
+                this.userInterviewRooms = this.userInterviewRooms.map(r => r.id === updated.id ? { ...r, ...updated } : r);
             },
             error: (e) => console.error('Close/Open failed', e)
         });
@@ -111,7 +124,7 @@ export class DashboardComponent {
         if (idx >= 0) {
             this.userInterviewRooms = [
                 ...this.userInterviewRooms.slice(0, idx),
-                room,
+                { ...this.userInterviewRooms[idx], ...room },
                 ...this.userInterviewRooms.slice(idx + 1),
             ];
         } else {
@@ -119,7 +132,7 @@ export class DashboardComponent {
         }
         this.closeDialog();
     };
-    openNotes(room: Room) {
+    openNotes(room: DashboardRoom) {
         this.selectedRoom = room;
         this.notesOpen = true;
         this.notesLoading = true;
@@ -133,6 +146,12 @@ export class DashboardComponent {
             recommendation: ''
         });
 
+        // The dashboard already says whether there is a note to load.
+        if (room.has_note === false) {
+            this.notesLoading = false;
+            return;
+        }
+
         this.interviewServices.getRoomNote(room.room_id).subscribe({
             next: (note: { content?: unknown } | null) => {
                 const content = toContent(note?.content);
@@ -166,10 +185,18 @@ export class DashboardComponent {
         if (!this.selectedRoom) return;
         if (this.notesForm.invalid) return;
         this.notesLoading = true;
+        const roomId = this.selectedRoom.id;
         this.interviewServices
             .updateRoomNote(this.selectedRoom.room_id, this.notesForm.value as Partial<InterviewNote>)
             .subscribe({
-                next: () => {
+                next: (note) => {
+                    this.userInterviewRooms = this.userInterviewRooms.map(r => r.id !== roomId ? r : {
+                        ...r,
+                        has_note: true,
+                        note_id: note.id ?? r.note_id,
+                        note_updated_at: note.updated_at ?? r.note_updated_at,
+                        note_length: note.content?.length ?? r.note_length,
+                    });
                     this.notesLoading = false;
                     this.notesOpen = false;
                 },
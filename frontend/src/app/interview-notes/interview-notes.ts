@@ -3,6 +3,7 @@ import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms';
 import { HttpClient } from '@angular/common/http';
 import { debounceTime, Subject, takeUntil } from 'rxjs';
+import { LiveUpdatesService } from '../services/live-updates';
 
 interface InterviewNote {
     id?: number;
@@ -12,6 +13,7 @@ interface InterviewNote {
     timestamp: string;
     interviewer_name?: string;
     tags?: string[];
+    version?: number;
 }
 
 interface NoteTemplate {
@@ -41,6 +43,10 @@ export class InterviewNotesComponent implements OnInit, OnDestroy {
     isSaving = false;
     lastSaved: Date | null = null;
     saveStatus: 'success' | 'error' | 'saving' = 'success';
+    // Version of the note as last loaded or saved here, and whether there
+    // are edits since.
+    private version = 0;
+    private unsaved = false;
 
     notes = {
         general: '',
@@ -126,12 +132,13 @@ GENERAL:
         }
     ];
 
-    constructor(private http: HttpClient) {}
+    constructor(private http: HttpClient, private live: LiveUpdatesService) {}
 
     ngOnInit(): void {
         if (this.isHost) {
             this.loadExistingNotes();
             this.setupAutoSave();
+            this.followRemoteSaves();
         }
     }
 
@@ -149,12 +156,22 @@ GENERAL:
         });
     }
 
+    // Saves of this note from another tab or device are pushed; reload them
+    // unless there are local edits not yet saved.
+    private followRemoteSaves(): void {
+        this.live.updates('note.updated').pipe(takeUntil(this.destroy$)).subscribe((update) => {
+            if (update.room_id !== this.roomId || update.version <= this.version || this.unsaved) return;
+            this.loadExistingNotes();
+        });
+    }
+
     private loadExistingNotes(): void {
         if (!this.roomId) return;
 
         this.http.get<InterviewNote>(`http://localhost:8000/interview-notes/${this.roomId}/`)
             .subscribe({
                 next: (note) => {
+                    this.version = Math.max(this.version, note?.version ?? 0);
                     if (note && note.content) {
                         try {
                             const parsedNotes = JSON.parse(note.content);
@@ -243,6 +260,7 @@ GENERAL:
     }
 
     onNotesChange(): void {
+        this.unsaved = true;
         this.notesChange$.next();
     }
 
@@ -270,7 +288,10 @@ GENERAL:
         };
 
         try {
-            await this.http.post(`http://localhost:8000/interview-notes/${this.roomId}/`, noteData).toPromise();
+            this.unsaved = false;
+            const saved = await this.http.post<InterviewNote>(`http://localhost:8000/interview-notes/${this.roomId}/`, noteData).toPromise();
+            // Buffered saves (202) carry no version; their pushed event is then ours.
+            this.version = Math.max(this.version, saved?.version ?? 0);
 
             this.saveStatus = 'success';
             this.lastSaved = new Date();
@@ -280,6 +301,7 @@ GENERAL:
             }
         } catch (error) {
             console.error('❌ Failed to save notes:', error);
+            this.unsaved = true;
             this.saveStatus = 'error';
         } finally {
             if (!silent) {
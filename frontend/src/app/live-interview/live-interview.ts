@@ -146,7 +146,8 @@ export class LiveInterviewComponent implements OnInit, AfterViewInit, OnDestroy
             this.resetConnection();
         });
 
-        this.ws.joinRoom(this.roomId, desiredRole);
+        const admission = await this.fetchAdmissionOrNull(this.roomId).catch(() => null);
+        this.ws.joinRoom(this.roomId, desiredRole, admission?.token);
 
         await this.viewReady;
         await this.roleReady;
@@ -211,6 +212,14 @@ export class LiveInterviewComponent implements OnInit, AfterViewInit, OnDestroy
         return await res.json();
     }
 
+    private async fetchAdmissionOrNull(roomUuid: string): Promise<{ token: string, role: 'host' | 'guest' } | null> {
+        const res = await fetch(`http://localhost:8000/interview-rooms/public/${roomUuid}/admission/`, {
+            credentials: 'include',
+        });
+        if (!res.ok) return null;
+        return await res.json();
+    }
+
     private async fetchMeOrNull(): Promise<any | null> {
         const res = await fetch('http://localhost:8000/auth/me/', { credentials: 'include' });
         if (!res.ok) return null;
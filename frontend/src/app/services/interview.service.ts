@@ -1,7 +1,7 @@
 import { Injectable, inject } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import {Observable, of, throwError} from 'rxjs';
-import {catchError} from 'rxjs/operators';
+import {catchError, map, switchMap} from 'rxjs/operators';
 
 export type Room = {
     updated_at: string;
@@ -11,6 +11,14 @@ export type Room = {
     created_at: string;
     is_closed?: boolean;
 };
+// A room from /interview-rooms/dashboard/, with the current user's note activity.
+export type DashboardRoom = Room & {
+    has_note?: boolean;
+    note_id?: number | null;
+    note_updated_at?: string | null;
+    note_length?: number | null;
+};
+type CursorPage<T> = { next: string | null; previous: string | null; results: T[] };
 export type Note = {
     id?: number;
     general?: string;
@@ -43,6 +51,16 @@ export class InterviewsService {
         return this.http.get<Room[]>(`${this.apiUrl}/interview-rooms/`, { withCredentials: true });
     }
 
+    // The dashboard endpoint returns one cursor page per request (answered
+    // with 304 by ETag when nothing changed); pages are followed to the end.
+    getDashboard(): Observable<DashboardRoom[]> {
+        const page = (url: string): Observable<DashboardRoom[]> =>
+            this.http.get<CursorPage<DashboardRoom>>(url, { withCredentials: true }).pipe(
+                switchMap(p => p.next ? page(p.next).pipe(map(rest => [...p.results, ...rest])) : of(p.results))
+            );
+        return page(`${this.apiUrl}/interview-rooms/dashboard/`);
+    }
+
     createRoom(name: string): Observable<Room> {
         return this.http.post<Room>(`${this.apiUrl}/interview-rooms/`, { name }, { withCredentials: true });
     }
@@ -0,0 +1,67 @@
+import { Injectable, NgZone, inject } from '@angular/core';
+import { Observable, Subject, filter } from 'rxjs';
+
+export type LiveUpdate =
+    | { type: 'room.closed'; id: number; room_id: string }
+    | { type: 'room.renamed'; id: number; room_id: string; name: string }
+    | { type: 'note.updated'; id: number; room_id: string; version: number; length: number; updated_at: string };
+
+// Close code the server uses once the access token has expired.
+const TOKEN_EXPIRED = 4001;
+const MAX_RETRY_MS = 30000;
+
+/**
+ * Room and note changes pushed by the backend over /updates/, so pages
+ * update in place instead of re-fetching. One socket is shared by every
+ * subscriber; it reconnects with backoff, and after a token expiry once the
+ * next API call (through the interceptor) has refreshed the cookie.
+ */
+@Injectable({ providedIn: 'root' })
+export class LiveUpdatesService {
+    private zone = inject(NgZone);
+    private socket: WebSocket | null = null;
+    private updates$ = new Subject<LiveUpdate>();
+    private subscribers = 0;
+    private retryMs = 1000;
+    private retryTimer: ReturnType<typeof setTimeout> | null = null;
+
+    updates<T extends LiveUpdate['type']>(...types: T[]): Observable<Extract<LiveUpdate, { type: T }>> {
+        return new Observable<Extract<LiveUpdate, { type: T }>>((observer) => {
+            if (this.subscribers++ === 0) this.connect();
+            const subscription = this.updates$
+                .pipe(filter((update): update is Extract<LiveUpdate, { type: T }> =>
+                    types.length === 0 || types.includes(update.type as T)))
+                .subscribe(observer);
+            return () => {
+                subscription.unsubscribe();
+                if (--this.subscribers === 0) this.disconnect();
+            };
+        });
+    }
+
+    private connect(): void {
+        const socket = new WebSocket(`ws://${window.location.hostname}:8000/updates/`);
+        this.socket = socket;
+
+        socket.onopen = () => { this.retryMs = 1000; };
+        socket.onmessage = (message) => {
+            const update = JSON.parse(message.data) as LiveUpdate;
+            this.zone.run(() => this.updates$.next(update));
+        };
+        socket.onclose = (event) => {
+            if (this.socket !== socket) return;
+            this.socket = null;
+            const delay = event.code === TOKEN_EXPIRED ? 5000 : this.retryMs;
+            this.retryMs = Math.min(this.retryMs * 2, MAX_RETRY_MS);
+            this.retryTimer = setTimeout(() => this.connect(), delay);
+        };
+    }
+
+    private disconnect(): void {
+        if (this.retryTimer) clearTimeout(this.retryTimer);
+        this.retryTimer = null;
+        const socket = this.socket;
+        this.socket = null;
+        socket?.close();
+    }
+}
@@ -9,7 +9,8 @@ export class WebSocketService {
     connect(): void {
         const SERVER_URL = this.getServerUrl();
 
-        this.socket = io(SERVER_URL);
+        // Websocket only: the Django signaling consumer does not long-poll.
+        this.socket = io(SERVER_URL, { transports: ['websocket'] });
         this.socket.on('connect', () => {
             console.log('✅ Connected to WebSocket server, socket ID:', this.socket.id);
             console.log('🌐 Server URL:', SERVER_URL);
@@ -43,9 +44,9 @@ export class WebSocketService {
     }
 
     // Room management
-    joinRoom(roomId: string, role: 'host' | 'guest') {
+    joinRoom(roomId: string, role: 'host' | 'guest', token?: string | null) {
         console.log('🚪 Joining room:', roomId, 'as:', role);
-        this.socket.emit('joinRoom', { roomId, role });
+        this.socket.emit('joinRoom', { roomId, role, token });
     }
 
     onRoleAssigned(): Observable<'host' | 'guest'> {
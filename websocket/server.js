@@ -2,6 +2,7 @@ const express = require('express');
 const http = require('http');
 const { Server } = require('socket.io');
 const os = require('os');
+const crypto = require('crypto');
 
 const app = express();
 const server = http.createServer(app);
@@ -23,6 +24,80 @@ setInterval(() => {
     }
 }, 30000);
 
+const BACKEND_URL = process.env.BACKEND_URL || 'http://localhost:8000';
+
+// ============ ROOM ADMISSION ============
+// With ROOM_ADMISSION_KEY set, joinRoom requires a token from the backend's
+// /interview-rooms/public/<room_id>/admission/ endpoint. It is verified here
+// with the shared key, so a join costs no backend request; rooms closed
+// since the token was issued come from the polled revocation list.
+
+const ADMISSION_KEY = process.env.ROOM_ADMISSION_KEY || '';
+const REVOCATION_POLL_MS = parseInt(process.env.ROOM_ADMISSION_POLL_MS || '5000', 10);
+let revokedRooms = {};
+let revocationsEtag = null;
+
+function verifyAdmission(token, roomId) {
+    const parts = String(token || '').split('.');
+    if (parts.length !== 3) return null;
+    const expected = crypto.createHmac('sha256', ADMISSION_KEY).update(`${parts[0]}.${parts[1]}`).digest();
+    const signature = Buffer.from(parts[2], 'base64url');
+    if (signature.length !== expected.length || !crypto.timingSafeEqual(signature, expected)) return null;
+
+    let header, payload;
+    try {
+        header = JSON.parse(Buffer.from(parts[0], 'base64url').toString());
+        payload = JSON.parse(Buffer.from(parts[1], 'base64url').toString());
+    } catch (error) {
+        return null;
+    }
+    if (header.alg !== 'HS256' || payload.room_id !== roomId) return null;
+    if (!(payload.exp > Date.now() / 1000)) return null;
+    const closedAt = revokedRooms[roomId];
+    if (closedAt !== undefined && closedAt >= payload.iat) return null;
+    return payload;
+}
+
+// Signaling and editor events are only handled for rooms the socket has
+// joined, so a socket admitted to one room cannot reach another. With
+// admission on, the code editor is only open to sockets admitted to the
+// room's call.
+function canJoinCodeEditor(socket, roomId) {
+    return !ADMISSION_KEY || socket.rooms.has(roomId);
+}
+
+function inCodeEditor(socket, roomId) {
+    return socket.rooms.has(`${roomId}-code`);
+}
+
+async function pollRevocations() {
+    try {
+        const response = await fetch(`${BACKEND_URL}/interview-rooms/admission/revocations/`, {
+            headers: revocationsEtag ? { 'If-None-Match': revocationsEtag } : {}
+        });
+        if (response.status === 200) {
+            const body = await response.json();
+            revocationsEtag = response.headers.get('etag');
+            for (const roomId of Object.keys(body.revoked)) {
+                if (revokedRooms[roomId] !== body.revoked[roomId] && rooms[roomId]) {
+                    console.log(`🔒 Room ${roomId} was closed, disconnecting its participants`);
+                    io.to(roomId).emit('roomClosed');
+                    io.in(roomId).disconnectSockets(true);
+                    delete rooms[roomId];
+                }
+            }
+            revokedRooms = body.revoked;
+        }
+    } catch (error) {
+        console.log(`⚠️ Could not refresh room revocations: ${error.message}`);
+    }
+}
+
+if (ADMISSION_KEY) {
+    pollRevocations();
+    setInterval(pollRevocations, REVOCATION_POLL_MS);
+}
+
 function getLocalIPAddress() {
     const interfaces = os.networkInterfaces();
     for (const name of Object.keys(interfaces)) {
@@ -35,75 +110,100 @@ function getLocalIPAddress() {
     return '127.0.0.1';
 }
 
-function executeCode(code, language) {
+// Runs candidate code through the backend's sandboxed executor and relays
+// its NDJSON stream: each chunk goes out as codeExecutionOutput, and the
+// collected result as codeExecutionResult once the run ends.
+async function executeCode(roomId, code, language, onOutput) {
     console.log(`🔧 Executing ${language} code:`, code.substring(0, 100) + '...');
 
+    let output = '';
+    let errorOutput = '';
+    let exit = null;
     try {
-        if (language === 'javascript') {
-            const originalConsole = console;
-            let output = '';
-            let errorOutput = '';
-
-            const mockConsole = {
-                log: (...args) => {
-                    const message = args.map(arg =>
-                        typeof arg === 'object' ? JSON.stringify(arg, null, 2) : String(arg)
-                    ).join(' ');
-                    output += message + '\n';
-                },
-                error: (...args) => {
-                    const message = args.map(arg => String(arg)).join(' ');
-                    errorOutput += 'Error: ' + message + '\n';
-                },
-                warn: (...args) => {
-                    const message = args.map(arg => String(arg)).join(' ');
-                    output += 'Warning: ' + message + '\n';
+        const response = await fetch(`${BACKEND_URL}/code-execution/${roomId}/runs/`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ language, code })
+        });
+        if (!response.ok) {
+            const body = await response.json().catch(() => ({}));
+            return { error: `Execution Error: ${body.detail || JSON.stringify(body) || response.status}` };
+        }
+
+        const decoder = new TextDecoder();
+        let buffered = '';
+        for await (const chunk of response.body) {
+            buffered += decoder.decode(chunk, { stream: true });
+            let newline;
+            while ((newline = buffered.indexOf('\n')) >= 0) {
+                const event = JSON.parse(buffered.slice(0, newline));
+                buffered = buffered.slice(newline + 1);
+                if (event.type === 'exit') {
+                    exit = event;
+                } else {
+                    if (event.type === 'stdout') output += event.data;
+                    else errorOutput += event.data;
+                    onOutput(event);
                 }
-            };
+            }
+        }
+    } catch (error) {
+        return { error: `Execution Error: ${error.message}` };
+    }
 
-            const safeGlobals = {
-                console: mockConsole,
-                Math: Math,
-                Date: Date,
-                JSON: JSON,
-                parseInt: parseInt,
-                parseFloat: parseFloat,
-                isNaN: isNaN,
-                isFinite: isFinite,
-                String: String,
-                Number: Number,
-                Boolean: Boolean,
-                Array: Array,
-                Object: Object
-            };
+    if (exit && exit.status !== 'ok' && exit.status !== 'error') {
+        errorOutput += `\n[${exit.status}]`;
+    }
+    const result = {
+        output: output || 'Code executed successfully (no output)',
+        error: errorOutput || undefined
+    };
+    console.log(`✅ ${language} execution finished:`, exit);
+    return result;
+}
 
-            const func = new Function(...Object.keys(safeGlobals), code);
-            func(...Object.values(safeGlobals));
+// ============ CODE SESSION PERSISTENCE ============
+// Editor operations are queued per room and posted to the backend's
+// /code-sessions/<room_id>/operations/ endpoint in batches, so keystroke-rate
+// editing costs one request per room per CODE_SESSION_FLUSH_MS. The backend
+// only accepts them with its CODE_SESSION_RELAY_SECRET.
 
-            const result = {
-                output: output || 'Code executed successfully (no output)',
-                error: errorOutput || undefined
-            };
+const CODE_SESSION_FLUSH_MS = parseInt(process.env.CODE_SESSION_FLUSH_MS || '1000', 10);
+const CODE_SESSION_RELAY_SECRET = process.env.CODE_SESSION_RELAY_SECRET || '';
+const CODE_SESSION_MAX_BATCH = 2000;
+const pendingCodeOps = new Map();
 
-            console.log(`✅ JavaScript execution result:`, result);
-            return result;
+function recordCodeOp(roomId, op) {
+    if (!pendingCodeOps.has(roomId)) pendingCodeOps.set(roomId, []);
+    pendingCodeOps.get(roomId).push(op);
+}
 
-        } else {
-            const result = {
-                output: `Code execution for ${language} is not implemented in this demo.\n\nReceived code:\n${code}\n\nNote: Only JavaScript is currently supported for execution.`
-            };
-            console.log(`ℹ️ Unsupported language result:`, result);
-            return result;
+async function flushCodeOps() {
+    const batches = Array.from(pendingCodeOps.entries());
+    pendingCodeOps.clear();
+    await Promise.all(batches.map(async ([roomId, ops]) => {
+        for (let start = 0; start < ops.length; start += CODE_SESSION_MAX_BATCH) {
+            const batch = ops.slice(start, start + CODE_SESSION_MAX_BATCH);
+            try {
+                const response = await fetch(`${BACKEND_URL}/code-sessions/${encodeURIComponent(roomId)}/operations/`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json', 'X-Relay-Secret': CODE_SESSION_RELAY_SECRET },
+                    body: JSON.stringify({ ops: batch })
+                });
+                // A 4xx (unknown or closed room) will not succeed on retry.
+                if (response.status >= 500) throw new Error(`HTTP ${response.status}`);
+            } catch (error) {
+                console.log(`⚠️ Could not store ${ops.length - start} code operations for room ${roomId}: ${error.message}`);
+                const requeued = ops.slice(start).concat(pendingCodeOps.get(roomId) || []);
+                pendingCodeOps.set(roomId, requeued);
+                return;
+            }
         }
-    } catch (error) {
-        const result = {
-            error: `Execution Error: ${error.message}\n\nStack trace:\n${error.stack}`
-        };
-        console.log(`❌ Code execution error:`, result);
-        return result;
-    }
+    }));
 }
 
+setInterval(flushCodeOps, CODE_SESSION_FLUSH_MS);
+
 function resetNegotiation(roomId) {
     const room = rooms[roomId];
     if (room) {
@@ -144,9 +244,19 @@ io.on('connection', (socket) => {
     console.log('✅ Connected:', socket.id);
 
 
-    socket.on('joinRoom', ({ roomId, role }) => {
+    socket.on('joinRoom', ({ roomId, role, token }) => {
         if (!roomId) return;
 
+        if (ADMISSION_KEY) {
+            const admission = verifyAdmission(token, roomId);
+            if (!admission) {
+                console.log(`⛔ Admission denied for ${socket.id} in room ${roomId}`);
+                socket.emit('admissionDenied');
+                return;
+            }
+            role = admission.role;
+        }
+
         console.log(`🔍 Join request: ${socket.id} wants role "${role}" in room ${roomId}`);
 
         if (!rooms[roomId]) {
@@ -222,6 +332,7 @@ io.on('connection', (socket) => {
     });
 
     socket.on('ready', ({ roomId, role }) => {
+        if (!socket.rooms.has(roomId)) return;
         const room = rooms[roomId];
         if (!room) {
             console.log(`❌ Ready event for non-existent room: ${roomId}`);
@@ -247,6 +358,7 @@ io.on('connection', (socket) => {
     });
 
     socket.on('needRenegotiate', ({ roomId }) => {
+        if (!socket.rooms.has(roomId)) return;
         const room = rooms[roomId];
         console.log(`🔄 Renegotiation requested for room ${roomId} by ${socket.id}`);
         if (room?.host) {
@@ -256,18 +368,21 @@ io.on('connection', (socket) => {
     });
 
     socket.on('offer', ({ roomId, offer }) => {
+        if (!socket.rooms.has(roomId)) return;
         console.log(`📤 Offer sent by ${socket.id} to room ${roomId}`);
         socket.to(roomId).emit('offer', offer);
         if (rooms[roomId]) rooms[roomId].lastActivity = Date.now();
     });
 
     socket.on('answer', ({ roomId, answer }) => {
+        if (!socket.rooms.has(roomId)) return;
         console.log(`📤 Answer sent by ${socket.id} to room ${roomId}`);
         socket.to(roomId).emit('answer', answer);
         if (rooms[roomId]) rooms[roomId].lastActivity = Date.now();
     });
 
     socket.on('ice-candidate', ({ roomId, candidate }) => {
+        if (!socket.rooms.has(roomId)) return;
         console.log(`❄️ ICE candidate from ${socket.id} to room ${roomId}`);
         socket.to(roomId).emit('ice-candidate', candidate);
         if (rooms[roomId]) rooms[roomId].lastActivity = Date.now();
@@ -282,6 +397,11 @@ io.on('connection', (socket) => {
 
 
     socket.on('joinCodeEditor', ({ roomId, user }) => {
+        if (!canJoinCodeEditor(socket, roomId)) {
+            console.log(`⛔ Code editor denied for ${socket.id} in room ${roomId}`);
+            socket.emit('admissionDenied');
+            return;
+        }
         console.log(`📝 ${user.name} joining code editor in room ${roomId}`);
 
         if (!rooms[roomId]) {
@@ -323,8 +443,10 @@ io.on('connection', (socket) => {
     });
 
     socket.on('codeChange', ({ roomId, change }) => {
+        if (!inCodeEditor(socket, roomId)) return;
         console.log(`📝 Code change in room ${roomId} by ${change.userId}`);
         socket.to(`${roomId}-code`).emit('codeChange', change);
+        recordCodeOp(roomId, { ...change, type: 'change' });
 
         if (rooms[roomId]) {
             rooms[roomId].lastActivity = Date.now();
@@ -332,28 +454,34 @@ io.on('connection', (socket) => {
     });
 
     socket.on('languageChange', ({ roomId, language, userId }) => {
+        if (!inCodeEditor(socket, roomId)) return;
         console.log(`🔄 Language change to ${language} in room ${roomId}`);
         socket.to(`${roomId}-code`).emit('languageChange', { language, userId });
+        recordCodeOp(roomId, { type: 'language', language, userId, timestamp: Date.now() });
 
         if (rooms[roomId]) {
             rooms[roomId].lastActivity = Date.now();
         }
     });
 
-    socket.on('codeExecution', ({ roomId, code, language, userId }) => {
+    socket.on('codeExecution', async ({ roomId, code, language, userId }) => {
+        if (!inCodeEditor(socket, roomId)) return;
         console.log(`▶️ Code execution request in room ${roomId} by ${userId}`);
 
-        const result = executeCode(code, language);
-        console.log(`📤 Code execution result:`, result);
-
-        io.to(`${roomId}-code`).emit('codeExecutionResult', result);
-
         if (rooms[roomId]) {
             rooms[roomId].lastActivity = Date.now();
         }
+
+        const result = await executeCode(roomId, code, language, (event) => {
+            io.to(`${roomId}-code`).emit('codeExecutionOutput', event);
+        });
+        console.log(`📤 Code execution result:`, result);
+
+        io.to(`${roomId}-code`).emit('codeExecutionResult', result);
     });
 
     socket.on('codeReset', ({ roomId, code, userId }) => {
+        if (!inCodeEditor(socket, roomId)) return;
         console.log(`🔄 Code reset in room ${roomId} by ${userId}`);
         socket.to(`${roomId}-code`).emit('codeChange', {
             range: {
@@ -366,6 +494,7 @@ io.on('connection', (socket) => {
             timestamp: Date.now(),
             userId: userId
         });
+        recordCodeOp(roomId, { type: 'reset', code, userId, timestamp: Date.now() });
 
         if (rooms[roomId]) {
             rooms[roomId].lastActivity = Date.now();